@@ -5,14 +5,204 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
 import re
+from chromedriver_cache import servicio_chrome
+from esperas import esperar_listo, resumen_esperas, altura_cambia, red_inactiva, cualquiera
+from tiendas import TIENDAS
+from recursos import bloquear_recursos, registrar_consumo, resumen_consumo
+from http_fetch import ClienteHTTP
+from paginacion import paginas_woocommerce
+from parseo import documento, html_raiz, resumen_parseo
+from perfil_selectores import PerfilSelectores
+from precios import limpiar_precio, resumen_precios
+
+RUTA_PERFIL_SELECTORES = os.path.join(os.getcwd(), "perfil_selectores.json")
+
+# ---------------  SELECTORES Y MÉTODOS (orden de la cascada completa)  ---------------
+SELECTORES_PRODUCTO = [
+    "section.product",
+    "li.product",
+    "div.product",
+    ".product-grid-item",
+    ".product-item",
+    ".product-inner",
+    ".woocommerce-loop-product__link",
+    ".product-wrapper"
+]
+
+SELECTORES_NOMBRE = [
+    "h3.heading-title", 
+    "h3.product-name", 
+    "h2", 
+    "h3", 
+    "h4",
+    ".product-title",
+    ".product-name a",
+    "a h3",
+    ".title",
+    ".name",
+    "h2.woocommerce-loop-product__title"
+]
+
+def texto_selector(product, selector):
+    try:
+        nombre_tag = product.select_one(selector)
+        return nombre_tag.get_text(strip=True) if nombre_tag else None
+    except Exception:
+        return None
+
+def precio_ins(product):
+    """Método 1: precio en <ins> (precio con descuento)"""
+    price_tag = product.find("ins")
+    if price_tag:
+        price_amount = price_tag.find(["span", "p", "bdi"], class_=re.compile("price|amount", re.I))
+        return (price_amount or price_tag).get_text(strip=True)
+
+def precio_clase(product):
+    """Método 2: otros elementos de precio"""
+    for elem in product.find_all(["span", "p", "div"], class_=re.compile("price|amount", re.I)):
+        if elem.get_text(strip=True):
+            return elem.get_text(strip=True)
+
+def precio_lector(product):
+    """Método 3: texto de screen reader"""
+    price_tag = product.find("span", class_="screen-reader-text")
+    if price_tag:
+        price_text = price_tag.get_text(strip=True)
+        if "precio" in price_text.lower():
+            match = re.search(r'Bs\.\s*([\d.,]+)', price_text)
+            if match:
+                return match.group(1)
+
+def precio_data(product):
+    """Método 4: atributos de datos"""
+    for cache_tag in product.find_all(attrs={"data-price": True}):
+        if cache_tag['data-price']:
+            return cache_tag['data-price']
+
+def precio_texto(product):
+    """Método 5: cualquier elemento con información de precio"""
+    for element in product.find_all(string=re.compile(r'Bs\.|REF|USD|\d+\.\d+')):
+        if element.parent and not any(x in str(element.parent).lower() for x in ['button', 'input', 'script']):
+            match = re.search(r'(\d+[\d.,]*)', element)
+            if match:
+                return match.group(1)
+
+METODOS_PRECIO = {"ins": precio_ins, "clase": precio_clase, "lector": precio_lector,
+                  "data": precio_data, "texto": precio_texto}
+
+def probar_metodo_precio(metodo, product):
+    try:
+        return METODOS_PRECIO[metodo](product)
+    except Exception as e:
+        print(f"Error al procesar el precio: {str(e)}")
+        return None
+
+def normalizar_precio(precio):
+    """Precio con 2 decimales (mismas reglas que precios.py para miles y decimales)"""
+    valor = limpiar_precio(precio)
+    return f"{valor:.2f}" if valor is not None else "Precio no encontrado"
+
+def _enlace_producto(product):
+    """Enlace permanente de la tarjeta: ella misma si es un enlace, el de producto de
+    WooCommerce o el primero que no sea de añadir al carrito"""
+    if product.name == "a" and product.get("href"):
+        return product["href"]
+    enlace = product.select_one("a.woocommerce-loop-product__link[href]")
+    if enlace:
+        return enlace["href"]
+    for enlace in product.find_all("a", href=True):
+        if "add-to-cart" not in enlace["href"]:
+            return enlace["href"]
+    return None
+
+def clave_producto(product):
+    """Clave estable de una tarjeta: el enlace al producto (o el ID de WooCommerce / SKU si no hay).
+
+    El enlace es lo único que tienen tanto la tarjeta como sus elementos anidados que también
+    coinciden con SELECTORES_PRODUCTO (a.woocommerce-loop-product__link, .product-wrapper...):
+    el ID suele estar en el botón del carrito, fuera del enlace.
+    """
+    enlace = _enlace_producto(product)
+    if enlace:
+        return enlace.rstrip("/")
+    for atributo in ("data-product_id", "data-product-id", "data-sku"):
+        tag = product if product.get(atributo) else product.find(attrs={atributo: True})
+        if tag:
+            return tag[atributo]
+    return product.get_text(" ", strip=True)
+
+def productos_farmadon(sopas, perfil, termino_busqueda):
+    """Productos (nombre, precio, producto_busqueda) de las páginas de una búsqueda, en orden"""
+    productos = []
+    
+    # Productos: primero los selectores que funcionaron la última vez (perfil),
+    # la cascada completa sólo si esos no encuentran nada
+    product_sections = perfil.todos(
+        "producto", SELECTORES_PRODUCTO,
+        lambda selector: [e for soup in sopas for e in soup.select(selector)])
+    
+    # Si no encontramos productos, intentar una búsqueda más amplia
+    if not product_sections:
+        print("No se encontraron productos con selectores específicos, intentando búsqueda amplia...")
+        # Buscar cualquier elemento que pueda contener un producto
+        possible_containers = [c for soup in sopas for c in soup.select(".col, .item, .box, .card, .product-box")]
+        for container in possible_containers:
+            # Verificar si el contenedor tiene elementos que sugieran que es un producto
+            has_name = container.find(["h2", "h3", "h4"], class_=re.compile("title|name|product", re.I))
+            has_price = container.find(class_=re.compile("price|amount", re.I))
+            if has_name and has_price:
+                product_sections.append(container)
+                print("Producto encontrado mediante búsqueda amplia")
+    
+    # Eliminar duplicados (un mismo producto puede coincidir con varios selectores
+    # o estar anidado): clave estable por ID de producto / enlace, no por el HTML
+    seen_ids = set()
+    unique_products = []
+    for product in product_sections:
+        product_id = clave_producto(product)
+        if product_id not in seen_ids:
+            seen_ids.add(product_id)
+            unique_products.append(product)
+    
+    product_sections = unique_products
+    
+    print(f"Productos únicos encontrados para {termino_busqueda}: {len(product_sections)}")
+    
+    for product in product_sections:
+        # Extraer nombre del producto
+        _, nombre = perfil.primero("nombre", SELECTORES_NOMBRE,
+                                   lambda selector: texto_selector(product, selector))
+        
+        # Si aún no encontramos el nombre, buscar en enlaces
+        if not nombre:
+            nombre = "Nombre no encontrado"
+            a_tags = product.find_all("a")
+            for a_tag in a_tags:
+                if a_tag.get_text(strip=True) and len(a_tag.get_text(strip=True)) > 5:
+                    nombre = a_tag.get_text(strip=True)
+                    break
+        
+        # Extraer precio: primero el método que funcionó la última vez
+        _, precio = perfil.primero("precio", list(METODOS_PRECIO),
+                                   lambda metodo: probar_metodo_precio(metodo, product))
+        precio = normalizar_precio(precio)
+        
+        # Agregar producto a la lista
+        productos.append({
+            "nombre": nombre,
+            "precio": precio,
+            "producto_busqueda": termino_busqueda
+        })
+    return productos
 
 def scrape_farmadon_full():
     # Lista de productos a buscar (incluyendo diclofenac potásico)
     PRODUCTOS = ["Paracetamol", "Ibuprofeno", "Loratadina", "Diclofenac Potasico"]
+    PAGINAS_MAX = 20          # tope de páginas /page/N/ por búsqueda
+    PAGINAS_EN_PARALELO = 3
     
     # Configurar opciones de Chrome
     chrome_options = Options()
@@ -22,259 +212,114 @@ def scrape_farmadon_full():
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
     
-    # Iniciar el navegador
-    driver = webdriver.Chrome(options=chrome_options)
+    # El navegador se inicia sólo si alguna búsqueda no se puede resolver por HTTP
+    cliente = ClienteHTTP()
+    perfil = PerfilSelectores(RUTA_PERFIL_SELECTORES, "farmadon")
+    driver = None
     all_products = []
-    
-    try:
-        for termino_busqueda in PRODUCTOS:
-            print(f"\n=== Buscando productos para: {termino_busqueda} ===")
-            
-            # Formatear término de búsqueda para URL
-            termino_formateado = termino_busqueda.replace(" ", "+")
-            base_url = f"https://www.farmadon.com.ve/?s={termino_formateado}&post_type=product&dgwt_wcas=1"
-            
-            print("Accediendo a la página de búsqueda...")
-            driver.get(base_url)
-            
-            # Esperar a que cargue la página
-            try:
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "section.product, .products, .woocommerce-pagination, .product, .product-grid-item"))
-                )
-                print("Página principal cargada")
-            except:
-                print("No se encontraron elementos products o paginación, continuando...")
+
+    def html_con_navegador(base_url):
+        """Respaldo: Chrome con scroll infinito y "Cargar más" cuando HTTP no alcanza"""
+        nonlocal driver
+        if driver is None:
+            driver = webdriver.Chrome(service=servicio_chrome(), options=chrome_options)
+            bloquear_recursos(driver, "farmadon", TIENDAS["farmadon"])  # sin imágenes/fuentes/trackers
+        
+        print("Accediendo a la página de búsqueda...")
+        driver.get(base_url)
+        
+        # Esperar a que cargue la página
+        try:
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "section.product, .products, .woocommerce-pagination, .product, .product-grid-item"))
+            )
+            print("Página principal cargada")
+        except:
+            print("No se encontraron elementos products o paginación, continuando...")
+        
+        # Intentar hacer clic en "Cargar más" si existe
+        try:
+            load_more_button = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ".load-more, .btn-load-more, #load-more, button.load-more"))
+            )
+            load_more_button.click()
+            print("Se hizo clic en el botón 'Cargar más'")
+            esperar_listo(driver, TIENDAS["farmadon"]["listo"], timeout=3, etiqueta="farmadon")
+        except:
+            print("No se encontró botón 'Cargar más'")
+        
+        # Manejar infinite scroll con más intentos
+        print("Iniciando scroll infinito para cargar todos los productos...")
+        last_height = driver.execute_script("return document.body.scrollHeight")
+        scroll_attempts = 0
+        max_scroll_attempts = 20  # Aumentamos a 20 intentos
+        no_new_content_count = 0
+        max_no_new_content = 5  # Aumentamos a 5 intentos sin contenido nuevo
+        
+        while scroll_attempts < max_scroll_attempts:
+            # Hacer scroll hasta el final de la página
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             
-            # Intentar hacer clic en "Cargar más" si existe
-            try:
-                load_more_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, ".load-more, .btn-load-more, #load-more, button.load-more"))
-                )
-                load_more_button.click()
-                print("Se hizo clic en el botón 'Cargar más'")
-                time.sleep(3)
-            except:
-                print("No se encontró botón 'Cargar más'")
+            # Esperar a que carguen nuevos productos: sale apenas crece la página
+            # o cuando la red queda inactiva (no hay nada más que cargar)
+            esperar_listo(driver, cualquiera(altura_cambia(), red_inactiva(800)),
+                          timeout=4, etiqueta="farmadon_scroll")
             
-            # Manejar infinite scroll con más intentos
-            print("Iniciando scroll infinito para cargar todos los productos...")
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            scroll_attempts = 0
-            max_scroll_attempts = 20  # Aumentamos a 20 intentos
-            no_new_content_count = 0
-            max_no_new_content = 5  # Aumentamos a 5 intentos sin contenido nuevo
+            # Calcular nueva altura de la página
+            new_height = driver.execute_script("return document.body.scrollHeight")
             
-            while scroll_attempts < max_scroll_attempts:
-                # Hacer scroll hasta el final de la página
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                
-                # Esperar a que carguen nuevos productos (más tiempo)
-                time.sleep(4)
-                
-                # Calcular nueva altura de la página
-                new_height = driver.execute_script("return document.body.scrollHeight")
-                
-                # Verificar si se cargó nuevo contenido
-                if new_height == last_height:
-                    no_new_content_count += 1
-                    print(f"No nuevo contenido ({no_new_content_count}/{max_no_new_content})")
-                else:
-                    no_new_content_count = 0
-                    print(f"Nuevo contenido detectado. Nueva altura: {new_height}px")
-                
-                # Si no hay nuevo contenido después de varios intentos, terminar
-                if no_new_content_count >= max_no_new_content:
-                    print("No se detectó nuevo contenido después de varios intentos, finalizando scroll.")
-                    break
-                    
-                last_height = new_height
-                scroll_attempts += 1
-                print(f"Intento de scroll {scroll_attempts}/{max_scroll_attempts}. Altura de la página: {new_height}px")
+            # Verificar si se cargó nuevo contenido
+            if new_height == last_height:
+                no_new_content_count += 1
+                print(f"No nuevo contenido ({no_new_content_count}/{max_no_new_content})")
+            else:
+                no_new_content_count = 0
+                print(f"Nuevo contenido detectado. Nueva altura: {new_height}px")
             
-            # Intentar hacer clic en "Cargar más" nuevamente después del scroll
-            try:
-                load_more_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, ".load-more, .btn-load-more, #load-more, button.load-more"))
-                )
-                load_more_button.click()
-                print("Se hizo clic en el botón 'Cargar más' después del scroll")
-                time.sleep(3)
+            # Si no hay nuevo contenido después de varios intentos, terminar
+            if no_new_content_count >= max_no_new_content:
+                print("No se detectó nuevo contenido después de varios intentos, finalizando scroll.")
+                break
                 
-                # Hacer scroll adicional después de cargar más
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
-            except:
-                print("No se encontró botón 'Cargar más' después del scroll")
-            
-            # Extraer productos después del scroll
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            
-            # Buscar productos con varios selectores posibles
-            product_selectors = [
-                "section.product",
-                "li.product",
-                "div.product",
-                ".product-grid-item",
-                ".product-item",
-                ".product-inner",
-                ".woocommerce-loop-product__link",
-                ".product-wrapper"
-            ]
-            
-            product_sections = []
-            for selector in product_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    product_sections.extend(elements)
-                    print(f"Encontrados {len(elements)} productos con selector: {selector}")
-            
-            # Si no encontramos productos, intentar una búsqueda más amplia
-            if not product_sections:
-                print("No se encontraron productos con selectores específicos, intentando búsqueda amplia...")
-                # Buscar cualquier elemento que pueda contener un producto
-                possible_containers = soup.select(".col, .item, .box, .card, .product-box")
-                for container in possible_containers:
-                    # Verificar si el contenedor tiene elementos que sugieran que es un producto
-                    has_name = container.find(["h2", "h3", "h4"], class_=re.compile("title|name|product", re.I))
-                    has_price = container.find(class_=re.compile("price|amount", re.I))
-                    if has_name and has_price:
-                        product_sections.append(container)
-                        print("Producto encontrado mediante búsqueda amplia")
+            last_height = new_height
+            scroll_attempts += 1
+            print(f"Intento de scroll {scroll_attempts}/{max_scroll_attempts}. Altura de la página: {new_height}px")
+        
+        # Intentar hacer clic en "Cargar más" nuevamente después del scroll
+        try:
+            load_more_button = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ".load-more, .btn-load-more, #load-more, button.load-more"))
+            )
+            load_more_button.click()
+            print("Se hizo clic en el botón 'Cargar más' después del scroll")
+            esperar_listo(driver, TIENDAS["farmadon"]["listo"], timeout=3, etiqueta="farmadon")
             
-            # Eliminar duplicados (por si un elemento coincide con múltiples selectores)
-            seen_ids = set()
-            unique_products = []
-            for product in product_sections:
-                product_id = str(product)
-                if product_id not in seen_ids:
-                    seen_ids.add(product_id)
-                    unique_products.append(product)
+            # Hacer scroll adicional después de cargar más
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            esperar_listo(driver, cualquiera(altura_cambia(), red_inactiva(800)),
+                          timeout=3, etiqueta="farmadon_scroll")
+        except:
+            print("No se encontró botón 'Cargar más' después del scroll")
+        
+        # Extraer productos después del scroll
+        registrar_consumo(driver, "farmadon")
+        return html_raiz(driver, "farmadon")
+    
+    try:
+        for termino_busqueda in PRODUCTOS:
+            print(f"\n=== Buscando productos para: {termino_busqueda} ===")
             
-            product_sections = unique_products
+            # Formatear término de búsqueda para URL
+            termino_formateado = termino_busqueda.replace(" ", "+")
+            base_url = TIENDAS["farmadon"]["url_busqueda"].format(termino_formateado)
             
-            print(f"Productos únicos encontrados para {termino_busqueda}: {len(product_sections)}")
+            # WooCommerce renderiza en servidor: páginas /page/N/ por HTTP en paralelo, Chrome sólo de respaldo
+            paginas = paginas_woocommerce(cliente, base_url, TIENDAS["farmadon"],
+                                          lambda: html_con_navegador(base_url),
+                                          PAGINAS_MAX, PAGINAS_EN_PARALELO)
+            sopas = [documento(html, "farmadon") for html in paginas]
             
-            for product in product_sections:
-                # Extraer nombre del producto
-                nombre = "Nombre no encontrado"
-                nombre_selectors = [
-                    "h3.heading-title", 
-                    "h3.product-name", 
-                    "h2", 
-                    "h3", 
-                    "h4",
-                    ".product-title",
-                    ".product-name a",
-                    "a h3",
-                    ".title",
-                    ".name",
-                    "h2.woocommerce-loop-product__title"
-                ]
-                
-                for selector in nombre_selectors:
-                    try:
-                        nombre_tag = product.select_one(selector)
-                        if nombre_tag and nombre_tag.get_text(strip=True):
-                            nombre = nombre_tag.get_text(strip=True)
-                            break
-                    except:
-                        continue
-                
-                # Si aún no encontramos el nombre, buscar en enlaces
-                if nombre == "Nombre no encontrado":
-                    a_tags = product.find_all("a")
-                    for a_tag in a_tags:
-                        if a_tag.get_text(strip=True) and len(a_tag.get_text(strip=True)) > 5:
-                            nombre = a_tag.get_text(strip=True)
-                            break
-                
-                # Extraer precio
-                precio = "Precio no encontrado"
-                try:
-                    # Método 1: Buscar precio en <ins> (precio con descuento)
-                    price_tag = product.find("ins")
-                    if price_tag:
-                        price_amount = price_tag.find(["span", "p", "bdi"], class_=re.compile("price|amount", re.I))
-                        if price_amount:
-                            precio = price_amount.get_text(strip=True)
-                        else:
-                            precio = price_tag.get_text(strip=True)
-                    
-                    # Método 2: Buscar en otros elementos de precio
-                    if precio == "Precio no encontrado":
-                        price_elements = product.find_all(["span", "p", "div"], class_=re.compile("price|amount", re.I))
-                        for elem in price_elements:
-                            if elem and elem.get_text(strip=True):
-                                precio = elem.get_text(strip=True)
-                                break
-                    
-                    # Método 3: Buscar en texto de screen reader
-                    if precio == "Precio no encontrado":
-                        price_tag = product.find("span", class_="screen-reader-text")
-                        if price_tag:
-                            price_text = price_tag.get_text(strip=True)
-                            if "precio" in price_text.lower():
-                                match = re.search(r'Bs\.\s*([\d.,]+)', price_text)
-                                if match:
-                                    precio = match.group(1)
-                    
-                    # Método 4: Buscar en atributos de datos
-                    if precio == "Precio no encontrado":
-                        cache_tags = product.find_all(attrs={"data-price": True})
-                        for cache_tag in cache_tags:
-                            if cache_tag['data-price']:
-                                precio = cache_tag['data-price']
-                                break
-                    
-                    # Método 5: Buscar en cualquier elemento con información de precio
-                    if precio == "Precio no encontrado":
-                        all_elements = product.find_all(string=re.compile(r'Bs\.|REF|USD|\d+\.\d+'))
-                        for element in all_elements:
-                            if element.parent and not any(x in str(element.parent).lower() for x in ['button', 'input', 'script']):
-                                match = re.search(r'(\d+[\d.,]*)', element)
-                                if match:
-                                    precio = match.group(1)
-                                    break
-                    
-                    # Limpiar el precio
-                    if precio != "Precio no encontrado":
-                        # Eliminar texto no numérico pero mantener puntos y comas
-                        precio = re.sub(r'[^\d.,]', '', precio)
-                        
-                        # Si está vacío después de la limpieza, mantener el valor original
-                        if not precio:
-                            precio = "Precio no encontrado"
-                        else:
-                            # Manejar múltiples puntos (separadores de miles)
-                            if precio.count('.') > 1:
-                                parts = precio.split('.')
-                                integer_part = ''.join(parts[:-1])
-                                decimal_part = parts[-1]
-                                precio = f"{integer_part}.{decimal_part}"
-                            
-                            # Convertir comas a puntos para decimales
-                            if ',' in precio:
-                                precio = precio.replace(',', '.')
-                            
-                            # Asegurar formato decimal correcto
-                            try:
-                                # Intentar convertir a float y formatear
-                                precio_float = float(precio)
-                                precio = f"{precio_float:.2f}"
-                            except ValueError:
-                                # Si hay error, mantener el formato actual
-                                pass
-                except Exception as e:
-                    print(f"Error al procesar el precio: {str(e)}")
-                    precio = "Precio no encontrado"
-                
-                # Agregar producto a la lista
-                all_products.append({
-                    "nombre": nombre,
-                    "precio": precio,
-                    "producto_busqueda": termino_busqueda
-                })
+            all_products.extend(productos_farmadon(sopas, perfil, termino_busqueda))
             
             print(f"Total acumulado de productos: {len(all_products)}")
             
@@ -288,13 +333,22 @@ def scrape_farmadon_full():
     
     finally:
         try:
-            driver.quit()
+            if driver:
+                driver.quit()
         except:
             pass
+        cliente.cerrar()
         print("\nNavegador cerrado")
+        print(resumen_esperas())
+        print(resumen_parseo())
+        print(resumen_precios())
+        print(resumen_consumo())
+        print(cliente.resumen())
+        print(perfil.resumen())
     
     # Guardar todos los productos en un CSV
     if all_products:
+        perfil.guardar()  # sólo una corrida con resultados actualiza el perfil
         unique_products = []
         seen = set()
         
@@ -1,24 +1,68 @@
 #scrapper_master.py
 # ---------------  MÓDULOS  ---------------
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
 import pandas as pd
 import time, os, traceback, re
 from datetime import datetime
 from collections import defaultdict, Counter
+from driver_pool import PoolDrivers
+from cache_fabricantes import CacheFabricantes
+from concurrencia import LimitadorHost, ejecutar_en_paralelo
+from nucleo_async import NucleoAsync, adaptar_scraper, adaptar_descarga_y_parseo, adaptar_al_terminar, adaptar_guardado
+from chromedriver_cache import servicio_chrome
+from esperas import esperar_listo, resumen_esperas
+from tiendas import TIENDAS
+from captura_api import activar_log_red, descartar_log, filas_por_api
+from http_fetch import ClienteHTTP
+from paginacion import filas_algolia
+from recursos import bloquear_recursos, registrar_consumo, resumen_consumo
+from parseo import documento, guardar_pagina, html_raiz, resumen_parseo, en_proceso, sumar_tiempos
+from parseo_tiendas import parsear_farmatodo, filas_farmatodo, parsear_farmago, tarjetas_farmasas
+from extraccion import campos_en_navegador, verificar_equivalencia
+from marcas import diccionario
+from historial import guardar_corrida, exportar_excel
+from base_precios import BasePrecios
+from consultas import AgregadosPrecios
+from normaliza import normalizar_historial
+from sumidero import SumideroFilas
+from precios import limpiar_precio, precios_columna, resumen_precios
 # ---------------  CONFIG  -------------
 RUTA_EXCEL   = r"C:\Users\pcdel\OneDrive\Desktop\consolidado_farmacias.xlsx"
+RUTA_HISTORIAL = os.path.join(os.path.dirname(RUTA_EXCEL), "historial_farmacias")  # Parquet por fecha/Origen
+EXPORTAR_EXCEL = False   # True = regenerar RUTA_EXCEL desde el histórico al terminar
+RUTA_UNICOS  = os.path.join(os.path.dirname(RUTA_EXCEL), "productos_unicos.csv")  # None = sin normalizar (normaliza.py)
+RUTA_AGREGADOS = os.path.join(os.path.dirname(RUTA_EXCEL), "agregados_farmacias.sqlite")  # None = sin tablas de consulta
+RUTA_BASE    = os.path.join(os.path.dirname(RUTA_EXCEL), "precios_farmacias.sqlite")  # None = sin base SQLite
+SOLO_CAMBIOS = False  # True = la base guarda sólo cambios de precio (serie completa: BasePrecios.serie); el histórico, la corrida completa
+RUTA_CORRIDAS = os.path.join(os.getcwd(), "corridas")  # filas en JSONL + punto de control por corrida
 HEADLESS     = True
 PRODUCTOS    = ["Diclofenac", "Paracetamol", "Ibuprofeno", "Loratadina"]
 PROXY        = None  # Cambiar aquí si usas proxy
+BLOQUEAR_RECURSOS = True  # imágenes, fuentes, media y trackers (ver recursos.py)
+CAPTURA_API  = False  # filas desde el JSON de la tienda (CDP) en vez de parsear HTML; activar tras grabar y revisar (tests/fixtures/api)
+GRABAR_API_EN = None  # carpeta para guardar las respuestas y reproducirlas offline
+PAGINADO_DIRECTO = True  # Farmatodo: páginas siguientes repitiendo la consulta Algolia por HTTP; no depende de CAPTURA_API
+PAGINAS_MAX  = 20    # tope de páginas por término (incluye la primera)
+PAGINAS_EN_PARALELO = 3
+GUARDAR_HTML_EN = None  # carpeta para guardar las páginas completas (benchmark de parseo.py)
+EXTRACCION_EN_NAVEGADOR = True  # filas de las tarjetas armadas en Chrome (extraccion.py), sin page_source
+VERIFICAR_EXTRACCION = False    # comparar en cada página la extracción en Chrome con la de Python
 INTENTOS     = 2
 RETRY_DELAY  = 10
+MAX_HILOS    = 3     # tareas en vuelo simultáneas (todas las tiendas)
+HOST_TIENDA  = {"Farmatodo": "www.farmatodo.com.ve", "FarmaGo": "www.farmago.com.ve",
+                "Farmacias Saas": "tienda.farmaciasaas.com"}
+LIMITE_HOST  = {"www.farmatodo.com.ve": 1, "www.farmago.com.ve": 2,
+                "tienda.farmaciasaas.com": 1}  # tareas simultáneas por host
+PROCESOS_PARSEO = 0  # procesos para parsear HTML (0 = un hilo); importan sólo parseo_tiendas.py
+INTERVALO_HOST = 3   # segundos mínimos entre páginas del mismo host
+INTERVALO_POR_HOST = {"tienda.farmaciasaas.com": 1}  # fichas de producto: más visitas, más cortas
+HILOS_DETALLE = 3    # fichas de Farmacias SAAS visitadas a la vez
+RUTA_CACHE_FABRICANTES = os.path.join(os.getcwd(), "cache_fabricantes.sqlite")
+TTL_FABRICANTE = 30  # días antes de volver a visitar la ficha de un producto
+POOL_TAMANO  = MAX_HILOS + HILOS_DETALLE  # navegadores Chrome que se mantienen abiertos
+POOL_MAX_PAG = 40    # páginas por navegador antes de reciclarlo
 BASE_URL_FARMASAS = "https://tienda.farmaciasaas.com"
 
 # ----------------------------------------
@@ -29,46 +73,8 @@ PRINCIPIOS_ACTIVOS = [
     "naproxeno", "aspirina", "cetirizina", "omeprazol", "metformina"
 ]
 
-MARCAS_CONOCIDAS = [
-    "mk", "genfar", "gsk", "panadol", "bago", "roemmers",  "raven", "drotaf", "elm", "ccm", "dlr", "clx", "sigvaris",
-    "Oftalmi", "Genven", "Leti", "Calox", "Elmor", "Ponce y Benzo", "Pfizer", "CCM Farma", "Aless", "La Santé", "Dollder", "Meyer",
-    "Adium", "Bioglass", "Bioquimica", "Biosano", "Valmorca", "Laboratorios Farma", "COFASA", "Siegfried", "FC Pharma", 
-    "Laboratorios Vargas", "Biotech", "DAC 55", "Pharmetique Labs", "PlusAndex", "Buka", "Kimiceg", "Farmacias Unidas",
-    "Biotechnologia GKV", "DistriLab", "Neo", "Quim-Far", "MediGen", "MedVal", "MegaLabs", "MVGA", "Ravel", "Remeny", "Scott Edil",
-    "Drogueria Clínica", "Vitalis", "Vivax", "GeoLab", "DoroPharma", "GVS Pharma", "IPS", "KMPlus", "Laproff", "INVERSIONES GEAGAR 2021",
-    "Farmacenter 24 La Lago", "H&M Medical"
-]
-
-# ---------------  MEJORA EN LA FUNCIÓN LIMPIAR_PRECIO  ---------------
-def limpiar_precio(precio_str):
-    if not precio_str:
-        return None
-    try:
-        # Eliminar "Bs." y espacios
-        precio_limpio = precio_str.replace("Bs.", "").replace(" ", "").strip()
-        
-        # Si tiene coma como separador decimal
-        if ',' in precio_limpio:
-            # Caso: "1.000,00" -> quitar puntos y convertir coma a punto
-            if '.' in precio_limpio:
-                partes = precio_limpio.split(',')
-                parte_entera = partes[0].replace('.', '')
-                precio_limpio = parte_entera + '.' + partes[1]
-            else:
-                # Caso: "100,50" -> convertir coma a punto
-                precio_limpio = precio_limpio.replace(',', '.')
-        else:
-            # Caso con múltiples puntos como separadores de miles
-            if precio_limpio.count('.') > 1:
-                partes = precio_limpio.split('.')
-                parte_entera = ''.join(partes[:-1])
-                parte_decimal = partes[-1]
-                precio_limpio = parte_entera + '.' + parte_decimal
-        
-        return float(precio_limpio)
-    except Exception as e:
-        print(f"Error limpiando precio '{precio_str}': {e}")
-        return None
+# Marcas: diccionario compilado de marcas.csv (ver marcas.py)
+MARCAS = diccionario("general", "correcciones", "extendidas")
 
 def chrome_stealth():
     opts = Options()
@@ -85,12 +91,34 @@ def chrome_stealth():
     opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
     if PROXY:
         opts.add_argument(f'--proxy-server={PROXY}')
+    if CAPTURA_API or PAGINADO_DIRECTO:
+        activar_log_red(opts)  # el paginado directo lee del log la consulta de búsqueda
     return opts
 
-def retry(func, producto):
+def preparar_driver(driver, tienda):
+    """Antes de cada visita: bloqueo de recursos de la tienda y log de red limpio"""
+    if BLOQUEAR_RECURSOS:
+        bloquear_recursos(driver, tienda, TIENDAS[tienda])
+    if CAPTURA_API or PAGINADO_DIRECTO:
+        descartar_log(driver)  # que no se mezclen respuestas de la página anterior
+
+POOL = PoolDrivers(
+    lambda: webdriver.Chrome(service=servicio_chrome(), options=chrome_stealth()),
+    tamano=POOL_TAMANO, max_paginas=POOL_MAX_PAG, limitador=LimitadorHost(INTERVALO_HOST, INTERVALO_POR_HOST),
+    preparar=preparar_driver)
+
+HTTP = ClienteHTTP(proxy=PROXY, limitador=POOL.limitador)
+
+CACHE_FABRICANTES = CacheFabricantes(RUTA_CACHE_FABRICANTES, ttl_dias=TTL_FABRICANTE)
+
+def retry(func, producto, con_driver=True):
     for i in range(1, INTENTOS + 1):
         try:
-            return func(producto)
+            if not con_driver:
+                return func(producto)  # el scraper pide un driver al pool sólo si lo necesita
+            # Si func falla, el pool descarta ese driver y el siguiente intento usa uno nuevo
+            with POOL.usar() as driver:
+                return func(producto, driver)
         except Exception as e:
             print(f"[RETRY {i}/{INTENTOS}] {func.__name__} – {producto}: {e}")
             if i == INTENTOS:
@@ -107,51 +135,23 @@ def extraer_claves(nombre):
     presentacion = next((m.group(0).replace(" ", "") for m in re.finditer(r'(\d+)\s*(tab|cap|soft|comp|grag|sob|jbe|susp)', nombre)), None)
     return principio, dosis, presentacion
 
-def extraer_marca_desde_nombre(nombre):
-    nombre = nombre.lower()
-
-    # Si termina en "PHARME", es Pharmetique Labs
-    if nombre.endswith("pharme"):
-        return "Pharmetique Labs"
-
-    # Si termina en "H&M MEDICAL", lo extraemos
-    if "h&m medical" in nombre:
-        return "H&M Medical"
-
-    # Búsqueda normal en MARCAS_CONOCIDAS
-    for marca in MARCAS_CONOCIDAS:
-        if marca.lower() in nombre:
-            return marca  # ← ESTA LÍNEA FALTABA
-
-    # Mapeo de correcciones específicas
-    correcciones = {
-        "biosa": "Biosano",
-        # Agrega más correcciones aquí si es necesario
-    }
-    
-    # Primero verificar correcciones específicas
-    for key, value in correcciones.items():
-        if key in nombre:
-            return value
-    
-    # Lista expandida de marcas conocidas
-    marcas_extendidas = MARCAS_CONOCIDAS + [
-        "leti", "aless", "calox", "raven", "drotaf", "elm", "ccm", 
-        "dlr", "clx", "sigvaris", "audace", "media", "biosano", "biotech"
-    ]
-    
-    for marca in marcas_extendidas:
-        if marca in nombre:
-            return marca.upper()
-
-    # Intentar extraer última palabra como marca
-    palabras = nombre.split()
-    if len(palabras) > 1:
-        ultima = palabras[-1]
-        if len(ultima) <= 6 and ultima.isalpha():
-            return ultima.upper()
+def marcas_desde_nombres(nombres):
+    """Marca de cada nombre: una pasada del diccionario por toda la lista y, si no hay
+    coincidencia, la última palabra corta del nombre"""
+    marcas = []
+    for nombre, marca in zip(nombres, MARCAS.buscar_columna(nombres)):
+        if not marca:
+            # Intentar extraer última palabra como marca
+            palabras = nombre.lower().split()
+            if len(palabras) > 1:
+                ultima = palabras[-1]
+                if len(ultima) <= 6 and ultima.isalpha():
+                    marca = ultima.upper()
+        marcas.append(marca)
+    return marcas
 
-    return None
+def extraer_marca_desde_nombre(nombre):
+    return marcas_desde_nombres([nombre])[0]
 
 def limpiar_nombre(nombre):
     # Separar principios activos pegados
@@ -162,109 +162,64 @@ def limpiar_nombre(nombre):
     nombre = re.sub(r'(PARACETAMOL)(\d+)', r'\1 \2', nombre)
     return nombre
 
-def scrap_farmatodo(producto):
+def scrap_farmatodo(producto, driver):
     url = f"https://www.farmatodo.com.ve/buscar?product={producto}&departamento=Todos&filtros="
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_stealth())
     try:
-        driver.get(url)
-        time.sleep(8)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        POOL.visitar(driver, url, "farmatodo")
+        esperar_listo(driver, TIENDAS["farmatodo"]["listo"], timeout=15, etiqueta="farmatodo")
+        registrar_consumo(driver, "farmatodo")
+        primeras = []
+        if PAGINADO_DIRECTO:
+            # Todas las páginas (no sólo la primera): la consulta Algolia repetida por HTTP
+            filas_api, primeras = filas_algolia(driver, HTTP, TIENDAS["farmatodo"]["api"], "Farmatodo", producto,
+                                                limpiar_precio, PAGINAS_MAX, PAGINAS_EN_PARALELO, GRABAR_API_EN)
+            if filas_api:
+                return filas_api
+        if CAPTURA_API:
+            # Filas desde el JSON de búsqueda; si no se capturó nada, se sigue con el HTML
+            filas_api = filas_por_api(driver, TIENDAS["farmatodo"]["api"], "Farmatodo", producto,
+                                      limpiar_precio, GRABAR_API_EN, previas=primeras)
+            if filas_api:
+                return filas_api
+        if VERIFICAR_EXTRACCION:
+            verificar_equivalencia(driver, "farmatodo")
+        if EXTRACCION_EN_NAVEGADOR and not GUARDAR_HTML_EN:
+            # Un solo execute_script devuelve las tarjetas: ni page_source ni parseo
+            return filas_farmatodo(campos_en_navegador(driver, "farmatodo"), producto)
+        html = html_raiz(driver, "farmatodo", completo=bool(GUARDAR_HTML_EN))
     except Exception as e:
         driver.save_screenshot(f"Farmatodo_{producto}.png")
         raise e
-    finally:
-        driver.quit()
-
-    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    filas = []
-
-    for card in soup.find_all("div", class_=lambda x: x and "card-ftd" in x.split()):
-        marca = card.find("p", class_="text-brand")
-        nombre = card.find("p", class_="text-title")
-        if not nombre:
-            continue
-
-        # ✅ Detectar si está no disponible
-        no_disponible = card.select_one("div.offer-description.not-available")
-        if no_disponible:
-            precio_limpio = None
-        else:
-            precio = card.find("span", class_="price__text-price")
-            precio_limpio = limpiar_precio(precio.get_text(strip=True) if precio else None)
-
-        filas.append({
-            "Fecha_Hora": fecha,
-            "Origen": "Farmatodo",
-            "Producto_Buscado": producto,
-            "Marca": marca.get_text(strip=True) if marca else None,
-            "Nombre": nombre.get_text(strip=True),
-            "Precio": precio_limpio
-        })
-
-    # Eliminar duplicados por (Nombre, Marca)
-    seen = set()
-    unicos = []
-    for item in filas:
-        clave = (item['Nombre'], item['Marca'])
-        if clave not in seen:
-            seen.add(clave)
-            unicos.append(item)
-
-    return unicos
+    if GUARDAR_HTML_EN:
+        guardar_pagina(html, GUARDAR_HTML_EN, "farmatodo", producto)
+    return parsear_farmatodo(html, producto)
 
 #############################################################################################
 ###################################### FARMACIAS GO  ########################################
 #############################################################################################
-def scrap_farmago(producto):
-    url = f"https://www.farmago.com.ve/website/search?search={producto}&order=name+asc"
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_stealth())
-    try:
-        driver.get(url)
-        WebDriverWait(driver, 35).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "o_search_result_item"))
-        )
-        time.sleep(3)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-    except Exception as e:
-        driver.save_screenshot(f"FarmaGo_{producto}.png")
-        raise e
-    finally:
-        driver.quit()
+def descargar_farmago(producto):
+    url = TIENDAS["farmago"]["url_busqueda"].format(producto)
 
-    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    filas = []
-
-    for card in soup.select("a.dropdown-item"):
-        nombre_raw = card.select_one("div.h6.fw-bold.mb-0")
-        precio_span = card.select_one("span.oe_currency_value")
-        if not nombre_raw:
-            continue
-
-        texto = nombre_raw.get_text(strip=True)
-
-        # --- extraer marca y limpiar nombre ---
-        marca = None
-        if texto.endswith(")"):
-            idx = texto.rfind("(")
-            if idx != -1:
-                marca = texto[idx+1:-1].strip()
-                texto = texto[:idx].strip()
-
-        filas.append({
-            "Fecha_Hora": fecha,
-            "Origen": "FarmaGo",
-            "Producto_Buscado": producto,
-            "Marca": marca,
-            "Nombre": texto,
-            "Precio": limpiar_precio(f"Bs. {precio_span.text}" if precio_span else None)
-        })
+    def html_con_navegador():
+        with POOL.usar() as driver:
+            try:
+                POOL.visitar(driver, url, "farmago")
+                esperar_listo(driver, TIENDAS["farmago"]["listo"], timeout=35, etiqueta="farmago", obligatorio=True)
+                registrar_consumo(driver, "farmago")
+                return html_raiz(driver, "farmago", completo=bool(GUARDAR_HTML_EN))
+            except Exception as e:
+                driver.save_screenshot(f"FarmaGo_{producto}.png")
+                raise e
+
+    # Odoo renderiza en servidor: HTTP plano, Chrome sólo si falta el marcado
+    html = HTTP.obtener_html(url, TIENDAS["farmago"], html_con_navegador)
+    if html and GUARDAR_HTML_EN:
+        # Se guarda aquí (proceso principal): el parseo puede correr en otro proceso
+        guardar_pagina(html, GUARDAR_HTML_EN, "farmago", producto)
+    return html
 
-    seen = set(); unicos = []
-    for item in filas:
-        clave = (item['Nombre'], item['Marca'])
-        if clave not in seen:
-            seen.add(clave); unicos.append(item)
-    return unicos
+def scrap_farmago(producto):
+    return parsear_farmago(descargar_farmago(producto), producto)
 
 def corregir_marcas_especificas(df):
     """
@@ -362,64 +317,18 @@ def extraer_nombre_comercial(nombre):
 #############################################################################################
 ###################################### FARMACIAS SAAS #######################################
 #############################################################################################
-def extraer_precio_farmasas(card):
-    try:
-        entero = card.select_one("span.mat-card-title")
-        fraccion = card.select_one("span.mat-small")
-        if entero and fraccion:
-            entero_text = entero.get_text(strip=True).replace("Bs.", "").strip()
-            fraccion_text = fraccion.get_text(strip=True).replace(",", ".")
-            return f"Bs. {entero_text}.{fraccion_text}"
-        elif entero:
-            return f"Bs. {entero.get_text(strip=True).replace('Bs.', '').strip()}"
-    except Exception as e:
-        print(f"Error extrayendo precio: {e}")
-
-        # 1) Buscar el contenedor que tenga “Ahora”
-        ahora = card.find(string=re.compile(r'\bAhora\b'))
-        if ahora:
-            # Subir al contenedor-precio que lo incluye
-            contenedor = ahora.find_parent('div', class_='contenedor-precio')
-            if contenedor:
-                # Obtener todos los spans internos
-                partes = [
-                    span.get_text(strip=True)
-                    for span in contenedor.select('span.precio, span.fraccion, span.mat-small')
-                ]
-                # Unir y limpiar
-                texto = ''.join(partes)                      # ej: "Bs.442,24"
-                match = re.search(r'Bs\.?\s*(\d+[.,]?\d*)', texto)
-                if match:
-                    precio = match.group(1).replace('.', '').replace(',', '.')
-                    return f"Bs. {float(precio):.2f}"
-
-        # 2) Fallback: método antiguo si no hay “Ahora”
-        texto_completo = card.get_text()
-        match = re.search(r'Bs\.\s*(\d+\.?\d*,?\d*)', texto_completo)
-        if match:
-            precio = match.group(1).replace('.', '').replace(',', '.')
-            return f"Bs. {float(precio):.2f}"
-
-    except Exception as e:
-        print(f"Error extrayendo precio: {e}")
-
-    return None
-
 # ---------------  NUEVA FUNCIÓN PARA EXTRAER FABRICANTE  ---------------
-def extraer_fabricante_farmasas(url_producto, driver):
+def extraer_fabricante_farmasas(url_producto, driver, lanzar=False):
     try:
         print(f"Visitando producto: {url_producto}")
-        driver.get(url_producto)
-        
-        # Esperar a que cargue la información del producto
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "mat-card-content"))
-        )
+        POOL.visitar(driver, url_producto, "farmasas_detalle")
         
-        # Esperar adicionalmente para contenido dinámico
-        time.sleep(3)
+        # Esperar a que cargue la información del producto (incluido el bloque FABRICANTE)
+        esperar_listo(driver, TIENDAS["farmasas_detalle"]["listo"], timeout=15,
+                      etiqueta="farmasas_detalle", obligatorio=True)
+        registrar_consumo(driver, "farmasas_detalle")
         
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        soup = documento(html_raiz(driver, "farmasas_detalle"), "farmasas_detalle")
         
         # Buscar la sección de fabricante - método más robusto
         fabricante = None
@@ -473,59 +382,77 @@ def extraer_fabricante_farmasas(url_producto, driver):
         
     except Exception as e:
         print(f"Error extrayendo fabricante de {url_producto}: {str(e)}")
+        if lanzar:
+            raise
         return None
 
+# ---------------  FICHAS EN PARALELO  ---------------
+def fabricantes_en_paralelo(enlaces):
+    """Visita las fichas con varios drivers del pool y devuelve {enlace: fabricante}.
+
+    Sólo se visitan las fichas que no están en CACHE_FABRICANTES (o que vencieron).
+    La cortesía con el servidor la aplica el LimitadorHost del pool en cada visita.
+    """
+    unicos = list(dict.fromkeys(enlaces))  # sin repetidos, en el orden original
+    fabricantes = {}
+    pendientes = []
+    for enlace in unicos:
+        en_cache, fabricante = CACHE_FABRICANTES.obtener(enlace)
+        if en_cache:
+            fabricantes[enlace] = fabricante
+        else:
+            pendientes.append(enlace)
+    print(f"Fichas en caché: {len(unicos) - len(pendientes)} | por visitar: {len(pendientes)}")
+
+    def visitar(enlace):
+        try:
+            with POOL.usar() as driver:
+                fabricante = extraer_fabricante_farmasas(enlace, driver, lanzar=True)
+        except Exception:
+            return None  # error de carga: no se guarda, se reintenta en la próxima corrida
+        CACHE_FABRICANTES.guardar(enlace, fabricante)
+        return fabricante
+
+    tareas = [("farmasas_detalle", lambda e=e: visitar(e)) for e in pendientes]
+    fabricantes.update(zip(pendientes, ejecutar_en_paralelo(tareas, max_hilos=HILOS_DETALLE)))
+    return fabricantes
+
 # ---------------  SCRAPER MODIFICADO PARA FARMASIAS SAAS  ---------------
-def scrap_farmasas(producto):
+def scrap_farmasas(producto, driver):
     url = f"{BASE_URL_FARMASAS}/buscar/{producto}/0"
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_stealth())
     
     try:
-        driver.get(url)
+        POOL.visitar(driver, url, "farmasas")
         print(f"Buscando productos de: {producto}")
-        # Esperar más tiempo para resultados
-        time.sleep(10)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        # Esperar a que la grilla de resultados deje de crecer
+        esperar_listo(driver, TIENDAS["farmasas"]["listo"], timeout=20, etiqueta="farmasas")
+        registrar_consumo(driver, "farmasas")
+        if CAPTURA_API:
+            # El JSON del listado trae el fabricante: sin visitas a las fichas
+            filas_api = filas_por_api(driver, TIENDAS["farmasas"]["api"], "Farmacias SAAS", producto,
+                                      limpiar_precio, GRABAR_API_EN)
+            if filas_api:
+                sin_marca = [fila for fila in filas_api if not fila["Marca"]]
+                for fila, marca in zip(sin_marca, marcas_desde_nombres([f["Nombre"] for f in sin_marca])):
+                    fila["Marca"] = marca
+                return filas_api
+        html = html_raiz(driver, "farmasas")
     except Exception as e:
         driver.save_screenshot(f"farmasas_{producto}.png")
         raise e
     
     fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     filas = []
-    enlaces_productos = []
 
-    # Primero recopilar todos los enlaces de productos
-    contenedores = soup.select("div.contenedor-informacion")
-    print(f"Encontrados {len(contenedores)} contenedores de productos")
+    # Primero recopilar todos los enlaces de productos (parseo_tiendas.py)
+    enlaces_productos = [(nombre, precio, f"{BASE_URL_FARMASAS}{enlace}")
+                         for nombre, precio, enlace in tarjetas_farmasas(html)]
     
-    for card in contenedores:
-        try:
-            nombre_elem = card.select_one("mat-card-title.titulo a")
-            if not nombre_elem:
-                continue
-                
-            texto_nombre = nombre_elem.get_text(strip=True)
-            
-            # Extraer precio con la función mejorada
-            precio_text = extraer_precio_farmasas(card)
-            print(f"Precio extraído para {texto_nombre}: {precio_text}")
-            
-            # Guardar el enlace para visitar después
-            enlace_relativo = nombre_elem.get('href')
-            if enlace_relativo:
-                enlace_completo = f"{BASE_URL_FARMASAS}{enlace_relativo}"
-                enlaces_productos.append((texto_nombre, precio_text, enlace_completo))
-                print(f"Producto añadido: {texto_nombre}")
-        except Exception as e:
-            print(f"Error procesando tarjeta de producto: {e}")
-            continue
-
-    print(f"Total de enlaces a visitar: {len(enlaces_productos)}")
-    
-    # Ahora visitar cada producto para obtener el fabricante
+    # Ahora visitar los productos en paralelo para obtener el fabricante
+    fabricantes = fabricantes_en_paralelo([enlace for _, _, enlace in enlaces_productos])
     for i, (nombre, precio, enlace) in enumerate(enlaces_productos):
         print(f"Procesando producto {i+1}/{len(enlaces_productos)}: {nombre}")
-        fabricante = extraer_fabricante_farmasas(enlace, driver)
+        fabricante = fabricantes[enlace]
         
         # Si no encontramos fabricante, intentar extraer marca del nombre
         marca_detectada = None
@@ -539,14 +466,9 @@ def scrap_farmasas(producto):
             "Producto_Buscado": producto,
             "Marca": fabricante or marca_detectada,  # Usar fabricante o marca detectada
             "Nombre": nombre,
-            "Precio": limpiar_precio(precio)
+            "Precio": precio
         })
-        
-        # Esperar entre solicitudes para no sobrecargar el servidor
-        time.sleep(2)
 
-    driver.quit()
-    
     seen = set()
     unicos = []
     for item in filas:
@@ -561,23 +483,18 @@ def scrap_farmasas(producto):
 #############################################################################################
 ###################################### MAIN  ################################################
 #############################################################################################
-def main():
-    todos = []
-    for prod in PRODUCTOS:
-        for nombre, func in (("Farmatodo", scrap_farmatodo),
-                             ("FarmaGo", scrap_farmago),
-                             ("Farmacias Saas", scrap_farmasas)):
-            data = retry(func, prod)
-            todos.extend(data)
-            print(f"[{nombre.upper()}] {prod}: {len(data)} productos")
-        time.sleep(10)
-
-    if not todos:
-        print("❌ No se recuperó ningún producto.")
-        return
+def guardar_filas(sumidero, orden):
+    """Arma el DataFrame de la corrida y lo escribe en la base SQLite y el histórico Parquet.
 
+    Ambos usan la clave del sumidero: repetirlo tras un corte no duplica la corrida.
+    """
     print("🔍 Creando DataFrame...")
-    df_nuevo = pd.DataFrame(todos).drop_duplicates(subset=["Nombre", "Marca"])
+    # En el orden de los trabajos: drop_duplicates y la base se quedan con la misma fila
+    df_nuevo = pd.DataFrame(list(sumidero.filas(orden)))
+    if not RUTA_BASE:
+        df_nuevo = df_nuevo.drop_duplicates(subset=["Nombre", "Marca"])
+    df_nuevo["Precio"] = precios_columna(df_nuevo["Precio"])
+    print(resumen_precios())
     print(f"📊 DataFrame creado: {len(df_nuevo)} filas")
 
     # 🔄 COMPLETAR MARCAS FALTANTES
@@ -591,17 +508,86 @@ def main():
     print("🔧 Corrigiendo marcas específicas...")
     df_nuevo = corregir_marcas_especificas(df_nuevo)
 
-    if os.path.isfile(RUTA_EXCEL):
-        print("📂 Leyendo Excel existente...")
-        df_existente = pd.read_excel(RUTA_EXCEL)
-        df_final = pd.concat([df_existente, df_nuevo], ignore_index=True)
-    else:
-        print("📂 Creando Excel nuevo...")
-        df_final = df_nuevo
+    # Base SQLite: la corrida entra en una transacción y los repetidos los quita la clave
+    if RUTA_BASE:
+        base = BasePrecios(RUTA_BASE, cdc=SOLO_CAMBIOS)
+        try:
+            corrida = base.registrar_corrida(df_nuevo, clave=sumidero.clave)
+            guardadas = base.filas_corrida(corrida)
+            # El histórico (y exportar_excel, normaliza, consultas) recibe la corrida completa,
+            # sin repetidos; con SOLO_CAMBIOS los cambios quedan sólo dentro de la base
+            df_nuevo = base.serie(corrida=corrida).drop(columns="Corrida") if SOLO_CAMBIOS else guardadas
+        finally:
+            base.cerrar()
+        print(f"🗄️ Corrida {corrida}: {len(guardadas)} observaciones{' (cambios)' if SOLO_CAMBIOS else ''} en {RUTA_BASE}")
+
+    # Histórico en Parquet: sólo se escriben los archivos de esta corrida
+    archivos = guardar_corrida(df_nuevo, RUTA_HISTORIAL, sello=sumidero.clave)
+    print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_HISTORIAL} ({archivos} archivos)")
+
+def main():
+    # Cada (tienda, término) se escribe a disco al terminar; una corrida cortada se retoma
+    sumidero = SumideroFilas(RUTA_CORRIDAS)
+    # Núcleo asyncio: todas las (tienda, término) en vuelo a la vez, con cupo por host;
+    # la cortesía entre páginas la pone además el LimitadorHost del pool / cliente HTTP
+    nucleo = NucleoAsync(max_en_vuelo=MAX_HILOS, por_host=LIMITE_HOST, procesos_parseo=PROCESOS_PARSEO)
+    trabajos = []
+    for prod in PRODUCTOS:
+        trabajos.append(("Farmatodo", prod, adaptar_scraper(
+            nucleo, HOST_TIENDA["Farmatodo"], retry, scrap_farmatodo, prod)))
+        # FarmaGo va por HTTP (Chrome sólo de respaldo) y su parseo sale del hilo de descarga;
+        # desde otro proceso vuelven también sus tiempos de parseo
+        farmago = adaptar_descarga_y_parseo(
+            nucleo, HOST_TIENDA["FarmaGo"], lambda p: retry(descargar_farmago, p, False),
+            en_proceso(parsear_farmago) if PROCESOS_PARSEO else parsear_farmago, prod)
+        trabajos.append(("FarmaGo", prod, adaptar_al_terminar(farmago, sumar_tiempos) if PROCESOS_PARSEO else farmago))
+        trabajos.append(("Farmacias Saas", prod, adaptar_scraper(
+            nucleo, HOST_TIENDA["Farmacias Saas"], retry, scrap_farmasas, prod)))
+    orden = [(nombre, prod) for nombre, prod, _ in trabajos]   # también el de las filas al final
+    trabajos = [(nombre, prod, tarea) for nombre, prod, tarea in trabajos
+                 if not sumidero.completado(nombre, prod)]
+    try:
+        # Cada par se escribe (con fsync) en el pool de hilos, no en el bucle
+        cantidades = nucleo.correr([
+            adaptar_guardado(nucleo, tarea, lambda filas, nombre=nombre, prod=prod: sumidero.agregar(nombre, prod, filas))
+            for nombre, prod, tarea in trabajos])
+        for (nombre, prod, _), cantidad in zip(trabajos, cantidades):
+            print(f"[{nombre.upper()}] {prod}: {cantidad} productos")
+    finally:
+        POOL.cerrar()
+        HTTP.cerrar()
+        print(nucleo.resumen())
+        print(POOL.resumen())
+        print(HTTP.resumen())
+        print(CACHE_FABRICANTES.resumen())
+        print(resumen_esperas())
+        print(resumen_parseo())
+        print(resumen_consumo())
+
+    if not sumidero.cantidad():
+        print("❌ No se recuperó ningún producto.")
+        return
 
-    print("💾 Guardando Excel...")
-    df_final.to_excel(RUTA_EXCEL, index=False)
-    print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_EXCEL}")
+    # Base e histórico una sola vez: si lo que sigue falla, al retomar se salta
+    if sumidero.guardada:
+        print(f"♻️ Corrida {sumidero.clave} ya guardada en la base y el histórico")
+    else:
+        guardar_filas(sumidero, orden)
+        sumidero.marcar_guardada()
+    # Columnas normalizadas e id_producto: sólo de los productos que no estaban
+    if RUTA_UNICOS:
+        normalizar_historial(RUTA_HISTORIAL, RUTA_UNICOS)
+    # Tablas de consulta (último precio, agregados diarios): sólo se procesa lo nuevo
+    if RUTA_AGREGADOS:
+        agregados = AgregadosPrecios(RUTA_HISTORIAL, RUTA_AGREGADOS)
+        try:
+            agregados.actualizar()
+        finally:
+            agregados.cerrar()
+    if EXPORTAR_EXCEL:
+        print("💾 Exportando Excel...")
+        exportar_excel(RUTA_EXCEL, RUTA_HISTORIAL)
+    sumidero.terminar()
 
 # ---------------  EJECUCIÓN  ---------------
 if __name__ == "__main__":
@@ -0,0 +1,322 @@
+#base_precios.py
+# Base SQLite de precios consolidados:
+#   tiendas        (id, origen)                          una por Origen
+#   productos      (id, tienda_id, nombre, marca)        UNIQUE(tienda, nombre, marca)
+#   corridas       (id, inicio, clave)                   una por ejecución; clave (opcional, única)
+#                                                        = carpeta del sumidero: retomar no duplica
+#   observaciones  (producto_id, corrida_id, fecha_hora, producto_buscado, precio, ausente)
+#                  PRIMARY KEY(producto_id, corrida_id): un precio por producto y corrida
+#   estado         (producto_id, corrida_id, precio, ..., ausente)   último estado de cada producto
+# La unicidad que antes daba drop_duplicates(subset=["Nombre", "Marca"]) la da ahora el
+# esquema: una corrida entra en una sola transacción y las repeticiones hacen upsert.
+#
+# Modo cdc (sólo cambios): una observación se guarda sólo si el precio (o la disponibilidad:
+# precio NULL = sin precio/agotado) difiere del estado anterior del producto; si no, sólo se
+# actualiza estado.visto/corrida_id. serie() reconstruye la serie completa por corrida
+# arrastrando cada precio hasta el cambio siguiente (o hasta la última corrida en que se vio).
+#
+# Ausencias (los dos modos): si en una corrida se hizo la búsqueda (tienda, término) con
+# la que se vio un producto y el producto no salió, se guarda una observación ausente=1
+# (precio NULL) y estado.ausente=1; serie() corta ahí. Si la búsqueda no se hizo (tienda
+# caída) no se sabe nada y el precio se sigue arrastrando.
+#
+#   python base_precios.py consolidado.sqlite diclofenac      (último precio en cada tienda)
+#   python base_precios.py consolidado.sqlite "DICLOFENAC POTASICO 50MG X 20 TAB" --exacto
+#   python base_precios.py consolidado.sqlite --compactar     (pasa una base completa a sólo cambios)
+# ---------------  MÓDULOS  ---------------
+from datetime import datetime
+import argparse, sqlite3, threading, time
+import pandas as pd
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tiendas (
+    id      INTEGER PRIMARY KEY,
+    origen  TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS productos (
+    id        INTEGER PRIMARY KEY,
+    tienda_id INTEGER NOT NULL REFERENCES tiendas(id),
+    nombre    TEXT NOT NULL,
+    marca     TEXT NOT NULL DEFAULT '',          -- '' = sin marca (NULL rompería el UNIQUE)
+    UNIQUE (tienda_id, nombre, marca)
+);
+CREATE TABLE IF NOT EXISTS corridas (
+    id      INTEGER PRIMARY KEY,
+    inicio  TEXT NOT NULL,
+    clave   TEXT                              -- UNIQUE por índice (ver _migrar)
+);
+CREATE TABLE IF NOT EXISTS observaciones (
+    producto_id      INTEGER NOT NULL REFERENCES productos(id),
+    corrida_id       INTEGER NOT NULL REFERENCES corridas(id),
+    fecha_hora       TEXT NOT NULL,
+    producto_buscado TEXT,
+    precio           REAL,
+    ausente          INTEGER NOT NULL DEFAULT 0,                -- 1 = buscado y no encontrado
+    PRIMARY KEY (producto_id, corrida_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS estado (
+    producto_id      INTEGER PRIMARY KEY REFERENCES productos(id),
+    corrida_id       INTEGER NOT NULL REFERENCES corridas(id),   -- última corrida en que se vio
+    precio           REAL,
+    producto_buscado TEXT,
+    desde            TEXT NOT NULL,                             -- primera vez con este precio
+    visto            TEXT NOT NULL,                             -- última vez que se vio
+    ausente          INTEGER NOT NULL DEFAULT 0                 -- 1 = no salió en su última búsqueda
+);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre);
+CREATE INDEX IF NOT EXISTS idx_observaciones_fecha ON observaciones (fecha_hora);
+CREATE INDEX IF NOT EXISTS idx_observaciones_producto_fecha ON observaciones (producto_id, fecha_hora);
+CREATE INDEX IF NOT EXISTS idx_observaciones_corrida ON observaciones (corrida_id);
+"""
+
+# Filas con las columnas de los scrapers (Origen, Nombre, Marca...)
+_FILAS = """
+SELECT o.fecha_hora AS Fecha_Hora, t.origen AS Origen, o.producto_buscado AS Producto_Buscado,
+       NULLIF(p.marca, '') AS Marca, p.nombre AS Nombre, o.precio AS Precio{extra}
+FROM observaciones o
+JOIN productos p ON p.id = o.producto_id
+JOIN tiendas t   ON t.id = p.tienda_id
+"""
+
+# Serie reconstruida: cada cambio vale desde su corrida hasta el cambio siguiente (sin
+# incluirlo) o, el último, hasta la corrida en que el producto se vio por última vez.
+# Una ausencia es un cambio que no da filas. En las corridas sin cambio la fecha es la
+# de inicio de la corrida.
+_SERIE = """
+WITH cambios AS (
+    SELECT o.*, LEAD(o.corrida_id) OVER (PARTITION BY o.producto_id ORDER BY o.corrida_id) AS hasta
+    FROM observaciones o
+    JOIN productos p ON p.id = o.producto_id
+    JOIN tiendas t   ON t.id = p.tienda_id
+    WHERE {filtro}
+)
+SELECT CASE WHEN c.id = ca.corrida_id THEN ca.fecha_hora ELSE c.inicio END AS Fecha_Hora,
+       t.origen AS Origen, ca.producto_buscado AS Producto_Buscado,
+       NULLIF(p.marca, '') AS Marca, p.nombre AS Nombre, ca.precio AS Precio, c.id AS Corrida
+FROM cambios ca
+JOIN estado e    ON e.producto_id = ca.producto_id
+JOIN corridas c  ON c.id >= ca.corrida_id AND c.id < COALESCE(ca.hasta, e.corrida_id + 1)
+JOIN productos p ON p.id = ca.producto_id
+JOIN tiendas t   ON t.id = p.tienda_id
+WHERE NOT ca.ausente AND {filtro_corrida}
+ORDER BY c.id, t.origen, p.nombre
+"""
+
+# ---------------  BASE  ---------------
+class BasePrecios:
+    """Base de precios consolidada en SQLite (un archivo, sin servidor)."""
+
+    def __init__(self, ruta, cdc=False):
+        self.ruta = ruta
+        self.cdc = cdc
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._con:
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.executescript(ESQUEMA)
+            self._migrar()
+            self._poblar_estado()
+
+    def _migrar(self):
+        """Bases anteriores a las columnas ausente y corridas.clave"""
+        for tabla in ("observaciones", "estado"):
+            columnas = {fila[1] for fila in self._con.execute(f"PRAGMA table_info({tabla})")}
+            if "ausente" not in columnas:
+                self._con.execute(f"ALTER TABLE {tabla} ADD COLUMN ausente INTEGER NOT NULL DEFAULT 0")
+        if "clave" not in {fila[1] for fila in self._con.execute("PRAGMA table_info(corridas)")}:
+            self._con.execute("ALTER TABLE corridas ADD COLUMN clave TEXT")
+        self._con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_corridas_clave ON corridas (clave)")
+
+    def _poblar_estado(self):
+        """Bases anteriores a la tabla estado: se arma una vez desde la última observación"""
+        if self._con.execute("SELECT 1 FROM estado LIMIT 1").fetchone():
+            return
+        self._con.execute("""
+            INSERT INTO estado (producto_id, corrida_id, precio, producto_buscado, desde, visto, ausente)
+            SELECT producto_id, corrida_id, precio, producto_buscado, fecha_hora, fecha_hora, ausente
+            FROM (SELECT o.*, ROW_NUMBER() OVER (PARTITION BY producto_id ORDER BY corrida_id DESC) AS n
+                  FROM observaciones o)
+            WHERE n = 1""")
+
+    def registrar_corrida(self, df, clave=None):
+        """Guarda las filas de una corrida (columnas de los scrapers) en una sola transacción.
+
+        Devuelve el id de la corrida. Si ya hay una corrida con esa `clave` (una corrida
+        retomada que ya se había registrado) no se guarda nada y se devuelve su id. Un mismo
+        (Origen, Nombre, Marca) repetido en la corrida queda una sola vez, con la primera fila
+        (como drop_duplicates). En modo cdc sólo se guardan las observaciones que cambian el
+        estado del producto; estado se actualiza siempre.
+        Los productos de las búsquedas hechas que no salieron quedan ausentes (ver arriba).
+        """
+        filas = [(r.Origen, r.Nombre, r.Marca if isinstance(r.Marca, str) else "",
+                  str(r.Fecha_Hora), r.Producto_Buscado, None if pd.isna(r.Precio) else float(r.Precio))
+                 for r in df.itertuples(index=False) if isinstance(r.Nombre, str)]
+        inicio = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock, self._con:
+            previa = clave and self._con.execute("SELECT id FROM corridas WHERE clave = ?", (clave,)).fetchone()
+            if previa:
+                print(f"♻️ Corrida {clave} ya registrada en la base (id {previa[0]})")
+                return previa[0]
+            corrida = self._con.execute("INSERT INTO corridas (inicio, clave) VALUES (?, ?)",
+                                        (inicio, clave)).lastrowid
+            self._con.execute("""CREATE TEMP TABLE IF NOT EXISTS entrada (
+                origen TEXT, nombre TEXT, marca TEXT, fecha_hora TEXT, producto_buscado TEXT, precio REAL)""")
+            self._con.execute("DELETE FROM entrada")
+            self._con.executemany("INSERT INTO entrada VALUES (?, ?, ?, ?, ?, ?)", filas)
+            self._con.execute("INSERT OR IGNORE INTO tiendas (origen) SELECT DISTINCT origen FROM entrada")
+            self._con.execute("""
+                INSERT OR IGNORE INTO productos (tienda_id, nombre, marca)
+                SELECT DISTINCT t.id, e.nombre, e.marca FROM entrada e JOIN tiendas t ON t.origen = e.origen""")
+            # Una fila por producto: la primera en el orden de `df`
+            ultimas = """
+                SELECT p.id AS producto_id, e.fecha_hora, e.producto_buscado, e.precio
+                FROM entrada e
+                JOIN tiendas t   ON t.origen = e.origen
+                JOIN productos p ON p.tienda_id = t.id AND p.nombre = e.nombre AND p.marca = e.marca
+                WHERE e.rowid IN (SELECT MIN(rowid) FROM entrada GROUP BY origen, nombre, marca)"""
+            # "IS NOT" compara también los NULL: pasar a/desde "sin precio" es un cambio
+            # Volver después de una ausencia también es un cambio
+            cambio = "WHERE s.producto_id IS NULL OR s.ausente OR s.precio IS NOT u.precio" if self.cdc else ""
+            self._con.execute(f"""
+                INSERT INTO observaciones (producto_id, corrida_id, fecha_hora, producto_buscado, precio)
+                SELECT u.producto_id, ?, u.fecha_hora, u.producto_buscado, u.precio
+                FROM ({ultimas}) u LEFT JOIN estado s ON s.producto_id = u.producto_id
+                {cambio}""", (corrida,))
+            # "WHERE true": SQLite lo exige para distinguir el ON CONFLICT de un JOIN ... ON
+            self._con.execute(f"""
+                INSERT INTO estado (producto_id, corrida_id, precio, producto_buscado, desde, visto, ausente)
+                SELECT u.producto_id, ?, u.precio, u.producto_buscado, u.fecha_hora, u.fecha_hora, 0
+                FROM ({ultimas}) u
+                WHERE true
+                ON CONFLICT (producto_id) DO UPDATE SET
+                    corrida_id = excluded.corrida_id,
+                    desde = CASE WHEN estado.precio IS excluded.precio AND NOT estado.ausente
+                                 THEN estado.desde ELSE excluded.desde END,
+                    precio = excluded.precio,
+                    producto_buscado = excluded.producto_buscado,
+                    visto = excluded.visto,
+                    ausente = 0""", (corrida,))
+            # Ausentes: vistos antes por una búsqueda (tienda, término) que esta corrida hizo
+            ausentes = """
+                SELECT s.producto_id, s.producto_buscado
+                FROM estado s
+                JOIN productos p ON p.id = s.producto_id
+                JOIN tiendas t   ON t.id = p.tienda_id
+                WHERE s.corrida_id < ? AND NOT s.ausente
+                  AND (t.origen, s.producto_buscado) IN (SELECT origen, producto_buscado FROM entrada)"""
+            self._con.execute(f"""
+                INSERT INTO observaciones (producto_id, corrida_id, fecha_hora, producto_buscado, precio, ausente)
+                SELECT producto_id, ?, ?, producto_buscado, NULL, 1 FROM ({ausentes})""",
+                (corrida, inicio, corrida))
+            self._con.execute(f"UPDATE estado SET ausente = 1 WHERE producto_id IN (SELECT producto_id FROM ({ausentes}))",
+                              (corrida,))
+            self._con.execute("DELETE FROM entrada")
+        return corrida
+
+    def filas_corrida(self, corrida):
+        """DataFrame con las filas (ya sin repetidos, sin las ausencias) que se guardaron de una corrida.
+
+        En modo cdc son sólo las que cambiaron; la corrida completa sale de serie(corrida=...).
+        """
+        with self._lock:
+            return pd.read_sql_query(_FILAS.format(extra="") + """
+                WHERE o.corrida_id = ? AND NOT o.ausente ORDER BY t.origen, p.nombre""",
+                self._con, params=(corrida,))
+
+    def ultimos_precios(self, texto, exacto=False):
+        """Último precio en cada tienda de los productos cuyo nombre contiene `texto`
+        (exacto=True: cuyo nombre es `texto`, por el índice de nombre).
+
+        La búsqueda por contenido recorre la tabla de productos (chica); en los dos casos el
+        estado de cada producto se toma por su clave y no se lee el histórico. Fecha_Hora es
+        la última vez que se vio, Desde la del cambio; Ausente = 1 si no salió en su última
+        búsqueda (Precio es el último conocido). Los sin precio van al final.
+        """
+        if exacto:
+            condicion, param = "p.nombre = ?", texto
+        else:
+            # % y _ del texto se buscan literalmente
+            escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            condicion, param = "p.nombre LIKE '%' || ? || '%' ESCAPE '\\'", escapado
+        # CROSS JOIN fija el orden: primero productos, después su estado por clave
+        with self._lock:
+            return pd.read_sql_query(f"""
+                SELECT s.visto AS Fecha_Hora, t.origen AS Origen, s.producto_buscado AS Producto_Buscado,
+                       NULLIF(p.marca, '') AS Marca, p.nombre AS Nombre, s.precio AS Precio, s.desde AS Desde,
+                       s.ausente AS Ausente
+                FROM productos p
+                CROSS JOIN estado s
+                JOIN tiendas t ON t.id = p.tienda_id
+                WHERE {condicion}
+                  AND s.producto_id = p.id
+                ORDER BY t.origen, s.precio IS NULL, s.precio""", self._con, params=(param,))
+
+    def serie(self, origen=None, nombre=None, marca=None, corrida=None):
+        """Serie completa (una fila por producto y corrida) reconstruida desde los cambios.
+
+        Sirve en los dos modos; filtra por tienda, nombre exacto, marca y/o corrida. Entre
+        dos cambios se supone el mismo precio; una corrida en que se buscó y no salió corta
+        la serie (no da fila) hasta que vuelva a verse.
+        """
+        condiciones, params = ["true"], []
+        for columna, valor in (("t.origen", origen), ("p.nombre", nombre), ("p.marca", marca)):
+            if valor is not None:
+                condiciones.append(f"{columna} = ?")
+                params.append(valor)
+        if corrida is not None:
+            # Sólo hace falta el último cambio hasta esa corrida (y los siguientes para cortar)
+            condiciones.append("o.producto_id IN (SELECT producto_id FROM estado WHERE corrida_id >= ?)")
+            params.append(corrida)
+        consulta = _SERIE.format(filtro=" AND ".join(condiciones),
+                                 filtro_corrida="c.id = ?" if corrida is not None else "true")
+        with self._lock:
+            return pd.read_sql_query(consulta, self._con,
+                                     params=params + ([corrida] if corrida is not None else []))
+
+    def compactar(self):
+        """Borra las observaciones que repiten el precio anterior del producto (base -> modo cdc).
+
+        Devuelve cuántas se borraron; serie() da los mismos precios antes y después.
+        """
+        with self._lock, self._con:
+            borradas = self._con.execute("""
+                DELETE FROM observaciones WHERE (producto_id, corrida_id) IN (
+                    SELECT producto_id, corrida_id FROM (
+                        SELECT producto_id, corrida_id, precio, ausente,
+                               LAG(corrida_id) OVER w AS anterior, LAG(precio) OVER w AS precio_anterior,
+                               LAG(ausente) OVER w AS ausente_anterior
+                        FROM observaciones WINDOW w AS (PARTITION BY producto_id ORDER BY corrida_id))
+                    WHERE anterior IS NOT NULL AND precio IS precio_anterior
+                      AND ausente = ausente_anterior)""").rowcount
+        with self._lock:
+            self._con.execute("VACUUM")
+        return borradas
+
+    def historial_producto(self, origen, nombre, marca=None):
+        """Observaciones guardadas de un producto de una tienda (en modo cdc, sus cambios), con las ausencias"""
+        with self._lock:
+            return pd.read_sql_query(_FILAS.format(extra=", o.ausente AS Ausente") + """
+                WHERE t.origen = ? AND p.nombre = ? AND p.marca = ?
+                ORDER BY o.fecha_hora""", self._con, params=(origen, nombre, marca or ""))
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+# ---------------  EJECUCIÓN  ---------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Base SQLite de precios")
+    parser.add_argument("base")
+    parser.add_argument("texto", nargs="?")
+    parser.add_argument("--exacto", action="store_true", help="nombre exacto (usa el índice)")
+    parser.add_argument("--compactar", action="store_true")
+    args = parser.parse_args()
+    base = BasePrecios(args.base)
+    inicio = time.perf_counter()
+    if args.compactar:
+        print(f"🗜️ {base.compactar()} observaciones repetidas borradas")
+    else:
+        resultado = base.ultimos_precios(args.texto or "", exacto=args.exacto)
+        print(resultado.to_string(index=False))
+        print(f"⏱️ {len(resultado)} filas en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    base.cerrar()
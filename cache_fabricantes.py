@@ -0,0 +1,60 @@
+#cache_fabricantes.py
+# ---------------  MÓDULOS  ---------------
+import sqlite3, threading, time
+
+# ---------------  CACHE PERSISTENTE  ---------------
+class CacheFabricantes:
+    """Cache en SQLite: URL de producto -> fabricante.
+
+    El fabricante casi nunca cambia, así que sólo se visitan fichas nuevas o vencidas.
+    "No encontrado" también se guarda (caché negativa) con un TTL más corto.
+    """
+
+    def __init__(self, ruta, ttl_dias=30, ttl_negativo_dias=3):
+        self.ttl = ttl_dias * 86400
+        self.ttl_negativo = ttl_negativo_dias * 86400
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._con:
+            self._con.execute("""
+                CREATE TABLE IF NOT EXISTS fabricantes (
+                    url         TEXT PRIMARY KEY,
+                    fabricante  TEXT,
+                    actualizado REAL NOT NULL
+                )""")
+        self.aciertos = 0
+        self.aciertos_negativos = 0
+        self.fallos = 0
+
+    def obtener(self, url):
+        """Devuelve (en_cache, fabricante). en_cache=False si no existe o está vencido"""
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT fabricante, actualizado FROM fabricantes WHERE url = ?", (url,)).fetchone()
+            if fila:
+                fabricante, actualizado = fila
+                ttl = self.ttl if fabricante else self.ttl_negativo
+                if time.time() - actualizado < ttl:
+                    if fabricante:
+                        self.aciertos += 1
+                    else:
+                        self.aciertos_negativos += 1
+                    return True, fabricante
+            self.fallos += 1
+            return False, None
+
+    def guardar(self, url, fabricante):
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT OR REPLACE INTO fabricantes (url, fabricante, actualizado) VALUES (?, ?, ?)",
+                (url, fabricante or None, time.time()))
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+    def resumen(self):
+        total = self.aciertos + self.aciertos_negativos + self.fallos
+        tasa = (self.aciertos + self.aciertos_negativos) / total * 100 if total else 0
+        return (f"🗃️ Caché de fabricantes: {self.aciertos} aciertos | {self.aciertos_negativos} "
+                f"'no encontrado' | {self.fallos} fallos ({tasa:.0f}% de fichas evitadas)")
@@ -0,0 +1,194 @@
+#captura_api.py
+# Captura de las respuestas JSON (XHR) que usan Farmatodo y Farmacias SAAS para pintar
+# sus grillas, leídas del log de performance de Chrome vía CDP. Con ellas se arman las
+# filas directamente, sin parsear HTML ni visitar la ficha de cada producto.
+# Sólo se aceptan respuestas de los endpoints de producto de la tienda ("patrones",
+# expresiones regulares sobre la URL) y, dentro de ellas, ítems con nombre de texto y
+# algún campo de precio: un JSON de categorías o de configuración no arma filas.
+#
+# Reproducción offline de una grabación:
+#   python captura_api.py grabaciones_api/Farmatodo_Diclofenac.json farmatodo Diclofenac
+# ---------------  MÓDULOS  ---------------
+from datetime import datetime
+import json, os, re, sys
+
+# ---------------  CAPTURA  ---------------
+def activar_log_red(opts):
+    """Habilita el log de performance (eventos Network.*) en unas Options de Chrome"""
+    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return opts
+
+def descartar_log(driver):
+    """Vacía el log acumulado (p. ej. antes de navegar con un driver reutilizado)"""
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+def leer_log_red(driver):
+    """Mensajes CDP acumulados en el log de performance (leerlo lo vacía)"""
+    mensajes = []
+    for entrada in driver.get_log("performance"):
+        try:
+            mensajes.append(json.loads(entrada["message"])["message"])
+        except (KeyError, ValueError):
+            continue
+    return mensajes
+
+def _coincide(url, patrones):
+    return any(re.search(p, url) for p in patrones)
+
+def capturar_peticion(mensajes, patrones):
+    """Última petición (url, método, headers, postData) cuya URL coincide con alguno de `patrones`.
+
+    Sirve para repetir la consulta de búsqueda cambiando sólo la página.
+    """
+    peticion = None
+    for mensaje in mensajes:
+        if mensaje.get("method") != "Network.requestWillBeSent":
+            continue
+        req = mensaje["params"]["request"]
+        if _coincide(req.get("url", ""), patrones):
+            peticion = {"url": req["url"], "metodo": req.get("method", "GET"),
+                        "headers": req.get("headers", {}), "postData": req.get("postData")}
+    return peticion
+
+def capturar_respuestas(driver, patrones, mensajes=None):
+    """Devuelve [{"url", "status", "json"}] de las respuestas JSON cuya URL coincide con
+    alguno de `patrones`, en el orden en que llegaron. Si no se pasan `mensajes`,
+    se lee (y vacía) el log del driver."""
+    capturas = []
+    for mensaje in leer_log_red(driver) if mensajes is None else mensajes:
+        if mensaje.get("method") != "Network.responseReceived":
+            continue
+        respuesta = mensaje["params"]["response"]
+        url = respuesta.get("url", "")
+        if "json" not in respuesta.get("mimeType", "") or not _coincide(url, patrones):
+            continue
+        try:
+            cuerpo = driver.execute_cdp_cmd("Network.getResponseBody",
+                                            {"requestId": mensaje["params"]["requestId"]})
+            capturas.append({"url": url, "status": respuesta.get("status"),
+                             "json": json.loads(cuerpo["body"])})
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la respuesta de {url}: {e}")
+    return capturas
+
+# ---------------  GRABACIÓN / REPRODUCCIÓN  ---------------
+def grabar(capturas, ruta):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(capturas, f, ensure_ascii=False, indent=1)
+
+def cargar_grabacion(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+# ---------------  FILAS DESDE JSON  ---------------
+def _valores(obj, ruta):
+    """Resuelve una ruta con puntos; '*' recorre todos los elementos de una lista/dict"""
+    actuales = [obj]
+    for parte in ruta.split(".") if ruta else []:
+        siguientes = []
+        for actual in actuales:
+            if parte == "*":
+                if isinstance(actual, list):
+                    siguientes.extend(actual)
+                elif isinstance(actual, dict):
+                    siguientes.extend(actual.values())
+            elif isinstance(actual, dict) and parte in actual:
+                siguientes.append(actual[parte])
+        actuales = siguientes
+    return actuales
+
+def _rutas(rutas):
+    return [rutas] if isinstance(rutas, str) else rutas
+
+def _escalar(valor):
+    return isinstance(valor, (str, int, float)) and not isinstance(valor, bool) and valor != ""
+
+def _campo(item, rutas):
+    """Primer valor escalar no vacío entre las rutas alternativas de un campo (un dict o
+    una lista no cuentan: p. ej. "fabricante": {...} sigue con la ruta siguiente)"""
+    for ruta in _rutas(rutas):
+        for valor in _valores(item, ruta):
+            if _escalar(valor):
+                return valor
+    return None
+
+def _es_producto(item, campos):
+    """Nombre de texto y al menos una de las rutas de Precio presente (aunque sea null)"""
+    return (isinstance(_campo(item, campos["Nombre"]), str)
+            and any(_valores(item, ruta) for ruta in _rutas(campos["Precio"])))
+
+def _items(respuesta, config_api):
+    """Productos (dicts) de una respuesta JSON según las rutas "lista" de la tienda"""
+    listas = config_api["lista"]
+    for lista in [listas] if isinstance(listas, str) else listas:
+        # Si la ruta termina en una lista, sus elementos son los productos
+        for encontrado in _valores(respuesta, lista):
+            for item in encontrado if isinstance(encontrado, list) else [encontrado]:
+                if isinstance(item, dict):
+                    yield item
+
+def claves_api(respuesta, config_api):
+    """SKUs (o nombres, si no hay SKU) presentes en una respuesta; sirve para cortar el paginado"""
+    campos = config_api["campos"]
+    return {_campo(i, campos.get("sku", [])) or _campo(i, campos["Nombre"])
+            for i in _items(respuesta, config_api) if _es_producto(i, campos)} - {None}
+
+def filas_desde_api(capturas, config_api, origen, producto, limpiar_precio, fecha=None):
+    """Arma las filas estándar (Fecha_Hora, Origen, ...) desde las respuestas capturadas.
+
+    `config_api` viene de tiendas.py: "lista" indica dónde están los productos dentro
+    del JSON y "campos" mapea cada columna a una o varias rutas alternativas.
+    """
+    fecha = fecha or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    campos = config_api["campos"]
+    filas, vistos = [], set()
+    for captura in capturas:
+        for item in _items(captura["json"], config_api):
+            if not _es_producto(item, campos):
+                continue
+            nombre = _campo(item, campos["Nombre"])
+            # El mismo producto puede venir en varias respuestas (paginado, facetas)
+            clave = _campo(item, campos.get("sku", [])) or nombre
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            precio = _campo(item, campos["Precio"])
+            if isinstance(precio, str):
+                precio = limpiar_precio(precio)
+            marca = _campo(item, campos.get("Marca", []))
+            filas.append({
+                "Fecha_Hora": fecha,
+                "Origen": origen,
+                "Producto_Buscado": producto,
+                "Marca": str(marca).strip() if marca is not None else None,
+                "Nombre": str(nombre).strip(),
+                "Precio": float(precio) if precio is not None else None,
+            })
+    return filas
+
+def filas_por_api(driver, config_api, origen, producto, limpiar_precio, grabar_en=None, previas=()):
+    """Captura + armado de filas para la página actual; [] si no hubo respuestas útiles.
+
+    `previas` son capturas ya leídas del log (p. ej. la primera página) que se suman.
+    Si `grabar_en` es una carpeta, guarda las respuestas para reproducirlas offline.
+    """
+    capturas = list(previas) + capturar_respuestas(driver, config_api["patrones"])
+    if grabar_en and capturas:
+        grabar(capturas, os.path.join(grabar_en, f"{origen}_{producto}.json"))
+    filas = filas_desde_api(capturas, config_api, origen, producto, limpiar_precio)
+    print(f"🛰️ {origen} – {producto}: {len(capturas)} respuestas JSON, {len(filas)} filas")
+    return filas
+
+# ---------------  EJECUCIÓN (REPRODUCCIÓN OFFLINE)  ---------------
+if __name__ == "__main__":
+    from tiendas import TIENDAS
+    from precios import limpiar_precio
+    ruta, tienda, producto = sys.argv[1:4]
+    filas = filas_desde_api(cargar_grabacion(ruta), TIENDAS[tienda]["api"], tienda, producto, limpiar_precio)
+    for fila in filas:
+        print(fila)
+    print(f"✅ {len(filas)} filas reconstruidas desde {ruta}")
@@ -0,0 +1,68 @@
+#chromedriver_cache.py
+# ---------------  MÓDULOS  ---------------
+from selenium.webdriver.chrome.service import Service
+import json, os, re, threading, time
+
+# ---------------  CONFIG  ---------------
+RUTA_MANIFIESTO = os.path.join(os.path.expanduser("~"), ".wdm", "chromedriver_manifest.json")
+TTL_MANIFIESTO  = 7 * 24 * 3600   # segundos antes de volver a consultar la última versión
+
+_ruta_driver = None
+_lock = threading.Lock()
+
+# ---------------  MANIFIESTO LOCAL  ---------------
+def _leer_manifiesto():
+    try:
+        with open(RUTA_MANIFIESTO, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _guardar_manifiesto(ruta, version):
+    os.makedirs(os.path.dirname(RUTA_MANIFIESTO), exist_ok=True)
+    tmp = RUTA_MANIFIESTO + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"ruta": ruta, "version": version, "resuelto": time.time()}, f, indent=2)
+    os.replace(tmp, RUTA_MANIFIESTO)
+
+def _descargar():
+    from webdriver_manager.chrome import ChromeDriverManager
+    ruta = ChromeDriverManager().install()
+    m = re.search(r"(\d+\.\d+\.\d+\.\d+)", ruta)
+    return ruta, m.group(1) if m else None
+
+# ---------------  RESOLUCIÓN DEL CHROMEDRIVER  ---------------
+def resolver_chromedriver():
+    """Devuelve la ruta del chromedriver resolviéndola una sola vez por proceso.
+
+    Orden: memoria del proceso → manifiesto vigente (TTL) → webdriver_manager →
+    manifiesto vencido (modo offline, si el binario sigue en disco).
+    """
+    global _ruta_driver
+    if _ruta_driver:
+        return _ruta_driver
+    with _lock:
+        if _ruta_driver:
+            return _ruta_driver
+
+        manifiesto = _leer_manifiesto()
+        en_disco = bool(manifiesto) and os.path.isfile(manifiesto.get("ruta", ""))
+        if en_disco and time.time() - manifiesto.get("resuelto", 0) < TTL_MANIFIESTO:
+            _ruta_driver = manifiesto["ruta"]
+            return _ruta_driver
+
+        try:
+            ruta, version = _descargar()
+            _guardar_manifiesto(ruta, version)
+            print(f"🧩 Chromedriver {version} resuelto → {ruta}")
+            _ruta_driver = ruta
+        except Exception as e:
+            if not en_disco:
+                raise
+            print(f"⚠️ No se pudo consultar la última versión ({e}); usando chromedriver en caché")
+            _ruta_driver = manifiesto["ruta"]
+        return _ruta_driver
+
+def servicio_chrome():
+    """Service de Selenium apuntando al chromedriver ya resuelto"""
+    return Service(resolver_chromedriver())
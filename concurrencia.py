@@ -0,0 +1,57 @@
+#concurrencia.py
+# ---------------  MÓDULOS  ---------------
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from urllib.parse import urlparse
+import threading, time
+
+# ---------------  CORTESÍA POR HOST  ---------------
+class LimitadorHost:
+    """Garantiza un intervalo mínimo entre páginas del mismo host.
+
+    Hosts distintos no se esperan entre sí: la cortesía es por sitio, no global.
+    """
+
+    def __init__(self, intervalo=2.0, por_host=None):
+        self.intervalo = intervalo
+        self.por_host = por_host or {}        # host -> intervalo específico
+        self._proximo = defaultdict(float)    # host -> instante en que se libera el siguiente turno
+        self._lock = threading.Lock()
+
+    def esperar(self, url):
+        host = urlparse(url).netloc
+        intervalo = self.por_host.get(host, self.intervalo)
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo[host])
+            self._proximo[host] = turno + intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+# ---------------  EJECUTOR  ---------------
+def ejecutar_en_paralelo(tareas, max_hilos=4, limites=None):
+    """Ejecuta tareas [(grupo, funcion), ...] con un tope global de hilos.
+
+    `limites` fija cuántas tareas de un mismo grupo (p. ej. una tienda) corren a la vez.
+    Cada grupo tiene su propia cola, así una tienda lenta no frena a las demás.
+    Los resultados vuelven en el mismo orden que `tareas`, sin importar cuál termine primero.
+    """
+    limites = limites or {}
+    global_sem = threading.Semaphore(max_hilos)
+
+    def correr(funcion):
+        with global_sem:
+            return funcion()
+
+    ejecutores = {}
+    try:
+        futuros = []
+        for grupo, funcion in tareas:
+            if grupo not in ejecutores:
+                ejecutores[grupo] = ThreadPoolExecutor(max_workers=limites.get(grupo, max_hilos),
+                                                       thread_name_prefix=str(grupo))
+            futuros.append(ejecutores[grupo].submit(correr, funcion))
+        return [f.result() for f in futuros]
+    finally:
+        for ex in ejecutores.values():
+            ex.shutdown(wait=True)
@@ -0,0 +1,224 @@
+#consultas.py
+# Consultas sobre el histórico en Parquet (historial.py) sin leerlo entero. Se mantienen
+# dos tablas precalculadas en un SQLite aparte:
+#   ultimos  (origen, nombre, marca)                 último precio de cada producto en cada tienda
+#   diarios  (fecha, principio, dosis, origen)       mínimo (y qué producto), mediana, máximo y
+#                                                    cantidad del día; origen "*" = todas las tiendas
+# actualizar() es incremental: anota qué archivos del histórico ya procesó, lee sólo los
+# nuevos para `ultimos` y recalcula `diarios` sólo de los días que esos archivos tocan
+# (la mediana no se puede sumar, pero un día es una partición chica).
+# principio y dosis salen de normaliza.py. Con SOLO_CAMBIOS la base SQLite guarda sólo los
+# cambios, pero al histórico va la corrida completa (BasePrecios.serie), así que un producto
+# que no cambia de precio sigue contando en los agregados de cada día en que se vio.
+#
+#   python consultas.py barato diclofenac --dosis 50mg --dias 7   (más barato por tienda en la semana)
+#   python consultas.py ultimos diclofenac [--dosis 50mg] [--origen Farmatodo]
+#   python consultas.py diarios diclofenac --dosis 50mg [--desde 2025-03-01] [--hasta ...] [--origen ...]
+#   python consultas.py actualizar
+# ---------------  MÓDULOS  ---------------
+from datetime import date, timedelta
+import argparse, os, sqlite3, threading
+import pandas as pd
+import pyarrow.dataset as ds
+from historial import RUTA_HISTORIAL, PARTICIONES
+from normaliza import agregar_componentes, extraer_dosis
+
+RUTA_AGREGADOS = os.path.join(os.getcwd(), "agregados_precios.sqlite")
+TODAS = "*"   # origen de los agregados diarios sobre todas las tiendas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS archivos (
+    ruta   TEXT PRIMARY KEY,                  -- relativa al histórico
+    fecha  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ultimos (
+    origen      TEXT NOT NULL,
+    nombre      TEXT NOT NULL,
+    marca       TEXT NOT NULL DEFAULT '',
+    fecha_hora  TEXT NOT NULL,
+    precio      REAL,
+    principio   TEXT,
+    dosis       TEXT,
+    PRIMARY KEY (origen, nombre, marca)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ultimos_principio ON ultimos (principio, dosis);
+CREATE TABLE IF NOT EXISTS diarios (
+    fecha          TEXT NOT NULL,
+    principio      TEXT NOT NULL,
+    dosis          TEXT NOT NULL,
+    origen         TEXT NOT NULL,
+    minimo         REAL,
+    nombre_minimo  TEXT,
+    mediana        REAL,
+    maximo         REAL,
+    n              INTEGER NOT NULL,
+    PRIMARY KEY (principio, dosis, fecha, origen)
+) WITHOUT ROWID;
+"""
+
+def _dosis(texto):
+    """"50mg", "50 MG" o "50.0mg" -> "50.0mg", como la escribe normaliza"""
+    return extraer_dosis(texto) or texto.lower() if texto else None
+
+# ---------------  AGREGADOS  ---------------
+class AgregadosPrecios:
+    """Tablas precalculadas sobre el histórico en Parquet, mantenidas de forma incremental."""
+
+    def __init__(self, ruta_historial=RUTA_HISTORIAL, ruta=RUTA_AGREGADOS):
+        self.ruta_historial = ruta_historial
+        self.ruta = ruta
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._con:
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.executescript(ESQUEMA)
+
+    def _dataset(self, archivos=None):
+        particionado = ds.partitioning(PARTICIONES, flavor="hive")
+        if archivos is not None:
+            return ds.dataset([os.path.join(self.ruta_historial, a) for a in archivos], format="parquet",
+                              partitioning=particionado, partition_base_dir=self.ruta_historial)
+        return ds.dataset(self.ruta_historial, format="parquet", partitioning=particionado)
+
+    def _leer(self, archivos=None, dias=None):
+        """Filas (con principio y dosis) de los `archivos` dados o de los `dias` dados"""
+        filtro = ds.field("fecha").isin(sorted(dias)) if dias else None
+        columnas = ["fecha", "Fecha_Hora", "Origen", "Nombre", "Marca", "Precio"]
+        df = self._dataset(archivos).to_table(columns=columnas, filter=filtro).to_pandas()
+        df = df[df["Nombre"].notna()].astype({"Marca": object, "Nombre": object})
+        return agregar_componentes(df)
+
+    def actualizar(self):
+        """Incorpora los archivos nuevos del histórico; devuelve cuántos"""
+        if not os.path.isdir(self.ruta_historial):
+            return 0
+        with self._lock:
+            hechos = {r for r, in self._con.execute("SELECT ruta FROM archivos")}
+        nuevos = sorted(a for a in (os.path.relpath(f, self.ruta_historial) for f in self._dataset().files)
+                        if a not in hechos)
+        if not nuevos:
+            return 0
+        filas = self._leer(archivos=nuevos)
+        dias = set(filas["fecha"])
+        del_dia = self._leer(dias=dias) if dias else None
+        with self._lock, self._con:
+            self._actualizar_ultimos(filas)
+            if dias:
+                self._actualizar_diarios(del_dia, dias)
+            self._con.executemany("INSERT INTO archivos (ruta, fecha) VALUES (?, ?)",
+                                  [(a, a.split(os.sep)[0].removeprefix("fecha=")) for a in nuevos])
+        return len(nuevos)
+
+    def _actualizar_ultimos(self, filas):
+        # Por producto la fila más reciente; sólo pisa la guardada si no es más vieja
+        filas = filas.assign(Marca=filas["Marca"].fillna(""))
+        filas = filas.sort_values("Fecha_Hora", kind="stable").drop_duplicates(
+            ["Origen", "Nombre", "Marca"], keep="last")
+        self._con.executemany("""
+            INSERT INTO ultimos (origen, nombre, marca, fecha_hora, precio, principio, dosis)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (origen, nombre, marca) DO UPDATE SET
+                fecha_hora = excluded.fecha_hora, precio = excluded.precio,
+                principio = excluded.principio, dosis = excluded.dosis
+            WHERE excluded.fecha_hora >= ultimos.fecha_hora""",
+            [(r.Origen, r.Nombre, r.Marca, str(r.Fecha_Hora), None if pd.isna(r.Precio) else float(r.Precio),
+              r.principio, r.dosis) for r in filas.itertuples(index=False)])
+
+    def _actualizar_diarios(self, del_dia, dias):
+        """Recalcula los agregados de los `dias` completos (por tienda y con todas las tiendas)"""
+        con_precio = del_dia.dropna(subset=["Precio", "principio", "dosis"])
+        grupos = []
+        for origen in (None, "Origen"):
+            claves = ["fecha", "principio", "dosis"] + ([origen] if origen else [])
+            por_grupo = con_precio.groupby(claves)["Precio"]
+            agregado = por_grupo.agg(minimo="min", mediana="median", maximo="max", n="size")
+            agregado["nombre_minimo"] = con_precio.loc[por_grupo.idxmin(), "Nombre"].to_numpy()
+            agregado = agregado.reset_index()
+            grupos.append(agregado if origen else agregado.assign(Origen=TODAS))
+        agregados = pd.concat(grupos, ignore_index=True)
+        self._con.executemany("DELETE FROM diarios WHERE fecha = ?", [(d,) for d in dias])
+        self._con.executemany("""
+            INSERT INTO diarios (fecha, principio, dosis, origen, minimo, nombre_minimo, mediana, maximo, n)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(r.fecha, r.principio, r.dosis, r.Origen, r.minimo, r.nombre_minimo, r.mediana, r.maximo, int(r.n))
+             for r in agregados.itertuples(index=False)])
+
+    # ---------------  CONSULTAS  ---------------
+    def ultimos(self, principio=None, dosis=None, origen=None):
+        """Último precio de cada producto en cada tienda, del más barato al más caro"""
+        condiciones, params = ["true"], []
+        for columna, valor in (("principio", principio and principio.lower()), ("dosis", _dosis(dosis)),
+                               ("origen", origen)):
+            if valor:
+                condiciones.append(f"{columna} = ?")
+                params.append(valor)
+        with self._lock:
+            return pd.read_sql_query(f"""
+                SELECT fecha_hora AS Fecha_Hora, origen AS Origen, NULLIF(marca, '') AS Marca,
+                       nombre AS Nombre, precio AS Precio, principio, dosis
+                FROM ultimos WHERE {" AND ".join(condiciones)}
+                ORDER BY precio IS NULL, precio""", self._con, params=params)
+
+    def diarios(self, principio, dosis=None, desde=None, hasta=None, origen=TODAS):
+        """Mínimo, mediana y máximo por día (origen=None: una fila por tienda y día)"""
+        condiciones, params = ["principio = ?"], [principio.lower()]
+        if dosis:
+            condiciones.append("dosis = ?")
+            params.append(_dosis(dosis))
+        condiciones.append("origen = ?" if origen else "origen <> ?")
+        params.append(origen or TODAS)
+        for condicion, valor in (("fecha >= ?", desde), ("fecha <= ?", hasta)):
+            if valor:
+                condiciones.append(condicion)
+                params.append(str(valor))
+        with self._lock:
+            return pd.read_sql_query(f"""
+                SELECT fecha, principio, dosis, origen AS Origen, minimo, nombre_minimo, mediana, maximo, n
+                FROM diarios WHERE {" AND ".join(condiciones)}
+                ORDER BY fecha, dosis, origen""", self._con, params=params)
+
+    def mas_barato(self, principio, dosis=None, desde=None, hasta=None):
+        """Precio mínimo de cada tienda en el período, con el producto y el día"""
+        df = self.diarios(principio, dosis, desde, hasta, origen=None)
+        if df.empty:
+            return df
+        df = df.loc[df.groupby(["Origen", "dosis"])["minimo"].idxmin()]
+        return df[["Origen", "dosis", "minimo", "nombre_minimo", "fecha"]].sort_values("minimo").reset_index(drop=True)
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+# ---------------  EJECUCIÓN  ---------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consultas sobre el histórico de precios")
+    parser.add_argument("accion", choices=["actualizar", "ultimos", "diarios", "barato"])
+    parser.add_argument("principio", nargs="?")
+    parser.add_argument("--dosis")
+    parser.add_argument("--origen")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--dias", type=int, help="barato: últimos N días (en vez de --desde)")
+    parser.add_argument("--historial", default=RUTA_HISTORIAL)
+    parser.add_argument("--agregados", default=RUTA_AGREGADOS)
+    args = parser.parse_args()
+    if args.accion in ("diarios", "barato") and not args.principio:
+        parser.error(f"{args.accion} necesita el principio activo")
+
+    agregados = AgregadosPrecios(args.historial, args.agregados)
+    nuevos = agregados.actualizar()
+    if nuevos:
+        print(f"🔄 {nuevos} archivos nuevos del histórico incorporados")
+    if args.accion == "ultimos":
+        resultado = agregados.ultimos(args.principio, args.dosis, args.origen)
+    elif args.accion == "diarios":
+        resultado = agregados.diarios(args.principio, args.dosis, args.desde, args.hasta,
+                                      origen=args.origen or TODAS)
+    elif args.accion == "barato":
+        desde = args.desde or (date.today() - timedelta(days=args.dias or 7)).isoformat()
+        resultado = agregados.mas_barato(args.principio, args.dosis, desde, args.hasta)
+    else:
+        resultado = None
+    if resultado is not None:
+        print(resultado.to_string(index=False) if len(resultado) else "Sin resultados")
+    agregados.cerrar()
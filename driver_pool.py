@@ -0,0 +1,127 @@
+#driver_pool.py
+# ---------------  MÓDULOS  ---------------
+import queue
+import threading
+from contextlib import contextmanager
+
+# ---------------  POOL DE NAVEGADORES  ---------------
+class PoolDrivers:
+    """Mantiene N navegadores Chrome abiertos y los presta a los scrapers.
+
+    Cada driver se revisa antes de entregarlo (health check) y se recicla al
+    llegar a `max_paginas` visitas para evitar el crecimiento de memoria de Chrome.
+    """
+
+    def __init__(self, crear_driver, tamano=1, max_paginas=40, espera_max=300, limitador=None,
+                 preparar=None):
+        self.crear_driver = crear_driver      # función sin argumentos que lanza un Chrome nuevo
+        self.limitador = limitador            # LimitadorHost opcional: cortesía por host en visitar()
+        self.preparar = preparar              # función (driver, tienda) opcional, antes de cada visita
+        self.tamano = tamano
+        self.max_paginas = max_paginas
+        self.espera_max = espera_max
+        self._libres = queue.LifoQueue()      # LIFO: se reutiliza el driver más "caliente"
+        self._paginas = {}                    # id(driver) -> páginas visitadas
+        self._vivos = 0
+        self._lock = threading.Lock()
+        # Estadísticas
+        self.lanzados = 0
+        self.reutilizados = 0
+        self.reciclados = 0
+        self.descartados = 0
+
+    # ---------- CICLO DE VIDA ----------
+    def _lanzar(self):
+        driver = self.crear_driver()
+        with self._lock:
+            self._paginas[id(driver)] = 0
+            self.lanzados += 1
+        return driver
+
+    def _cerrar_driver(self, driver, motivo=None):
+        with self._lock:
+            self._paginas.pop(id(driver), None)
+            self._vivos -= 1
+            if motivo:
+                setattr(self, motivo, getattr(self, motivo) + 1)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _esta_sano(self, driver):
+        try:
+            driver.current_url  # falla si la sesión o el proceso de Chrome murieron
+            return True
+        except Exception:
+            return False
+
+    # ---------- PRÉSTAMO / DEVOLUCIÓN ----------
+    def obtener(self):
+        """Entrega un driver sano: reutiliza uno libre o lanza uno nuevo si hay cupo"""
+        while True:
+            try:
+                driver = self._libres.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    hay_cupo = self._vivos < self.tamano
+                    if hay_cupo:
+                        self._vivos += 1
+                if hay_cupo:
+                    try:
+                        return self._lanzar()
+                    except Exception:
+                        with self._lock:
+                            self._vivos -= 1
+                        raise
+                driver = self._libres.get(timeout=self.espera_max)
+
+            if self._esta_sano(driver):
+                with self._lock:
+                    self.reutilizados += 1
+                return driver
+            print("⚠️ Driver no responde, se descarta")
+            self._cerrar_driver(driver, motivo="descartados")
+
+    def devolver(self, driver, roto=False):
+        """Devuelve el driver al pool; lo cierra si falló o si ya cumplió su cupo de páginas"""
+        if roto:
+            self._cerrar_driver(driver, motivo="descartados")
+        elif self._paginas.get(id(driver), 0) >= self.max_paginas:
+            self._cerrar_driver(driver, motivo="reciclados")
+        else:
+            self._libres.put(driver)
+
+    @contextmanager
+    def usar(self):
+        """Context manager: `with POOL.usar() as driver:` presta y devuelve el driver"""
+        driver = self.obtener()
+        try:
+            yield driver
+        except Exception:
+            self.devolver(driver, roto=True)
+            raise
+        self.devolver(driver)
+
+    def visitar(self, driver, url, tienda=None):
+        """driver.get(url) respetando la cortesía por host y contando la página para el reciclaje"""
+        if self.preparar and tienda:
+            self.preparar(driver, tienda)
+        if self.limitador:
+            self.limitador.esperar(url)
+        driver.get(url)
+        with self._lock:
+            self._paginas[id(driver)] = self._paginas.get(id(driver), 0) + 1
+
+    # ---------- CIERRE Y REPORTE ----------
+    def cerrar(self):
+        while True:
+            try:
+                driver = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self._cerrar_driver(driver)
+
+    def resumen(self):
+        return (f"🚗 Drivers lanzados: {self.lanzados} | reutilizados: {self.reutilizados} | "
+                f"reciclados: {self.reciclados} | descartados: {self.descartados}")
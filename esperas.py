@@ -0,0 +1,119 @@
+#esperas.py
+# ---------------  MÓDULOS  ---------------
+from selenium.common.exceptions import TimeoutException
+from collections import defaultdict
+import threading, time
+
+# Un predicado recibe (driver, estado) y devuelve True cuando la página está lista.
+# `estado` es un dict nuevo en cada espera, para predicados que necesitan memoria
+# (p. ej. "la cantidad de tarjetas no cambió en X ms").
+
+# ---------------  PREDICADOS  ---------------
+def selector_presente(css):
+    def pred(driver, estado):
+        return bool(driver.execute_script("return document.querySelector(arguments[0]) !== null;", css))
+    return pred
+
+def spinner_ausente(css):
+    def pred(driver, estado):
+        return not driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0]))"
+            ".some(e => e.offsetParent !== null);", css)
+    return pred
+
+def texto_presente(texto):
+    def pred(driver, estado):
+        return bool(driver.execute_script(
+            "return document.body && document.body.innerText.indexOf(arguments[0]) !== -1;", texto))
+    return pred
+
+def _estable(estado, clave, valor, estable_ms):
+    """True cuando `valor` no cambió durante `estable_ms`"""
+    ahora = time.monotonic()
+    if estado.get(clave) != valor:
+        estado[clave] = valor
+        estado[clave + "_desde"] = ahora
+        return False
+    return (ahora - estado[clave + "_desde"]) * 1000 >= estable_ms
+
+def cantidad_estable(css, estable_ms=800, minimo=1):
+    """La cantidad de elementos `css` es >= minimo y no cambia durante estable_ms"""
+    def pred(driver, estado):
+        n = driver.execute_script("return document.querySelectorAll(arguments[0]).length;", css)
+        return n >= minimo and _estable(estado, "cantidad", n, estable_ms)
+    return pred
+
+def cantidad_aumenta(css):
+    """Hay más elementos `css` que al comenzar la espera (p. ej. tras 'Cargar más')"""
+    def pred(driver, estado):
+        n = driver.execute_script("return document.querySelectorAll(arguments[0]).length;", css)
+        estado.setdefault("inicial", n)
+        return n > estado["inicial"]
+    return pred
+
+def altura_cambia():
+    """document.body.scrollHeight cambió desde el inicio de la espera (scroll infinito)"""
+    def pred(driver, estado):
+        h = driver.execute_script("return document.body.scrollHeight;")
+        estado.setdefault("inicial", h)
+        return h != estado["inicial"]
+    return pred
+
+def red_inactiva(estable_ms=500):
+    """No se registraron recursos nuevos (XHR, imágenes, scripts) durante estable_ms"""
+    def pred(driver, estado):
+        n = driver.execute_script(
+            "return document.readyState === 'complete' ? "
+            "performance.getEntriesByType('resource').length : -1;")
+        return n >= 0 and _estable(estado, "recursos", n, estable_ms)
+    return pred
+
+def todas(*predicados):
+    def pred(driver, estado):
+        # Cada predicado guarda su memoria en un sub-dict propio
+        return all(p(driver, estado.setdefault(i, {})) for i, p in enumerate(predicados))
+    return pred
+
+def cualquiera(*predicados):
+    def pred(driver, estado):
+        return any(p(driver, estado.setdefault(i, {})) for i, p in enumerate(predicados))
+    return pred
+
+# ---------------  MOTOR DE ESPERA  ---------------
+TIEMPOS = defaultdict(list)      # etiqueta -> [(segundos, listo)]
+_lock = threading.Lock()
+
+def esperar_listo(driver, predicado, timeout=15, intervalo=0.2, etiqueta="pagina", obligatorio=False):
+    """Sondea `predicado` hasta que la página esté lista o venza `timeout`.
+
+    Devuelve los segundos esperados. Si `obligatorio` y se vence el tiempo,
+    lanza TimeoutException (igual que WebDriverWait); si no, sigue sin error.
+    """
+    estado = {}
+    inicio = time.monotonic()
+    listo = False
+    while True:
+        try:
+            listo = predicado(driver, estado)
+        except Exception:
+            listo = False  # DOM a medio construir: se reintenta en el siguiente sondeo
+        transcurrido = time.monotonic() - inicio
+        if listo or transcurrido >= timeout:
+            break
+        time.sleep(intervalo)
+
+    with _lock:
+        TIEMPOS[etiqueta].append((transcurrido, listo))
+    if not listo and obligatorio:
+        raise TimeoutException(f"{etiqueta}: página no lista tras {timeout}s")
+    return transcurrido
+
+def resumen_esperas():
+    lineas = ["⏱️ Esperas de carga (n | promedio | máx | vencidas):"]
+    with _lock:
+        for etiqueta, datos in sorted(TIEMPOS.items()):
+            segundos = [s for s, _ in datos]
+            vencidas = sum(1 for _, listo in datos if not listo)
+            lineas.append(f"   {etiqueta}: {len(segundos)} | {sum(segundos) / len(segundos):.2f}s | "
+                          f"{max(segundos):.2f}s | {vencidas}")
+    return "\n".join(lineas)
@@ -0,0 +1,77 @@
+#extraccion.py
+# Extracción de tarjetas de producto a partir de un mapa de campos ("tarjetas" en tiendas.py):
+#   {"item": selector de la tarjeta, "campos": {columna: "selector" | "selector@atributo"}}
+# El mismo mapa se aplica en Python sobre el árbol de parseo.py o dentro de Chrome con un
+# único execute_script, que devuelve las filas ya armadas sin pasar el HTML a Python.
+# Selector vacío ("" o "@href") = la tarjeta misma. Campo ausente = None; presente = su
+# texto (get_text(strip=True)) o el valor del atributo. Ambos modos respetan la "raiz".
+# ---------------  MÓDULOS  ---------------
+import parseo
+from parseo import documento, html_raiz
+from tiendas import TIENDAS
+
+def _partes(selector):
+    css, _, atributo = selector.partition("@")
+    return css.strip(), atributo or None
+
+# ---------------  EN PYTHON (bs4 / selectolax)  ---------------
+def campos_desde_doc(doc, tienda):
+    """[{columna: valor}] por cada tarjeta de `doc` según el mapa de la tienda"""
+    config = TIENDAS[tienda]["tarjetas"]
+    campos = [(columna, *_partes(selector)) for columna, selector in config["campos"].items()]
+    filas = []
+    for card in doc.select(config["item"]):
+        fila = {}
+        for columna, css, atributo in campos:
+            elem = card.select_one(css) if css else card
+            if elem is None:
+                fila[columna] = None
+            elif atributo:
+                fila[columna] = elem.get(atributo)
+            else:
+                fila[columna] = elem.get_text(strip=True)
+        filas.append(fila)
+    return filas
+
+# ---------------  EN EL NAVEGADOR  ---------------
+# Texto como bs4 get_text(strip=True): cada nodo de texto recortado y concatenado
+_JS_EXTRAER = """
+const [raiz, item, campos] = arguments;
+const texto = e => {
+    const w = document.createTreeWalker(e, NodeFilter.SHOW_TEXT);
+    let s = "", n;
+    while ((n = w.nextNode())) s += n.nodeValue.trim();
+    return s;
+};
+let raices = raiz ? Array.from(document.querySelectorAll(raiz)) : [];
+if (!raices.length) raices = [document];
+return raices.flatMap(r => Array.from(r.querySelectorAll(item))).map(card => {
+    const fila = {};
+    for (const [columna, css, atributo] of campos) {
+        const e = css ? card.querySelector(css) : card;
+        fila[columna] = !e ? null : (atributo ? e.getAttribute(atributo) : texto(e));
+    }
+    return fila;
+});
+"""
+
+def campos_en_navegador(driver, tienda):
+    """Lo mismo que campos_desde_doc, pero calculado en Chrome con un solo execute_script"""
+    config = TIENDAS[tienda]["tarjetas"]
+    campos = [[columna, *_partes(selector)] for columna, selector in config["campos"].items()]
+    raiz = TIENDAS[tienda].get("raiz") if parseo.ACOTAR_A_RAIZ else None
+    return driver.execute_script(_JS_EXTRAER, raiz, config["item"], campos)
+
+def verificar_equivalencia(driver, tienda):
+    """Compara ambos modos sobre la página actual; imprime las diferencias y devuelve True si coinciden"""
+    en_navegador = campos_en_navegador(driver, tienda)
+    en_python = campos_desde_doc(documento(html_raiz(driver, tienda), tienda), tienda)
+    if en_navegador == en_python:
+        print(f"✅ {tienda}: extracción en navegador y en Python coinciden ({len(en_python)} tarjetas)")
+        return True
+    print(f"❌ {tienda}: navegador {len(en_navegador)} tarjetas, Python {len(en_python)}")
+    for a, b in zip(en_navegador, en_python):
+        if a != b:
+            print(f"   navegador: {a}\n   python:    {b}")
+            break
+    return False
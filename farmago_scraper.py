@@ -1,50 +1,40 @@
 # farmago_scraper.py
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
 import pandas as pd
 import time, os, traceback
 from datetime import datetime
+from driver_pool import PoolDrivers
+from concurrencia import LimitadorHost
+from chromedriver_cache import servicio_chrome
+from esperas import esperar_listo, resumen_esperas
+from tiendas import TIENDAS
+from http_fetch import ClienteHTTP
+from recursos import bloquear_recursos, registrar_consumo, resumen_consumo
+from parseo import documento, html_raiz, resumen_parseo
+from extraccion import campos_desde_doc
+from marcas import diccionario
+from historial import guardar_corrida, exportar_excel
+from sumidero import SumideroFilas
+from precios import precios_columna, resumen_precios
 
 # Configuración específica para Farmago
 RUTA_EXCEL = os.path.join(os.getcwd(), "consolidado_farmago.xlsx")
+RUTA_HISTORIAL = os.path.join(os.path.dirname(RUTA_EXCEL), "historial_farmago")  # Parquet por fecha/Origen
+EXPORTAR_EXCEL = False   # True = regenerar RUTA_EXCEL desde el histórico al terminar
+RUTA_CORRIDAS = os.path.join(os.getcwd(), "corridas_farmago")  # filas en JSONL + punto de control por corrida
 HEADLESS = True
 PRODUCTOS = ["Diclofenac", "Paracetamol", "Ibuprofeno", "Loratadina"]
 PROXY = None
+BLOQUEAR_RECURSOS = True  # imágenes, fuentes, media y trackers (ver recursos.py)
 INTENTOS = 2
 RETRY_DELAY = 10
-URL_BASE = "https://www.farmago.com.ve/website/search?search={}&order=name+asc"
+INTERVALO_HOST = 2  # segundos mínimos entre páginas de la tienda
+POOL_TAMANO = 1     # navegadores Chrome que se mantienen abiertos
+POOL_MAX_PAG = 40   # páginas por navegador antes de reciclarlo
+URL_BASE = TIENDAS["farmago"]["url_busqueda"]
 
 # ---------------  FUNCIONES DE APOYO  ---------------
-def limpiar_precio(precio_str):
-    """Limpia y convierte precios a formato numérico"""
-    if not precio_str:
-        return None
-    try:
-        precio_limpio = precio_str.replace("Bs.", "").replace(" ", "").strip()
-        if ',' in precio_limpio:
-            if '.' in precio_limpio:
-                partes = precio_limpio.split(',')
-                parte_entera = partes[0].replace('.', '')
-                precio_limpio = parte_entera + '.' + partes[1]
-            else:
-                precio_limpio = precio_limpio.replace(',', '.')
-        else:
-            if precio_limpio.count('.') > 1:
-                partes = precio_limpio.split('.')
-                parte_entera = ''.join(partes[:-1])
-                parte_decimal = partes[-1]
-                precio_limpio = parte_entera + '.' + parte_decimal
-        return float(precio_limpio)
-    except Exception as e:
-        print(f"Error limpiando precio '{precio_str}': {e}")
-        return None
-
 def chrome_stealth():
     """Configura opciones de Chrome para evitar detección como bot"""
     opts = Options()
@@ -63,11 +53,27 @@ def chrome_stealth():
         opts.add_argument(f'--proxy-server={PROXY}')
     return opts
 
-def retry(func, producto):
+def preparar_driver(driver, tienda):
+    """Antes de cada visita: patrones de bloqueo de recursos de la tienda"""
+    if BLOQUEAR_RECURSOS:
+        bloquear_recursos(driver, tienda, TIENDAS[tienda])
+
+POOL = PoolDrivers(
+    lambda: webdriver.Chrome(service=servicio_chrome(), options=chrome_stealth()),
+    tamano=POOL_TAMANO, max_paginas=POOL_MAX_PAG, limitador=LimitadorHost(INTERVALO_HOST),
+    preparar=preparar_driver)
+
+HTTP = ClienteHTTP(proxy=PROXY, limitador=POOL.limitador)
+
+def retry(func, producto, con_driver=True):
     """Implementa reintentos para operaciones frágiles"""
     for i in range(1, INTENTOS + 1):
         try:
-            return func(producto)
+            if not con_driver:
+                return func(producto)  # el scraper pide un driver al pool sólo si lo necesita
+            # Si func falla, el pool descarta ese driver y el siguiente intento usa uno nuevo
+            with POOL.usar() as driver:
+                return func(producto, driver)
         except Exception as e:
             print(f"[RETRY {i}/{INTENTOS}] {func.__name__} – {producto}: {e}")
             if i == INTENTOS:
@@ -80,40 +86,31 @@ def retry(func, producto):
 def scrap_farmago(producto):
     """Extrae productos de Farmago para el término de búsqueda dado"""
     url = URL_BASE.format(producto)
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_stealth())
-    try:
-        driver.get(url)
-        WebDriverWait(driver, 35).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "o_search_result_item"))
-        )
-        time.sleep(3)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-    except Exception as e:
-        driver.save_screenshot(f"farmago_{producto}.png")
-        raise e
-    finally:
-        driver.quit()
+
+    def html_con_navegador():
+        with POOL.usar() as driver:
+            try:
+                POOL.visitar(driver, url, "farmago")
+                esperar_listo(driver, TIENDAS["farmago"]["listo"], timeout=35, etiqueta="farmago", obligatorio=True)
+                registrar_consumo(driver, "farmago")
+                return html_raiz(driver, "farmago")
+            except Exception as e:
+                driver.save_screenshot(f"farmago_{producto}.png")
+                raise e
+
+    # Odoo renderiza en servidor: HTTP plano, Chrome sólo si falta el marcado
+    doc = documento(HTTP.obtener_html(url, TIENDAS["farmago"], html_con_navegador), "farmago")
     
     fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     filas = []
     
-    # Diccionario de mapeo de términos a marcas (CASOS ESPECÍFICOS)
-    marca_por_termino = {
-        "biosa": "BIOSANO",
-        "biosano": "BIOSANO",
-        "butan": "Meyer",
-        "meyer": "Meyer",
-        "brolat": "MEYER",  # Para productos relacionados
-        "ibutan": "Meyer",  # Variación común
-        "brolat": "MEYER"   # Para productos relacionados
-    }
+    # Términos que delatan la marca (CASOS ESPECÍFICOS): grupo "farmago" de marcas.csv
+    marca_por_termino = diccionario("farmago")
     
-    for card in soup.select("a.dropdown-item"):
-        nombre_raw = card.select_one("div.h6.fw-bold.mb-0")
-        precio_span = card.select_one("span.oe_currency_value")
-        if not nombre_raw:
+    for card in campos_desde_doc(doc, "farmago"):
+        if card["Nombre"] is None:
             continue
-        texto = nombre_raw.get_text(strip=True)
+        texto = card["Nombre"]
         
         # --- extraer marca y limpiar nombre ---
         marca = None
@@ -128,22 +125,7 @@ def scrap_farmago(producto):
         
         # 2. Si no hay marca, buscar por términos clave en el nombre
         if not marca:
-            texto_lower = texto_limpio.lower()
-            
-            # Caso especial para BIOSA/BIOSANO
-            if "biosa" in texto_lower and "biosano" not in texto_lower:
-                marca = "BIOSANO"
-            
-            # Caso especial para IBUTAN
-            elif "butan" in texto_lower and "meyer" not in texto_lower:
-                marca = "Meyer"
-            
-            # Búsqueda general usando el diccionario
-            else:
-                for termino, marca_asignar in marca_por_termino.items():
-                    if termino in texto_lower:
-                        marca = marca_asignar
-                        break  # Encontramos una marca, no seguimos buscando
+            marca = marca_por_termino.buscar(texto_limpio)
         
         # 3. CORRECCIÓN ADICIONAL: Normalizar la marca "Meyer" para que sea consistente
         if marca and "meyer" in marca.lower():
@@ -155,7 +137,7 @@ def scrap_farmago(producto):
             "Producto_Buscado": producto,
             "Marca": marca,
             "Nombre": texto_limpio,
-            "Precio": limpiar_precio(f"Bs. {precio_span.text}" if precio_span else None)
+            "Precio": f"Bs. {card['Precio']}" if card["Precio"] is not None else None
         })
     
     # Eliminar duplicados
@@ -172,33 +154,46 @@ def scrap_farmago(producto):
 # ---------------  FUNCIÓN PRINCIPAL  ---------------
 def main():
     """Ejecuta el scraping para todos los productos definidos"""
-    todos = []
-    for prod in PRODUCTOS:
-        print(f"🔍 Buscando '{prod}' en Farmago...")
-        data = retry(scrap_farmago, prod)
-        todos.extend(data)
-        print(f"✅ {prod}: {len(data)} productos encontrados")
-        time.sleep(5)  # Pausa entre búsquedas
+    sumidero = SumideroFilas(RUTA_CORRIDAS)  # retoma la corrida anterior si quedó cortada
+    try:
+        for prod in PRODUCTOS:
+            if sumidero.completado("FarmaGo", prod):
+                continue
+            print(f"🔍 Buscando '{prod}' en Farmago...")
+            data = retry(scrap_farmago, prod, con_driver=False)
+            sumidero.agregar("FarmaGo", prod, data)
+            print(f"✅ {prod}: {len(data)} productos encontrados")
+            time.sleep(5)  # Pausa entre búsquedas
+    finally:
+        POOL.cerrar()
+        HTTP.cerrar()
+        print(POOL.resumen())
+        print(HTTP.resumen())
+        print(resumen_esperas())
+        print(resumen_parseo())
+        print(resumen_consumo())
     
-    if not todos:
+    if not sumidero.cantidad():
         print("❌ No se recuperó ningún producto.")
         return
     
-    print("📊 Creando DataFrame...")
-    df_nuevo = pd.DataFrame(todos).drop_duplicates(subset=["Nombre", "Marca"])
-    
-    # Manejo del archivo Excel
-    if os.path.isfile(RUTA_EXCEL):
-        print("📂 Leyendo Excel existente...")
-        df_existente = pd.read_excel(RUTA_EXCEL)
-        df_final = pd.concat([df_existente, df_nuevo], ignore_index=True)
+    # El histórico una sola vez: si lo que sigue falla, al retomar se salta
+    if sumidero.guardada:
+        print(f"♻️ Corrida {sumidero.clave} ya guardada en el histórico")
     else:
-        print("📂 Creando Excel nuevo...")
-        df_final = df_nuevo
-    
-    print("💾 Guardando Excel...")
-    df_final.to_excel(RUTA_EXCEL, index=False)
-    print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_EXCEL}")
+        print("📊 Creando DataFrame...")
+        df_nuevo = pd.DataFrame(list(sumidero.filas())).drop_duplicates(subset=["Nombre", "Marca"])
+        df_nuevo["Precio"] = precios_columna(df_nuevo["Precio"])
+        print(resumen_precios())
+
+        # Histórico en Parquet: sólo se escriben los archivos de esta corrida
+        archivos = guardar_corrida(df_nuevo, RUTA_HISTORIAL, sello=sumidero.clave)
+        print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_HISTORIAL} ({archivos} archivos)")
+        sumidero.marcar_guardada()
+    if EXPORTAR_EXCEL:
+        print("💾 Exportando Excel...")
+        exportar_excel(RUTA_EXCEL, RUTA_HISTORIAL)
+    sumidero.terminar()
 
 # ---------------  EJECUCIÓN  ---------------
 if __name__ == "__main__":
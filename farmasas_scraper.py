@@ -1,24 +1,44 @@
 # farmasas_scraper.py
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
 import pandas as pd
 import time, os, traceback
 from datetime import datetime
+from driver_pool import PoolDrivers
+from cache_fabricantes import CacheFabricantes
+from concurrencia import LimitadorHost, ejecutar_en_paralelo
+from chromedriver_cache import servicio_chrome
+from esperas import esperar_listo, resumen_esperas
+from tiendas import TIENDAS
+from captura_api import activar_log_red, descartar_log, filas_por_api
+from recursos import bloquear_recursos, registrar_consumo, resumen_consumo
+from parseo import documento, html_raiz, resumen_parseo
+from parseo_tiendas import tarjetas_farmasas
+from marcas import diccionario
+from historial import guardar_corrida, exportar_excel
+from sumidero import SumideroFilas
+from precios import limpiar_precio, precios_columna, resumen_precios
 import re
 
 # Configuración específica para Farmacias SAAS
 RUTA_EXCEL = r"C:\Users\sisa4\Desktop\consolidado_farmasas.xlsx"
+RUTA_HISTORIAL = os.path.join(os.path.dirname(RUTA_EXCEL), "historial_farmasas")  # Parquet por fecha/Origen
+EXPORTAR_EXCEL = False   # True = regenerar RUTA_EXCEL desde el histórico al terminar
+RUTA_CORRIDAS = os.path.join(os.getcwd(), "corridas_farmasas")  # filas en JSONL + punto de control por corrida
 HEADLESS = True
 PRODUCTOS = ["Diclofenac", "Paracetamol", "Ibuprofeno", "Loratadina"]
 PROXY = None
+BLOQUEAR_RECURSOS = True  # imágenes, fuentes, media y trackers (ver recursos.py)
+CAPTURA_API = False  # filas desde el JSON de la tienda (CDP) en vez de parsear HTML; activar tras grabar y revisar (tests/fixtures/api)
+GRABAR_API_EN = None  # carpeta para guardar las respuestas y reproducirlas offline
 INTENTOS = 2
 RETRY_DELAY = 10
+INTERVALO_HOST = 1  # segundos mínimos entre páginas de la tienda
+HILOS_DETALLE = 3   # fichas de producto visitadas a la vez
+RUTA_CACHE_FABRICANTES = os.path.join(os.getcwd(), "cache_fabricantes.sqlite")
+TTL_FABRICANTE = 30  # días antes de volver a visitar la ficha de un producto
+POOL_TAMANO = 1 + HILOS_DETALLE  # navegadores Chrome que se mantienen abiertos
+POOL_MAX_PAG = 40   # páginas por navegador antes de reciclarlo
 BASE_URL = "https://tienda.farmaciasaas.com"
 
 # ---------------  LISTAS DE APOYO  ---------------
@@ -26,41 +46,9 @@ PRINCIPIOS_ACTIVOS = [
     "diclofenac", "paracetamol", "ibuprofeno", "loratadina", "amoxicilina",
     "naproxeno", "aspirina", "cetirizina", "omeprazol", "metformina"
 ]
-MARCAS_CONOCIDAS = [
-    "mk", "genfar", "gsk", "panadol", "bago", "roemmers", "clofen",  "raven", "drotaf", "elm", "ccm", "dlr", "clx", "sigvaris",
-    "Oftalmi", "Genven", "Leti", "Calox", "Elmor", "Ponce y Benzo", "Pfizer", "CCM Farma", "Aless", "La Santé", "Dollder", "Meyer",
-    "Adium", "Bioglass", "Bioquimica", "Biosano", "Valmorca", "Laboratorios Farma", "COFASA", "Siegfried", "FC Pharma", 
-    "Laboratorios Vargas", "Biotech", "DAC 55", "Pharmetique Labs", "PlusAndex", "Buka", "Kimiceg", "Farmacias Unidas",
-    "Biotechnologia GKV", "DistriLab", "Neo", "Quim-Far", "MediGen", "MedVal", "MegaLabs", "MVGA", "Ravel", "Remeny", "Scott Edil",
-    "Drogueria Clínica", "Vitalis", "Vivax", "GeoLab", "DoroPharma", "GVS Pharma", "IPS", "KMPlus", "Laproff", "INVERSIONES GEAGAR 2021",
-    "Farmacenter 24 La Lago"
-]
+MARCAS = diccionario("general")  # marcas.csv compilado (ver marcas.py)
 
 # ---------------  FUNCIONES DE APOYO  ---------------
-def limpiar_precio(precio_str):
-    """Limpia y convierte precios a formato numérico"""
-    if not precio_str:
-        return None
-    try:
-        precio_limpio = precio_str.replace("Bs.", "").replace(" ", "").strip()
-        if ',' in precio_limpio:
-            if '.' in precio_limpio:
-                partes = precio_limpio.split(',')
-                parte_entera = partes[0].replace('.', '')
-                precio_limpio = parte_entera + '.' + partes[1]
-            else:
-                precio_limpio = precio_limpio.replace(',', '.')
-        else:
-            if precio_limpio.count('.') > 1:
-                partes = precio_limpio.split('.')
-                parte_entera = ''.join(partes[:-1])
-                parte_decimal = partes[-1]
-                precio_limpio = parte_entera + '.' + parte_decimal
-        return float(precio_limpio)
-    except Exception as e:
-        print(f"Error limpiando precio '{precio_str}': {e}")
-        return None
-
 def chrome_stealth():
     """Configura opciones de Chrome para evitar detección como bot"""
     opts = Options()
@@ -77,13 +65,31 @@ def chrome_stealth():
     opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
     if PROXY:
         opts.add_argument(f'--proxy-server={PROXY}')
+    if CAPTURA_API:
+        activar_log_red(opts)
     return opts
 
+def preparar_driver(driver, tienda):
+    """Antes de cada visita: bloqueo de recursos de la tienda y log de red limpio"""
+    if BLOQUEAR_RECURSOS:
+        bloquear_recursos(driver, tienda, TIENDAS[tienda])
+    if CAPTURA_API:
+        descartar_log(driver)  # que no se mezclen respuestas de la página anterior
+
+POOL = PoolDrivers(
+    lambda: webdriver.Chrome(service=servicio_chrome(), options=chrome_stealth()),
+    tamano=POOL_TAMANO, max_paginas=POOL_MAX_PAG, limitador=LimitadorHost(INTERVALO_HOST),
+    preparar=preparar_driver)
+
+CACHE_FABRICANTES = CacheFabricantes(RUTA_CACHE_FABRICANTES, ttl_dias=TTL_FABRICANTE)
+
 def retry(func, producto):
     """Implementa reintentos para operaciones frágiles"""
     for i in range(1, INTENTOS + 1):
         try:
-            return func(producto)
+            # Si func falla, el pool descarta ese driver y el siguiente intento usa uno nuevo
+            with POOL.usar() as driver:
+                return func(producto, driver)
         except Exception as e:
             print(f"[RETRY {i}/{INTENTOS}] {func.__name__} – {producto}: {e}")
             if i == INTENTOS:
@@ -92,32 +98,16 @@ def retry(func, producto):
                 time.sleep(RETRY_DELAY)
     return []
 
-def extraer_precio_farmasas(card):
-    """Extrae el precio de un producto de Farmacias SAAS"""
-    try:
-        entero = card.select_one("span.mat-card-title")
-        fraccion = card.select_one("span.mat-small")
-        if entero and fraccion:
-            entero_text = entero.get_text(strip=True).replace("Bs.", "").strip()
-            fraccion_text = fraccion.get_text(strip=True).replace(",", ".")
-            return f"Bs. {entero_text}.{fraccion_text}"
-        elif entero:
-            return f"Bs. {entero.get_text(strip=True).replace('Bs.', '').strip()}"
-    except Exception as e:
-        print(f"Error extrayendo precio: {e}")
-    return None
-
-def extraer_fabricante_farmasas(url_producto, driver):
+def extraer_fabricante_farmasas(url_producto, driver, lanzar=False):
     """Extrae el fabricante de un producto específico de Farmacias SAAS"""
     try:
         print(f"Visitando producto: {url_producto}")
-        driver.get(url_producto)
-        # Esperar a que cargue la información del producto
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "mat-card-content"))
-        )
-        time.sleep(3)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        POOL.visitar(driver, url_producto, "farmasas_detalle")
+        # Esperar a que cargue la información del producto (incluido el bloque FABRICANTE)
+        esperar_listo(driver, TIENDAS["farmasas_detalle"]["listo"], timeout=15,
+                      etiqueta="farmasas_detalle", obligatorio=True)
+        registrar_consumo(driver, "farmasas_detalle")
+        soup = documento(html_raiz(driver, "farmasas_detalle"), "farmasas_detalle")
         
         # Buscar la sección de fabricante
         fabricante = None
@@ -167,76 +157,95 @@ def extraer_fabricante_farmasas(url_producto, driver):
         return fabricante
     except Exception as e:
         print(f"Error extrayendo fabricante de {url_producto}: {str(e)}")
+        if lanzar:
+            raise
         return None
 
+def marcas_desde_nombres(nombres):
+    """Extrae la marca desde el nombre de cada producto (una pasada del diccionario por la lista)"""
+    marcas = []
+    for nombre, marca in zip(nombres, MARCAS.buscar_columna(nombres)):
+        if marca:
+            marca = marca.upper()
+        else:
+            # Intentar extraer última palabra como marca
+            palabras = nombre.lower().split()
+            if len(palabras) > 1 and len(palabras[-1]) <= 6 and palabras[-1].isalpha():
+                marca = palabras[-1].upper()
+        marcas.append(marca)
+    return marcas
+
 def extraer_marca_desde_nombre(nombre):
     """Extrae la marca desde el nombre del producto"""
-    nombre = nombre.lower()
-    # Si termina en "PHARME", es Pharmetique Labs
-    if nombre.endswith("pharme"):
-        return "Pharmetique Labs"
-    # Si termina en "H&M MEDICAL", lo extraemos
-    if "h&m medical" in nombre:
-        return "H&M Medical"
-    # Búsqueda normal en MARCAS_CONOCIDAS
-    for marca in MARCAS_CONOCIDAS:
-        if marca.lower() in nombre:
-            return marca.upper()
-    # Intentar extraer última palabra como marca
-    palabras = nombre.split()
-    if len(palabras) > 1:
-        ultima = palabras[-1]
-        if len(ultima) <= 6 and ultima.isalpha():
-            return ultima.upper()
-    return None
+    return marcas_desde_nombres([nombre])[0]
+
+# ---------------  FICHAS EN PARALELO  ---------------
+def fabricantes_en_paralelo(enlaces):
+    """Visita las fichas con varios drivers del pool y devuelve {enlace: fabricante}.
+
+    Sólo se visitan las fichas que no están en CACHE_FABRICANTES (o que vencieron).
+    La cortesía con el servidor la aplica el LimitadorHost del pool en cada visita.
+    """
+    unicos = list(dict.fromkeys(enlaces))  # sin repetidos, en el orden original
+    fabricantes = {}
+    pendientes = []
+    for enlace in unicos:
+        en_cache, fabricante = CACHE_FABRICANTES.obtener(enlace)
+        if en_cache:
+            fabricantes[enlace] = fabricante
+        else:
+            pendientes.append(enlace)
+    print(f"Fichas en caché: {len(unicos) - len(pendientes)} | por visitar: {len(pendientes)}")
+
+    def visitar(enlace):
+        try:
+            with POOL.usar() as driver:
+                fabricante = extraer_fabricante_farmasas(enlace, driver, lanzar=True)
+        except Exception:
+            return None  # error de carga: no se guarda, se reintenta en la próxima corrida
+        CACHE_FABRICANTES.guardar(enlace, fabricante)
+        return fabricante
+
+    tareas = [("farmasas_detalle", lambda e=e: visitar(e)) for e in pendientes]
+    fabricantes.update(zip(pendientes, ejecutar_en_paralelo(tareas, max_hilos=HILOS_DETALLE)))
+    return fabricantes
 
 # ---------------  SCRAPER ESPECÍFICO PARA FARMACIAS SAAS  ---------------
-def scrap_farmasas(producto):
+def scrap_farmasas(producto, driver):
     """Extrae productos de Farmacias SAAS para el término de búsqueda dado"""
     url = f"{BASE_URL}/buscar/{producto}/0"
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_stealth())
     try:
-        driver.get(url)
+        POOL.visitar(driver, url, "farmasas")
         print(f"Buscando productos de: {producto}")
-        time.sleep(10)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        esperar_listo(driver, TIENDAS["farmasas"]["listo"], timeout=20, etiqueta="farmasas")
+        registrar_consumo(driver, "farmasas")
+        if CAPTURA_API:
+            # El JSON del listado trae el fabricante: sin visitas a las fichas
+            filas_api = filas_por_api(driver, TIENDAS["farmasas"]["api"], "Farmacias SAAS", producto,
+                                      limpiar_precio, GRABAR_API_EN)
+            if filas_api:
+                sin_marca = [fila for fila in filas_api if not fila["Marca"]]
+                for fila, marca in zip(sin_marca, marcas_desde_nombres([f["Nombre"] for f in sin_marca])):
+                    fila["Marca"] = marca
+                return filas_api
+        html = html_raiz(driver, "farmasas")
     except Exception as e:
         driver.save_screenshot(f"farmasas_{producto}.png")
         raise e
     
     fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     filas = []
-    enlaces_productos = []
     
-    # Primero recopilar todos los enlaces de productos
-    contenedores = soup.select("div.contenedor-informacion")
-    print(f"Encontrados {len(contenedores)} contenedores de productos")
+    # Primero recopilar todos los enlaces de productos (parseo_tiendas.py)
+    enlaces_productos = [(nombre, precio, f"{BASE_URL}{enlace}")
+                         for nombre, precio, enlace in tarjetas_farmasas(html)]
     
-    for card in contenedores:
-        try:
-            nombre_elem = card.select_one("mat-card-title.titulo a")
-            if not nombre_elem:
-                continue
-            texto_nombre = nombre_elem.get_text(strip=True)
-            # Extraer precio con la función mejorada
-            precio_text = extraer_precio_farmasas(card)
-            print(f"Precio extraído para {texto_nombre}: {precio_text}")
-            # Guardar el enlace para visitar después
-            enlace_relativo = nombre_elem.get('href')
-            if enlace_relativo:
-                enlace_completo = f"{BASE_URL}{enlace_relativo}"
-                enlaces_productos.append((texto_nombre, precio_text, enlace_completo))
-                print(f"Producto añadido: {texto_nombre}")
-        except Exception as e:
-            print(f"Error procesando tarjeta de producto: {e}")
-            continue
     
-    print(f"Total de enlaces a visitar: {len(enlaces_productos)}")
-    
-    # Ahora visitar cada producto para obtener el fabricante
+    # Ahora visitar los productos en paralelo para obtener el fabricante
+    fabricantes = fabricantes_en_paralelo([enlace for _, _, enlace in enlaces_productos])
     for i, (nombre, precio, enlace) in enumerate(enlaces_productos):
         print(f"Procesando producto {i+1}/{len(enlaces_productos)}: {nombre}")
-        fabricante = extraer_fabricante_farmasas(enlace, driver)
+        fabricante = fabricantes[enlace]
         # Si no encontramos fabricante, intentar extraer marca del nombre
         marca_detectada = None
         if not fabricante:
@@ -249,13 +258,8 @@ def scrap_farmasas(producto):
             "Producto_Buscado": producto,
             "Marca": fabricante or marca_detectada,
             "Nombre": nombre,
-            "Precio": limpiar_precio(precio)
+            "Precio": precio
         })
-        
-        # Esperar entre solicitudes para no sobrecargar el servidor
-        time.sleep(2)
-    
-    driver.quit()
     
     # Eliminar duplicados
     seen = set()
@@ -272,33 +276,45 @@ def scrap_farmasas(producto):
 # ---------------  FUNCIÓN PRINCIPAL  ---------------
 def main():
     """Ejecuta el scraping para todos los productos definidos"""
-    todos = []
-    for prod in PRODUCTOS:
-        print(f"🔍 Buscando '{prod}' en Farmacias SAAS...")
-        data = retry(scrap_farmasas, prod)
-        todos.extend(data)
-        print(f"✅ {prod}: {len(data)} productos encontrados")
-        time.sleep(5)  # Pausa entre búsquedas
+    sumidero = SumideroFilas(RUTA_CORRIDAS)  # retoma la corrida anterior si quedó cortada
+    try:
+        for prod in PRODUCTOS:
+            if sumidero.completado("Farmacias SAAS", prod):
+                continue
+            print(f"🔍 Buscando '{prod}' en Farmacias SAAS...")
+            data = retry(scrap_farmasas, prod)
+            sumidero.agregar("Farmacias SAAS", prod, data)
+            print(f"✅ {prod}: {len(data)} productos encontrados")
+            time.sleep(5)  # Pausa entre búsquedas
+    finally:
+        POOL.cerrar()
+        print(POOL.resumen())
+        print(CACHE_FABRICANTES.resumen())
+        print(resumen_esperas())
+        print(resumen_parseo())
+        print(resumen_consumo())
     
-    if not todos:
+    if not sumidero.cantidad():
         print("❌ No se recuperó ningún producto.")
         return
     
-    print("📊 Creando DataFrame...")
-    df_nuevo = pd.DataFrame(todos).drop_duplicates(subset=["Nombre", "Marca"])
-    
-    # Manejo del archivo Excel
-    if os.path.isfile(RUTA_EXCEL):
-        print("📂 Leyendo Excel existente...")
-        df_existente = pd.read_excel(RUTA_EXCEL)
-        df_final = pd.concat([df_existente, df_nuevo], ignore_index=True)
+    # El histórico una sola vez: si lo que sigue falla, al retomar se salta
+    if sumidero.guardada:
+        print(f"♻️ Corrida {sumidero.clave} ya guardada en el histórico")
     else:
-        print("📂 Creando Excel nuevo...")
-        df_final = df_nuevo
-    
-    print("💾 Guardando Excel...")
-    df_final.to_excel(RUTA_EXCEL, index=False)
-    print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_EXCEL}")
+        print("📊 Creando DataFrame...")
+        df_nuevo = pd.DataFrame(list(sumidero.filas())).drop_duplicates(subset=["Nombre", "Marca"])
+        df_nuevo["Precio"] = precios_columna(df_nuevo["Precio"])
+        print(resumen_precios())
+
+        # Histórico en Parquet: sólo se escriben los archivos de esta corrida
+        archivos = guardar_corrida(df_nuevo, RUTA_HISTORIAL, sello=sumidero.clave)
+        print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_HISTORIAL} ({archivos} archivos)")
+        sumidero.marcar_guardada()
+    if EXPORTAR_EXCEL:
+        print("💾 Exportando Excel...")
+        exportar_excel(RUTA_EXCEL, RUTA_HISTORIAL)
+    sumidero.terminar()
 
 # ---------------  EJECUCIÓN  ---------------
 if __name__ == "__main__":
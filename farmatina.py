@@ -1,106 +1,113 @@
 #farmatina.py
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from bs4 import BeautifulSoup
 import time
 import csv
 from datetime import datetime
-
-# Ruta al chromedriver
-service = Service(r"C:\Users\sisa4\Downloads\chromedriver-win64\chromedriver-win64\chromedriver.exe")
-
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")
-driver = webdriver.Chrome(service=service, options=options)
+from chromedriver_cache import servicio_chrome
+from esperas import esperar_listo, resumen_esperas, cantidad_aumenta
+from tiendas import TIENDAS
+from recursos import bloquear_recursos, registrar_consumo, resumen_consumo
+from http_fetch import ClienteHTTP
+from paginacion import paginas_woocommerce
+from parseo import html_raiz, resumen_parseo
+from parseo_tiendas import productos_farmatina
+from marcas import diccionario
 
 # Definir el término de búsqueda (esto es lo que quieres como nombre_propducto)
 termino_busqueda = "Diclofenac"
-url = f"https://farmatina.com/?s={termino_busqueda}&post_type=product&dgwt_wcas=1"
-driver.get(url)
-time.sleep(5)
-
-# Cargar todos los productos haciendo clic en "CARGA MÁS..."
-max_attempts = 5  # Evitar bucle infinito
-attempts = 0
-
-while attempts < max_attempts:
+PAGINAS_MAX = 20          # tope de páginas /page/N/ por búsqueda
+PAGINAS_EN_PARALELO = 3
+url = TIENDAS["farmatina"]["url_busqueda"].format(termino_busqueda)
+
+def html_con_navegador():
+    """Respaldo: Chrome con clics en "CARGA MÁS..." cuando HTTP no alcanza"""
+    # Chromedriver resuelto una sola vez y cacheado (ver chromedriver_cache.py)
+    service = servicio_chrome()
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    driver = webdriver.Chrome(service=service, options=options)
+    bloquear_recursos(driver, "farmatina", TIENDAS["farmatina"])  # sin imágenes/fuentes/trackers
     try:
-        # Buscar el botón EN CADA ITERACIÓN (esto es crucial)
-        load_more_button = driver.find_element(By.CSS_SELECTOR, "a.nasa-archive-loadmore")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_more_button)
-        time.sleep(1)
+        driver.get(url)
+        esperar_listo(driver, TIENDAS["farmatina"]["listo"], timeout=10, etiqueta="farmatina")
+
+        # Cargar todos los productos haciendo clic en "CARGA MÁS..."
+        max_attempts = 5  # Evitar bucle infinito
+        attempts = 0
+
+        while attempts < max_attempts:
+            try:
+                # Buscar el botón EN CADA ITERACIÓN (esto es crucial)
+                load_more_button = driver.find_element(By.CSS_SELECTOR, "a.nasa-archive-loadmore")
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_more_button)
+                time.sleep(1)
         
-        # Intentar hacer clic
-        driver.execute_script("arguments[0].click();", load_more_button)
+                # Intentar hacer clic
+                driver.execute_script("arguments[0].click();", load_more_button)
         
-        # Esperar a que se carguen nuevos productos
-        time.sleep(3)
+                # Esperar a que se carguen nuevos productos (sale apenas aparecen)
+                esperar_listo(driver, cantidad_aumenta("li.product-warp-item"), timeout=6, etiqueta="farmatina_carga")
         
-        # Verificar si realmente se cargaron más productos
-        current_count = len(driver.find_elements(By.CSS_SELECTOR, "li.product-warp-item"))
-        print(f"Productos después de cargar más: {current_count}")
+                # Verificar si realmente se cargaron más productos
+                current_count = len(driver.find_elements(By.CSS_SELECTOR, "li.product-warp-item"))
+                print(f"Productos después de cargar más: {current_count}")
         
-        attempts = 0  # Reiniciar contador si fue exitoso
-    except (NoSuchElementException, StaleElementReferenceException):
-        attempts += 1
-        print(f"Intento {attempts} de {max_attempts} - No se encontró el botón 'CARGA MÁS...'")
-        time.sleep(1)
+                attempts = 0  # Reiniciar contador si fue exitoso
+            except (NoSuchElementException, StaleElementReferenceException):
+                attempts += 1
+                print(f"Intento {attempts} de {max_attempts} - No se encontró el botón 'CARGA MÁS...'")
+                time.sleep(1)
         
-        # Si no hay más intentos, salir del bucle
-        if attempts >= max_attempts:
-            print("No se encontró más el botón 'CARGA MÁS...' o se alcanzó el límite de intentos")
-            break
+                # Si no hay más intentos, salir del bucle
+                if attempts >= max_attempts:
+                    print("No se encontró más el botón 'CARGA MÁS...' o se alcanzó el límite de intentos")
+                    break
 
-# Obtener HTML final
-html = driver.page_source
-soup = BeautifulSoup(html, "html.parser")
+        # Obtener HTML final
+        registrar_consumo(driver, "farmatina")
+        return html_raiz(driver, "farmatina")
+    finally:
+        driver.quit()
 
-# Extraer productos
-productos = soup.find_all("li", class_="product-warp-item")
+# WooCommerce renderiza en servidor: páginas /page/N/ por HTTP en paralelo, Chrome sólo de respaldo
+cliente = ClienteHTTP()
+paginas = paginas_woocommerce(cliente, url, TIENDAS["farmatina"], html_con_navegador,
+                              PAGINAS_MAX, PAGINAS_EN_PARALELO)
+
+# Extraer productos (en el orden de las páginas)
+productos = [p for html in paginas for p in productos_farmatina(html)]
 
 print(f"Total de productos encontrados: {len(productos)}")
 
-# Lista de marcas conocidas (puedes ampliarla con el tiempo)
-marcas_conocidas = {
-    "Coaspharma", "Kmplus", "Genven", "Distrilab", "Calox", "La Sante", "Spefar", "DAC55",
-    "Megalabs", "Dollder", "Siegfried", "Cofasa", "Lab Farma", "Drotafarma", "Oftalmi",
-    "Valmorca", "Leti", "Biotech", "Vivax", "Elmor", "Ponce", "Roemmers", "Oftamil",
-    "Pharmetique", "Novartis", "Bioglass", "Tiares", "Plusandex", "Dac55", "Bioglass",
-    "Voltaren"  
-}
+# Marcas conocidas: grupo "farmatina" de marcas.csv (puedes ampliarlo con el tiempo)
+marcas_conocidas = diccionario("farmatina")
 
 def extraer_marca(nombre):
-    nombre_limpio = nombre.strip()
-    palabras = nombre_limpio.split()
-    for palabra in palabras:
-        if palabra in marcas_conocidas:
-            return palabra
-    return "Desconocida"
+    return marcas_conocidas.buscar(nombre) or "Desconocida"
 
 # --- Extraer y mostrar productos con marca ---
 resultados = []
+vistos = set()  # un producto puede repetirse entre páginas
 
 # Obtener la fecha actual en formato YYYY-MM-DD
 fecha_extraccion = datetime.now().strftime("%Y-%m-%d")
 
-for producto in productos:
-    nombre = producto.find("a", class_="woocommerce-loop-product__title")
-    precio = producto.find("span", class_="woocommerce-Price-amount")
-
-    if nombre and precio:
-        nombre_texto = nombre.text.strip()
-        precio_texto = precio.text.strip()
-        marca = extraer_marca(nombre_texto)
+for nombre_texto, precio_texto in productos:
+    marca = extraer_marca(nombre_texto)
+    if (nombre_texto, precio_texto) in vistos:
+        continue
+    vistos.add((nombre_texto, precio_texto))
 
-        resultados.append({
-            "Producto": nombre_texto,
-            "Precio": precio_texto,
-            "Marca": marca,
-            "Fecha_Extraccion": fecha_extraccion,
-            "nombre_propducto": termino_busqueda  # Nuevo campo solicitado
-        })
+    resultados.append({
+        "Producto": nombre_texto,
+        "Precio": precio_texto,
+        "Marca": marca,
+        "Fecha_Extraccion": fecha_extraccion,
+        "nombre_propducto": termino_busqueda  # Nuevo campo solicitado
+    })
 
 # --- Mostrar resultados ---
 for r in resultados:
@@ -128,5 +135,8 @@ with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
 print(f"\nResultados guardados exitosamente en: {csv_path}")
 print(f"Total de productos guardados: {len(resultados)}")
 print(f"Todos los productos están relacionados con el término de búsqueda: {termino_busqueda}")
-
-driver.quit()
\ No newline at end of file
+print(resumen_esperas())
+print(resumen_parseo())
+print(resumen_consumo())
+print(cliente.resumen())
+cliente.cerrar()
\ No newline at end of file
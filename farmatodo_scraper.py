@@ -1,50 +1,48 @@
 # farmatodo_scraper.py
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
 import pandas as pd
 import time, os, traceback
 from datetime import datetime
+from driver_pool import PoolDrivers
+from chromedriver_cache import servicio_chrome
+from esperas import esperar_listo, resumen_esperas, cantidad_aumenta
+from tiendas import TIENDAS
+from captura_api import activar_log_red, descartar_log, filas_por_api
+from paginacion import filas_algolia
+from http_fetch import ClienteHTTP
+from parseo import documento, html_raiz, resumen_parseo
+from extraccion import campos_desde_doc, campos_en_navegador
+from recursos import bloquear_recursos, registrar_consumo, resumen_consumo
+from historial import guardar_corrida, exportar_excel
+from sumidero import SumideroFilas
+from precios import limpiar_precio, precios_columna, resumen_precios
 
 # Configuración específica para Farmatodo
 RUTA_EXCEL = os.path.join(os.getcwd(), "consolidado_farmatodo.xlsx")
+RUTA_HISTORIAL = os.path.join(os.path.dirname(RUTA_EXCEL), "historial_farmatodo")  # Parquet por fecha/Origen
+EXPORTAR_EXCEL = False   # True = regenerar RUTA_EXCEL desde el histórico al terminar
+RUTA_CORRIDAS = os.path.join(os.getcwd(), "corridas_farmatodo")  # filas en JSONL + punto de control por corrida
 HEADLESS = True
 PRODUCTOS = ["Diclofenac", "Paracetamol", "Ibuprofeno", "Loratadina"]
 PROXY = None
+BLOQUEAR_RECURSOS = True  # imágenes, fuentes, media y trackers (ver recursos.py)
+CAPTURA_API = False  # filas desde el JSON de la tienda (CDP) en vez de parsear HTML; activar tras grabar y revisar (tests/fixtures/api)
+GRABAR_API_EN = None  # carpeta para guardar las respuestas y reproducirlas offline
+PAGINADO_DIRECTO = True  # páginas pedidas a la API de búsqueda (Algolia) en vez de pulsar "Cargar más"; no depende de CAPTURA_API
+PAGINAS_MAX = 20         # tope de páginas por término (incluye la primera)
+PAGINAS_EN_PARALELO = 3
+EXTRACCION_EN_NAVEGADOR = True  # tarjetas leídas con un execute_script en vez de page_source + parseo
 INTENTOS = 2
 RETRY_DELAY = 10
+POOL_TAMANO = 1     # navegadores Chrome que se mantienen abiertos
+POOL_MAX_PAG = 40   # páginas por navegador antes de reciclarlo
 URL_BASE = "https://www.farmatodo.com.ve/buscar?product={}&departamento=Todos&filtros="
 
 # ---------------  FUNCIONES DE APOYO  ---------------
-def limpiar_precio(precio_str):
-    """Limpia y convierte precios a formato numérico"""
-    if not precio_str:
-        return None
-    try:
-        precio_limpio = precio_str.replace("Bs.", "").replace(" ", "").strip()
-        if ',' in precio_limpio:
-            if '.' in precio_limpio:
-                partes = precio_limpio.split(',')
-                parte_entera = partes[0].replace('.', '')
-                precio_limpio = parte_entera + '.' + partes[1]
-            else:
-                precio_limpio = precio_limpio.replace(',', '.')
-        else:
-            if precio_limpio.count('.') > 1:
-                partes = precio_limpio.split('.')
-                parte_entera = ''.join(partes[:-1])
-                parte_decimal = partes[-1]
-                precio_limpio = parte_entera + '.' + parte_decimal
-        return float(precio_limpio)
-    except Exception as e:
-        print(f"Error limpiando precio '{precio_str}': {e}")
-        return None
-
 def chrome_stealth():
     """Configura opciones de Chrome para evitar detección como bot"""
     opts = Options()
@@ -61,13 +59,43 @@ def chrome_stealth():
     opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
     if PROXY:
         opts.add_argument(f'--proxy-server={PROXY}')
+    if CAPTURA_API or PAGINADO_DIRECTO:
+        activar_log_red(opts)  # el paginado directo lee del log la consulta de búsqueda
     return opts
 
+def preparar_driver(driver, tienda):
+    """Antes de cada visita: bloqueo de recursos de la tienda y log de red limpio"""
+    if BLOQUEAR_RECURSOS:
+        bloquear_recursos(driver, tienda, TIENDAS[tienda])
+    if CAPTURA_API or PAGINADO_DIRECTO:
+        descartar_log(driver)  # que no se mezclen respuestas de la página anterior
+
+POOL = PoolDrivers(
+    lambda: webdriver.Chrome(service=servicio_chrome(), options=chrome_stealth()),
+    tamano=POOL_TAMANO, max_paginas=POOL_MAX_PAG, preparar=preparar_driver)
+
+HTTP = ClienteHTTP(proxy=PROXY)
+
+def filas_paginadas(driver, producto):
+    """Primera página desde el navegador; el resto repitiendo por HTTP la consulta Algolia capturada.
+
+    Devuelve (filas, capturas de la primera página). Si no se pudo capturar la consulta,
+    las filas vienen vacías y se sigue con "Cargar más" sin perder lo ya leído del log.
+    """
+    esperar_listo(driver, TIENDAS["farmatodo"]["listo"], timeout=15, etiqueta="farmatodo")
+    filas, primeras = filas_algolia(driver, HTTP, TIENDAS["farmatodo"]["api"], "farmatodo", producto,
+                                    limpiar_precio, PAGINAS_MAX, PAGINAS_EN_PARALELO, GRABAR_API_EN)
+    if filas:
+        registrar_consumo(driver, "farmatodo")  # si no, se registra al terminar "Cargar más"
+    return filas, primeras
+
 def retry(func, producto):
     """Implementa reintentos para operaciones frágiles"""
     for i in range(1, INTENTOS + 1):
         try:
-            return func(producto)
+            # Si func falla, el pool descarta ese driver y el siguiente intento usa uno nuevo
+            with POOL.usar() as driver:
+                return func(producto, driver)
         except Exception as e:
             print(f"[RETRY {i}/{INTENTOS}] {func.__name__} – {producto}: {e}")
             if i == INTENTOS:
@@ -77,12 +105,11 @@ def retry(func, producto):
     return []
 
 # ---------------  SCRAPER ESPECÍFICO PARA FARMATODO  ---------------
-def scrap_farmatodo(producto):
+def scrap_farmatodo(producto, driver):
     """Extrae productos de Farmatodo para el término de búsqueda dado"""
     url = URL_BASE.format(producto)
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_stealth())
     try:
-        driver.get(url)
+        POOL.visitar(driver, url, "farmatodo")
         print(f"⏳ Cargando página para {producto}...")
         
         # Esperar a que se cargue el contenedor de productos
@@ -90,6 +117,12 @@ def scrap_farmatodo(producto):
             EC.presence_of_element_located((By.CSS_SELECTOR, "div.cont-group-view"))
         )
         
+        primeras = []
+        if PAGINADO_DIRECTO:
+            filas_api, primeras = filas_paginadas(driver, producto)
+            if filas_api:
+                return filas_api
+        
         # Variable para controlar si hay más productos para cargar
         intentos_maximos = 10
         intentos = 0
@@ -113,7 +146,7 @@ def scrap_farmatodo(producto):
                     if intentos > 2:  # Dar un par de intentos antes de rendirse
                         print("🔍 No se están cargando más productos, finalizando...")
                         break
-                    time.sleep(2)
+                    esperar_listo(driver, cantidad_aumenta("div.card-ftd"), timeout=2, etiqueta="farmatodo_carga")
                     intentos += 1
                     continue
                 
@@ -133,21 +166,20 @@ def scrap_farmatodo(producto):
                             boton_cargando = True
                             
                             # Desplazarse hasta el botón
-                            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", load_more_button)
-                            time.sleep(1)
+                            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_more_button)
                             
                             # Hacer clic en el botón usando JavaScript
                             driver.execute_script("arguments[0].click();", load_more_button)
                             print(f"✅ Clic #{intentos + 1} en 'Cargar más'")
                             intentos += 1
                             
-                            # Esperar a que carguen los nuevos productos
-                            time.sleep(3)
+                            # Esperar a que carguen los nuevos productos (sale apenas aparecen)
+                            esperar_listo(driver, cantidad_aumenta("div.card-ftd"), timeout=6, etiqueta="farmatodo_carga")
                         else:
                             print("ℹ️ Botón 'Cargar más' encontrado pero está deshabilitado")
                             boton_cargando = False
                             # Dar un momento adicional para ver si hay carga automática
-                            time.sleep(2)
+                            esperar_listo(driver, cantidad_aumenta("div.card-ftd"), timeout=2, etiqueta="farmatodo_carga")
                             continue
                     else:
                         print("ℹ️ Botón 'Cargar más' no visible")
@@ -156,7 +188,7 @@ def scrap_farmatodo(producto):
                     print(f"🔍 No se encontró el botón 'Cargar más' (posiblemente ya no hay más productos): {str(e)}")
                     boton_cargando = False
                     # Esperar un momento para ver si hay carga automática
-                    time.sleep(2)
+                    esperar_listo(driver, cantidad_aumenta("div.card-ftd"), timeout=2, etiqueta="farmatodo_carga")
                 
                 # Verificar si hay nuevos productos
                 nuevos_productos = len(driver.find_elements(By.CSS_SELECTOR, "div.card-ftd"))
@@ -171,34 +203,39 @@ def scrap_farmatodo(producto):
                 print(f"⚠️ Error durante el proceso de carga: {str(e)}")
                 break
         
-        # Esperar un momento adicional para que se carguen los últimos productos
-        time.sleep(3)
+        # Esperar a que se estabilicen los últimos productos
+        esperar_listo(driver, TIENDAS["farmatodo"]["listo"], timeout=5, etiqueta="farmatodo")
+        registrar_consumo(driver, "farmatodo")
+        if CAPTURA_API:
+            # Filas desde el JSON de búsqueda; si no se capturó nada, se sigue con el HTML
+            filas_api = filas_por_api(driver, TIENDAS["farmatodo"]["api"], "farmatodo", producto,
+                                      limpiar_precio, GRABAR_API_EN, previas=primeras)
+            if filas_api:
+                return filas_api
         
-        # Obtener el HTML después de cargar todos los productos
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        print(f"✅ HTML obtenido con {len(soup.find_all('div', class_='card-ftd'))} tarjetas de producto")
+        # Tarjetas después de cargar todos los productos (mismo mapa de campos en ambos modos)
+        if EXTRACCION_EN_NAVEGADOR:
+            tarjetas = campos_en_navegador(driver, "farmatodo")
+        else:
+            tarjetas = campos_desde_doc(documento(html_raiz(driver, "farmatodo"), "farmatodo"), "farmatodo")
+        print(f"✅ Obtenidas {len(tarjetas)} tarjetas de producto")
     except Exception as e:
         driver.save_screenshot(f"farmatodo_{producto}_error.png")
         raise e
-    finally:
-        driver.quit()
     
     # Procesar los productos
     fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     filas = []
-    for card in soup.find_all("div", class_=lambda x: x and "card-ftd" in x.split()):
-        marca = card.find("p", class_="text-brand")
-        nombre = card.find("p", class_="text-title")
-        precio = card.find("span", class_="price__text-price")
-        if not nombre:
+    for card in tarjetas:
+        if card["Nombre"] is None:
             continue
         filas.append({
             "Fecha_Hora": fecha,
             "Origen": "farmatodo",
             "Producto_Buscado": producto,
-            "Marca": marca.get_text(strip=True) if marca else None,
-            "Nombre": nombre.get_text(strip=True),
-            "Precio": limpiar_precio(precio.get_text(strip=True) if precio else None)
+            "Marca": card["Marca"],
+            "Nombre": card["Nombre"],
+            "Precio": card["Precio"]
         })
     
     # Eliminar duplicados (mejorada para manejar casos específicos)
@@ -220,33 +257,46 @@ def scrap_farmatodo(producto):
 # ---------------  FUNCIÓN PRINCIPAL  ---------------
 def main():
     """Ejecuta el scraping para todos los productos definidos"""
-    todos = []
-    for prod in PRODUCTOS:
-        print(f"🔍 Buscando '{prod}' en Farmatodo...")
-        data = retry(scrap_farmatodo, prod)
-        todos.extend(data)
-        print(f"✅ {prod}: {len(data)} productos encontrados")
-        time.sleep(5)  # Pausa entre búsquedas
+    sumidero = SumideroFilas(RUTA_CORRIDAS)  # retoma la corrida anterior si quedó cortada
+    try:
+        for prod in PRODUCTOS:
+            if sumidero.completado("Farmatodo", prod):
+                continue
+            print(f"🔍 Buscando '{prod}' en Farmatodo...")
+            data = retry(scrap_farmatodo, prod)
+            sumidero.agregar("Farmatodo", prod, data)
+            print(f"✅ {prod}: {len(data)} productos encontrados")
+            time.sleep(5)  # Pausa entre búsquedas
+    finally:
+        POOL.cerrar()
+        HTTP.cerrar()
+        print(POOL.resumen())
+        print(HTTP.resumen())
+        print(resumen_esperas())
+        print(resumen_parseo())
+        print(resumen_consumo())
     
-    if not todos:
+    if not sumidero.cantidad():
         print("❌ No se recuperó ningún producto.")
         return
     
-    print("📊 Creando DataFrame...")
-    df_nuevo = pd.DataFrame(todos).drop_duplicates(subset=["Nombre", "Marca"])
-    
-    # Manejo del archivo Excel
-    if os.path.isfile(RUTA_EXCEL):
-        print("📂 Leyendo Excel existente...")
-        df_existente = pd.read_excel(RUTA_EXCEL)
-        df_final = pd.concat([df_existente, df_nuevo], ignore_index=True)
+    # El histórico una sola vez: si lo que sigue falla, al retomar se salta
+    if sumidero.guardada:
+        print(f"♻️ Corrida {sumidero.clave} ya guardada en el histórico")
     else:
-        print("📂 Creando Excel nuevo...")
-        df_final = df_nuevo
-    
-    print("💾 Guardando Excel...")
-    df_final.to_excel(RUTA_EXCEL, index=False)
-    print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_EXCEL}")
+        print("📊 Creando DataFrame...")
+        df_nuevo = pd.DataFrame(list(sumidero.filas())).drop_duplicates(subset=["Nombre", "Marca"])
+        df_nuevo["Precio"] = precios_columna(df_nuevo["Precio"])
+        print(resumen_precios())
+
+        # Histórico en Parquet: sólo se escriben los archivos de esta corrida
+        archivos = guardar_corrida(df_nuevo, RUTA_HISTORIAL, sello=sumidero.clave)
+        print(f"✅ {len(df_nuevo)} registros agregados → {RUTA_HISTORIAL} ({archivos} archivos)")
+        sumidero.marcar_guardada()
+    if EXPORTAR_EXCEL:
+        print("💾 Exportando Excel...")
+        exportar_excel(RUTA_EXCEL, RUTA_HISTORIAL)
+    sumidero.terminar()
 
 # ---------------  EJECUCIÓN  ---------------
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+#historial.py
+# Histórico de precios en Parquet, particionado por fecha y Origen (estilo Hive):
+#   historial/fecha=2025-03-01/Origen=Farmatodo/corrida-20250301T101500-0.parquet
+# Cada corrida sólo escribe sus archivos nuevos: no se vuelve a leer ni reescribir lo
+# anterior. Los archivos se escriben en una carpeta oculta (".corrida-...") y al final se
+# mueven a su partición con os.replace, así que un corte a mitad no deja nada a medias
+# (las lecturas ignoran lo que empieza con "." o "_").
+# Las lecturas filtran por partición (sólo abren las fechas/tiendas pedidas) y por columna.
+# _productos.parquet (normaliza.py) guarda un producto por (Nombre, Marca) con sus columnas
+# normalizadas e id_producto; la exportación las vuelve a unir a cada fila.
+# _productos_archivos.json anota qué archivos del histórico ya pasaron por la tabla: la
+# normalización siguiente lee sólo los nuevos.
+# El Excel pasa a ser una exportación a pedido:
+#
+#   python historial.py exportar salida.xlsx [--desde 2025-03-01] [--hasta ...] [--origen Farmatodo]
+#   python historial.py importar consolidado_farmacias.xlsx      (migra un Excel viejo, una vez)
+# ---------------  MÓDULOS  ---------------
+from datetime import datetime
+import argparse, glob, json, os, shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+RUTA_HISTORIAL = os.path.join(os.getcwd(), "historial_precios")
+PARTICIONES = pa.schema([("fecha", pa.string()), ("Origen", pa.string())])
+# Tipos fijos: una corrida con la columna toda vacía no cambia el esquema del histórico
+COLUMNAS = {"Fecha_Hora": pa.string(), "Producto_Buscado": pa.string(), "Marca": pa.string(),
+            "Nombre": pa.string(), "Precio": pa.float64()}
+PRODUCTOS = "_productos.parquet"   # "_": las lecturas del histórico no lo toman como partición
+ARCHIVOS_PRODUCTOS = "_productos_archivos.json"   # archivos ya incorporados a la tabla de productos
+
+def _particionado():
+    return ds.partitioning(PARTICIONES, flavor="hive")
+
+def _tabla(df):
+    """Tabla Arrow con los tipos de COLUMNAS (las columnas extra se guardan como texto)"""
+    df = df.copy()
+    df["fecha"] = pd.to_datetime(df["Fecha_Hora"]).dt.strftime("%Y-%m-%d")
+    tipos = dict(COLUMNAS, fecha=pa.string(), Origen=pa.string())
+    campos = [pa.field(c, tipos.get(c, pa.string())) for c in df.columns]
+    for campo in campos:
+        if campo.type == pa.string():
+            df[campo.name] = df[campo.name].astype("string")
+    df["Precio"] = pd.to_numeric(df["Precio"], errors="coerce")
+    return pa.Table.from_pandas(df, schema=pa.schema(campos), preserve_index=False)
+
+# ---------------  ESCRITURA  ---------------
+def guardar_corrida(df, ruta=RUTA_HISTORIAL, sello=None):
+    """Agrega las filas de una corrida como archivos nuevos en sus particiones; devuelve cuántos.
+
+    `sello` (p. ej. la clave del sumidero) nombra los archivos: guardar otra vez la misma
+    corrida con el mismo sello reemplaza sus archivos en vez de sumar otros.
+    """
+    if df.empty:
+        return 0
+    sello = sello or datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    temporal = os.path.join(ruta, f".corrida-{sello}")
+    shutil.rmtree(temporal, ignore_errors=True)   # restos de un intento cortado
+    ds.write_dataset(_tabla(df), temporal, format="parquet", partitioning=_particionado(),
+                     basename_template=f"corrida-{sello}-{{i}}.parquet")
+    # Un intento anterior con el mismo sello (fecha=*/Origen=*/corrida-{sello}-*) sale entero
+    for previo in glob.glob(os.path.join(glob.escape(ruta), "*", "*", f"corrida-{glob.escape(sello)}-*.parquet")):
+        os.remove(previo)
+    archivos = 0
+    for carpeta, _, nombres in os.walk(temporal):
+        destino = os.path.join(ruta, os.path.relpath(carpeta, temporal))
+        for nombre in nombres:
+            os.makedirs(destino, exist_ok=True)
+            os.replace(os.path.join(carpeta, nombre), os.path.join(destino, nombre))
+            archivos += 1
+    shutil.rmtree(temporal, ignore_errors=True)
+    return archivos
+
+def importar_excel(ruta_excel, ruta=RUTA_HISTORIAL):
+    """Pasa un consolidado en Excel al histórico (migración inicial)"""
+    return guardar_corrida(pd.read_excel(ruta_excel), ruta)
+
+# ---------------  LECTURA  ---------------
+def _filtro(desde=None, hasta=None, origenes=None):
+    condiciones = []
+    if desde:
+        condiciones.append(ds.field("fecha") >= str(desde))
+    if hasta:
+        condiciones.append(ds.field("fecha") <= str(hasta))
+    if origenes:
+        condiciones.append(ds.field("Origen").isin(list(origenes)))
+    filtro = None
+    for condicion in condiciones:
+        filtro = condicion if filtro is None else filtro & condicion
+    return filtro
+
+def archivos_historial(ruta=RUTA_HISTORIAL):
+    """Archivos del histórico, relativos a `ruta` (sin los que empiezan con "." o "_")"""
+    if not os.path.isdir(ruta):
+        return []
+    dataset = ds.dataset(ruta, format="parquet", partitioning=_particionado())
+    return sorted(os.path.relpath(f, ruta) for f in dataset.files)
+
+def leer_historial(ruta=RUTA_HISTORIAL, columnas=None, desde=None, hasta=None, origenes=None, archivos=None):
+    """DataFrame con las `columnas` pedidas (todas si None) de las fechas/tiendas indicadas.
+
+    `desde`/`hasta` son fechas "YYYY-MM-DD" inclusivas; `origenes` una lista de Origen.
+    Los filtros recortan particiones enteras: sólo se abren los archivos que entran.
+    `archivos` (relativos a `ruta`, como los da archivos_historial) limita la lectura a esos.
+    """
+    if not os.path.isdir(ruta) or archivos is not None and not archivos:
+        return pd.DataFrame(columns=columnas or ["Fecha_Hora", "Origen", *COLUMNAS])
+    if archivos is not None:
+        dataset = ds.dataset([os.path.join(ruta, a) for a in archivos], format="parquet",
+                             partitioning=_particionado(), partition_base_dir=str(ruta))
+    else:
+        dataset = ds.dataset(ruta, format="parquet", partitioning=_particionado())
+    return dataset.to_table(columns=columnas, filter=_filtro(desde, hasta, origenes)).to_pandas()
+
+def leer_productos(ruta=RUTA_HISTORIAL):
+    """Tabla de productos normalizados (vacía si normaliza.py todavía no corrió)"""
+    archivo = os.path.join(ruta, PRODUCTOS)
+    return pd.read_parquet(archivo) if os.path.isfile(archivo) else pd.DataFrame(columns=["Nombre", "Marca"])
+
+def archivos_productos(ruta=RUTA_HISTORIAL):
+    """Archivos del histórico ya incorporados a la tabla de productos"""
+    try:
+        with open(os.path.join(ruta, ARCHIVOS_PRODUCTOS), encoding="utf-8") as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+def guardar_productos(df, ruta=RUTA_HISTORIAL, archivos=None):
+    """Reemplaza la tabla de productos (uno por Nombre y Marca) sin dejarla a medias.
+
+    `archivos` (si se pasa) reemplaza la lista de archivos incorporados; se escribe después
+    de la tabla, así que un corte entre ambas sólo hace releer esos archivos. Con df=None
+    sólo se actualiza la lista.
+    """
+    os.makedirs(ruta, exist_ok=True)
+    if df is not None:
+        temporal = os.path.join(ruta, f".{PRODUCTOS}.tmp")
+        df.drop_duplicates(["Nombre", "Marca"], keep="last").to_parquet(temporal, index=False)
+        os.replace(temporal, os.path.join(ruta, PRODUCTOS))
+    if archivos is not None:
+        temporal = os.path.join(ruta, f".{ARCHIVOS_PRODUCTOS}.tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(sorted(archivos), f, ensure_ascii=False, indent=0)
+        os.replace(temporal, os.path.join(ruta, ARCHIVOS_PRODUCTOS))
+
+def exportar_excel(ruta_excel, ruta=RUTA_HISTORIAL, **filtros):
+    """Escribe a Excel (sin la columna de partición fecha) lo que devuelve leer_historial,
+    con las columnas normalizadas e id_producto de cada producto"""
+    df = leer_historial(ruta, **filtros).drop(columns=["fecha"], errors="ignore")
+    productos = leer_productos(ruta)
+    if len(productos):
+        # Un Excel viejo importado puede traer estas columnas: manda la tabla de productos
+        df = (df.drop(columns=[c for c in productos if c not in ("Nombre", "Marca")], errors="ignore")
+                .merge(productos, on=["Nombre", "Marca"], how="left"))
+    primeras = [c for c in ("Fecha_Hora", "Origen") if c in df]
+    df = df[primeras + [c for c in df if c not in primeras]].sort_values("Fecha_Hora", kind="stable")
+    df.to_excel(ruta_excel, index=False)
+    return len(df)
+
+# ---------------  EJECUCIÓN  ---------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Histórico de precios en Parquet")
+    parser.add_argument("accion", choices=["exportar", "importar"])
+    parser.add_argument("excel")
+    parser.add_argument("--historial", default=RUTA_HISTORIAL)
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--origen", action="append")
+    args = parser.parse_args()
+    if args.accion == "importar":
+        print(f"✅ {importar_excel(args.excel, args.historial)} archivos escritos en {args.historial}")
+    else:
+        filas = exportar_excel(args.excel, args.historial, desde=args.desde, hasta=args.hasta,
+                               origenes=args.origen)
+        print(f"✅ {filas} filas exportadas → {args.excel}")
@@ -0,0 +1,91 @@
+#http_fetch.py
+# Motor de descarga por HTTP plano para tiendas que renderizan en servidor
+# (FarmaGo/Odoo, Farmatina y Farmadon/WooCommerce). Chrome queda sólo de respaldo.
+# ---------------  MÓDULOS  ---------------
+import requests
+from requests.adapters import HTTPAdapter
+import threading, time
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
+
+# ---------------  CLIENTE  ---------------
+class ClienteHTTP:
+    """Sesión requests con keep-alive, gzip y pool de conexiones reutilizables.
+
+    `obtener_html` intenta primero por HTTP y sólo cae al navegador (`respaldo`)
+    cuando la respuesta no trae el marcado esperado de la tienda.
+    """
+
+    def __init__(self, proxy=None, timeout=20, conexiones=10, limitador=None):
+        self.timeout = timeout
+        self.limitador = limitador    # LimitadorHost opcional, el mismo que usa el pool de drivers
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=1)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "es-VE,es;q=0.9",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        if proxy:
+            self.sesion.proxies.update({"http": proxy, "https": proxy})
+        self._lock = threading.Lock()
+        self.por_http = 0
+        self.por_navegador = 0
+        self.solicitudes = 0
+        self.segundos_http = 0.0
+
+    def get(self, url, **kwargs):
+        if self.limitador:
+            self.limitador.esperar(url)
+        inicio = time.monotonic()
+        r = self.sesion.get(url, timeout=self.timeout, **kwargs)
+        r.raise_for_status()
+        with self._lock:
+            self.solicitudes += 1
+            self.segundos_http += time.monotonic() - inicio
+        return r.text
+
+    def post_json(self, url, cuerpo, headers=None):
+        """POST con cuerpo ya serializado; devuelve el JSON de la respuesta"""
+        if self.limitador:
+            self.limitador.esperar(url)
+        inicio = time.monotonic()
+        r = self.sesion.post(url, data=cuerpo, headers=headers, timeout=self.timeout)
+        r.raise_for_status()
+        with self._lock:
+            self.solicitudes += 1
+            self.segundos_http += time.monotonic() - inicio
+        return r.json()
+
+    def obtener_html(self, url, config_tienda, respaldo):
+        """HTML de `url`: por HTTP si la tienda lo habilita y el marcado está completo;
+        si no, llama a `respaldo()` (función que trae el HTML con el navegador)."""
+        config = config_tienda.get("http")
+        if config:
+            try:
+                html = self.get(url)
+                if config["marcador"] not in html:
+                    print(f"ℹ️ HTTP sin marcado de productos en {url}, usando navegador")
+                elif config.get("incompleto") and config["incompleto"] in html:
+                    print(f"ℹ️ HTTP devolvió resultados parciales en {url}, usando navegador")
+                else:
+                    with self._lock:
+                        self.por_http += 1
+                    return html
+            except requests.RequestException as e:
+                print(f"⚠️ Error HTTP en {url}: {e}; usando navegador")
+        with self._lock:
+            self.por_navegador += 1
+        return respaldo()
+
+    def cerrar(self):
+        self.sesion.close()
+
+    def resumen(self):
+        promedio = self.segundos_http / self.solicitudes if self.solicitudes else 0
+        return (f"🌐 Páginas por HTTP: {self.por_http} ({promedio * 1000:.0f} ms promedio) | "
+                f"por navegador: {self.por_navegador}")
@@ -0,0 +1,136 @@
+#marcas.py
+# Motor único de diccionario de marcas para todos los scrapers y normaliza.py.
+# Las marcas viven en marcas.csv (grupo, patron, marca, prioridad, limite); cada script
+# carga los grupos que usa. Todos los patrones se compilan en UNA expresión regular con
+# forma de trie (los prefijos comunes se comparten), así que el costo por nombre casi no
+# crece con la cantidad de marcas, y una columna entera se resuelve en una sola pasada.
+#
+# limite: "palabra"   el patrón debe ser una palabra (o frase) completa
+#         "prefijo"   debe empezar una palabra ("biosa" encuentra "BIOSANO")
+#         "subcadena" en cualquier parte ("butan" encuentra "IBUTAN")
+# Si un nombre trae varias marcas gana la de mayor prioridad; a igual prioridad la más
+# larga y después la primera en aparecer. Se consideran también las que se solapan
+# ("ab" y "bcd" en "abcd") o empiezan igual ("gen" dentro de "genven"): la regex mira en
+# cada posición con lookahead y los patrones más cortos salen de los prefijos de lo hallado.
+# Comparación sin mayúsculas ni acentos.
+#
+#   python marcas.py "DICLOFENAC 50MG 20 TAB GENVEN"
+# ---------------  MÓDULOS  ---------------
+from bisect import bisect_right
+from functools import lru_cache
+import csv, os, re, sys, unicodedata
+
+RUTA_MARCAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "marcas.csv")
+LIMITES = ("palabra", "prefijo", "subcadena")
+_LETRA = re.compile(r"\w")
+
+def normalizar_texto(texto):
+    """Minúsculas, sin acentos y con espacios simples (mismo criterio para nombres y patrones)"""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", texto).strip()
+
+def _trie_regex(patrones):
+    """Expresión equivalente a la alternancia de `patrones` ({texto: limite}), armada como trie.
+
+    En cada nodo se prueban primero las continuaciones: a igual inicio gana el patrón más largo.
+    """
+    trie = {}
+    for patron, limite in patrones.items():
+        nodo = trie
+        for c in patron:
+            nodo = nodo.setdefault(c, {})
+        nodo[""] = limite
+
+    def armar(nodo):
+        ramas = [re.escape(c) + armar(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if "" in nodo:
+            ramas.append(r"(?!\w)" if nodo[""] == "palabra" else "")
+        return ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+
+    return armar(trie) if trie else None
+
+# ---------------  DICCIONARIO  ---------------
+class DiccionarioMarcas:
+    """Diccionario compilado: patrón -> (marca, prioridad)."""
+
+    def __init__(self, entradas):
+        self._entradas = {}
+        for e in entradas:
+            if e["limite"] not in LIMITES:
+                raise ValueError(f"Límite desconocido '{e['limite']}' para {e['patron']}")
+            patron = normalizar_texto(e["patron"])
+            anterior = self._entradas.get(patron)
+            if anterior is None or int(e["prioridad"]) > anterior[1]:
+                self._entradas[patron] = (e["marca"], int(e["prioridad"]), e["limite"])
+        # Los de "palabra"/"prefijo" exigen empezar en borde de palabra; los de "subcadena" no.
+        # Lookaheads (largo cero): finditer prueba cada posición y los hallazgos se solapan.
+        # Cada grupo de la regex lleva si es de "subcadena" en self._grupos.
+        con_borde = _trie_regex({p: l for p, (_, _, l) in self._entradas.items() if l != "subcadena"})
+        sin_borde = _trie_regex({p: l for p, (_, _, l) in self._entradas.items() if l == "subcadena"})
+        con = rf"(?=(?<!\w)({con_borde}))" if con_borde else None
+        sin = rf"(?=({sin_borde}))" if sin_borde else None
+        if con and sin:
+            # En una misma posición pueden empezar de los dos tipos
+            self._regex, self._grupos = re.compile(rf"{con}(?:{sin})?|{sin}"), (False, True, True)
+        else:
+            self._regex = re.compile(con or sin) if con or sin else None
+            self._grupos = (not con,)
+        self._largos = sorted({len(p) for p in self._entradas}, reverse=True)
+
+    @classmethod
+    def desde_archivo(cls, ruta=RUTA_MARCAS, grupos=None):
+        """Carga las filas de `grupos` (todas si es None) del CSV de marcas"""
+        with open(ruta, encoding="utf-8", newline="") as f:
+            return cls(fila for fila in csv.DictReader(f) if grupos is None or fila["grupo"] in grupos)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def buscar_columna(self, nombres):
+        """Marca de cada nombre (o None), con una sola pasada de la regex sobre toda la columna"""
+        nombres = [normalizar_texto(n) if isinstance(n, str) else "" for n in nombres]
+        mejores = [None] * len(nombres)
+        if not self._regex or not nombres:
+            return mejores
+        inicios, posicion = [], 0
+        for n in nombres:
+            inicios.append(posicion)
+            posicion += len(n) + 1
+        # El salto de línea separa los nombres y cuenta como borde de palabra
+        texto = "\n".join(nombres)
+        for m in self._regex.finditer(texto):
+            inicio = m.start()
+            fila = bisect_right(inicios, inicio) - 1
+            for hallado, subcadena in zip(m.groups(), self._grupos):
+                if not hallado:
+                    continue
+                # El trie devuelve el patrón más largo que empieza aquí; los más cortos
+                # que también empiezan aquí son prefijos de él
+                for largo in self._largos:
+                    if largo > len(hallado):
+                        continue
+                    entrada = self._entradas.get(hallado[:largo])
+                    if entrada is None or (entrada[2] == "subcadena") != subcadena:
+                        continue
+                    if entrada[2] == "palabra" and _LETRA.match(texto, inicio + largo):
+                        continue
+                    marca, prioridad, _ = entrada
+                    puntaje = (prioridad, largo, -inicio)
+                    if mejores[fila] is None or puntaje > mejores[fila][0]:
+                        mejores[fila] = (puntaje, marca)
+        return [m[1] if m else None for m in mejores]
+
+    def buscar(self, nombre):
+        return self.buscar_columna([nombre])[0]
+
+@lru_cache(maxsize=None)
+def diccionario(*grupos):
+    """Diccionario de los `grupos` de marcas.csv, compilado una sola vez por proceso"""
+    return DiccionarioMarcas.desde_archivo(grupos=grupos or None)
+
+# ---------------  EJECUCIÓN  ---------------
+if __name__ == "__main__":
+    todas = diccionario()
+    for nombre in sys.argv[1:]:
+        print(f"{nombre} -> {todas.buscar(nombre)}")
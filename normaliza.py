@@ -1,36 +1,198 @@
 #normaliza.py
+# Normaliza los productos del histórico en Parquet (historial.py): columnas nombre_norm,
+# principio, dosis, presentacion, marca e id_producto por cada (Nombre, Marca), guardadas
+# en la tabla de productos del histórico (historial.PRODUCTOS; exportar_excel las une a
+# cada fila), y la tabla de productos únicos. Todo se calcula por columna
+# (.str.extract / .str.contains y un merge para los ids) y sólo sobre los nombres
+# distintos, que en el histórico se repiten corrida tras corrida; el resultado vuelve
+# a cada fila por su código.
+#
+# id_producto es un hash de contenido (BLAKE2b) de la clave normalizada, igual en cada
+# corrida y máquina. productos_unicos.csv es además el índice persistente de ids: cada
+# corrida sólo lee los archivos del histórico que todavía no pasaron por la tabla de
+# productos (historial.ARCHIVOS_PRODUCTOS), normaliza de ellos los (Nombre, Marca) que no
+# están en la tabla y agrega al índice los productos nuevos.
+#
+#   python normaliza.py [--completo] [--historial RUTA]   (--completo: renormaliza todo)
+#   python normaliza.py --benchmark 2000000                (contra el pipeline original, fila a fila)
 import pandas as pd
-import re
+import numpy as np
+import argparse, hashlib, os, re, time
 from pathlib import Path
+from marcas import diccionario
+from historial import archivos_historial, archivos_productos, leer_historial, leer_productos, guardar_productos
 
 # ---------- CONFIG ----------
-RUTA_CONSOLIDADO = Path(r"C:\Users\sisa4\Desktop\consolidado_farmacias.xlsx")
-RUTA_UNICOS      = RUTA_CONSOLIDADO.with_name("productos_unicos.csv")
+RUTA_HISTORIAL = Path(r"C:\Users\sisa4\Desktop\historial_farmacias")   # el de Scrapper_master.py
+RUTA_UNICOS    = RUTA_HISTORIAL.with_name("productos_unicos.csv")
 
-# ---------- FUNCIÓS DE NORMALIZACIÓN ----------
+CLAVE = ['principio', 'marca', 'dosis', 'presentacion']
+PRINCIPIOS = ["diclofenac", "paracetamol", "ibuprofeno", "loratadina",
+              "amoxicilina", "naproxeno", "aspirina", "cetirizina",
+              "omeprazol", "metformina"]
+RE_DOSIS = re.compile(r'(\d+(?:\.\d+)?)\s*(mg|g|ml|mcg|µg)\b', re.I)
+RE_CANTIDAD_FORMA = re.compile(r'(\d+)\s*(tab|cap|soft|comp|grag|sob|jbe|susp|ml|g)\w*', re.I)
+
+MARCAS = diccionario("normaliza")  # grupo "normaliza" de marcas.csv
+
+# ---------- FUNCIONES DE NORMALIZACIÓN (POR FILA) ----------
 def normalizar(texto):
     if pd.isna(texto) or not isinstance(texto, str):
         return None
     return re.sub(r'\s+', ' ', texto.lower().strip())
 
 def extraer_dosis(nombre):
-    m = re.search(r'(\d+(?:\.\d+)?)\s*(mg|g|ml|mcg|µg)\b', nombre, re.I)
+    m = RE_DOSIS.search(nombre)
     return f"{float(m.group(1))}{m.group(2).lower()}" if m else None
 
 def extraer_cantidad_forma(nombre):
-    m = re.search(r'(\d+)\s*(tab|cap|soft|comp|grag|sob|jbe|susp|ml|g)\w*', nombre, re.I)
+    m = RE_CANTIDAD_FORMA.search(nombre)
     return f"{m.group(1)}{m.group(2).lower()}" if m else None
 
 def extraer_principio(nombre):
-    principios = ["diclofenac", "paracetamol", "ibuprofeno", "loratadina",
-                  "amoxicilina", "naproxeno", "aspirina", "cetirizina",
-                  "omeprazol", "metformina"]
-    for p in principios:
+    for p in PRINCIPIOS:
         if p in nombre.lower():
             return p
     return None
 
-def extraer_marca(nombre, marca_col):
+def id_estable(principio, marca, dosis, presentacion):
+    """BLAKE2b de 48 bits de la clave: entero estable entre procesos y exacto en Excel (< 2**53)"""
+    texto = "\x1f".join(str(v) for v in (principio, marca, dosis, presentacion))
+    return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=6).digest(), "big")
+
+def generar_id(row):
+    return id_estable(row['principio'], row['marca'], row['dosis'], row['presentacion'])
+
+# ---------- FUNCIONES DE NORMALIZACIÓN (POR COLUMNA) ----------
+def normalizar_columna(serie):
+    """normalizar() sobre toda la Serie; lo que no es texto queda en None"""
+    es_texto = serie.map(type).eq(str)
+    texto = serie.where(es_texto).astype(object).str.lower().str.strip().str.replace(r'\s+', ' ', regex=True)
+    return texto.where(es_texto, None)
+
+def _numero_y_unidad(serie, patron, como_float=False):
+    """Número y unidad en minúsculas del primer match de `patron` (None si no hay)"""
+    partes = serie.str.extract(patron)
+    hay = partes[0].notna()
+    numero = partes[0][hay]
+    if como_float:
+        numero = numero.astype(float).astype(str)
+    resultado = pd.Series(None, index=serie.index, dtype=object)
+    resultado[hay] = numero + partes[1][hay].str.lower()
+    return resultado
+
+def extraer_dosis_columna(nombres):
+    return _numero_y_unidad(nombres, RE_DOSIS, como_float=True)
+
+def extraer_cantidad_forma_columna(nombres):
+    return _numero_y_unidad(nombres, RE_CANTIDAD_FORMA)
+
+def extraer_principio_columna(nombres):
+    """Primer principio de PRINCIPIOS contenido en el nombre (la lista define la prioridad)"""
+    resultado = pd.Series(None, index=nombres.index, dtype=object)
+    minusculas = nombres.str.lower()
+    for p in reversed(PRINCIPIOS):
+        resultado = resultado.mask(minusculas.str.contains(p, regex=False, na=False), p)
+    return resultado
+
+def marcas_del_nombre(nombres):
+    """Marca encontrada en cada nombre (una pasada del diccionario por toda la columna)"""
+    encontradas = pd.Series(MARCAS.buscar_columna(list(nombres)), index=nombres.index, dtype=object)
+    return normalizar_columna(encontradas)
+
+# ---------- PIPELINE ----------
+def por_valor_unico(serie, calcular):
+    """`calcular` (Serie -> Serie o DataFrame) aplicado a los valores distintos de `serie`
+    y llevado de vuelta a cada fila; los nulos quedan en None/NaN"""
+    codigos, unicos = pd.factorize(serie)
+    valores = calcular(pd.Series(unicos, dtype=object))
+    # Una fila vacía al final: iloc[-1] la toma para los nulos (código -1)
+    valores = pd.concat([valores, valores.iloc[:0].reindex([len(valores)])])
+    resultado = valores.iloc[codigos]
+    resultado.index = serie.index
+    return resultado
+
+def _componentes(nombres):
+    norm = normalizar_columna(nombres)
+    return pd.DataFrame({'nombre_norm':  norm,
+                         'principio':    extraer_principio_columna(norm),
+                         'dosis':        extraer_dosis_columna(norm),
+                         'presentacion': extraer_cantidad_forma_columna(norm),
+                         'marca':        marcas_del_nombre(norm)})
+
+def agregar_componentes(df):
+    """Columnas nombre_norm, principio, dosis, presentacion y marca (mismos dtypes que con .apply)"""
+    componentes = por_valor_unico(df['Nombre'], _componentes)
+    # Si el nombre no trae marca conocida, la de la columna Marca
+    componentes['marca'] = componentes['marca'].fillna(por_valor_unico(df['Marca'], normalizar_columna))
+    for columna in componentes:
+        df[columna] = componentes[columna].infer_objects()
+    return df
+
+def tabla_unicos(df):
+    """Un producto por combinación completa de CLAVE, con su id_producto"""
+    unicos = df.dropna(subset=CLAVE).drop_duplicates(subset=CLAVE)[CLAVE]
+    return (unicos
+            .assign(id_producto=[id_estable(*fila) for fila in unicos.itertuples(index=False)])
+            [['id_producto'] + CLAVE])
+
+def asignar_ids(df, unicos):
+    """id_producto de cada fila del consolidado con un merge contra la tabla de únicos"""
+    ids = df[CLAVE].merge(unicos, on=CLAVE, how='left')['id_producto']
+    df['id_producto'] = ids.to_numpy()
+    return df
+
+# ---------- ÍNDICE DE IDS ----------
+class IndiceIds:
+    """Productos conocidos (clave -> id_producto), persistido en CSV entre corridas.
+
+    Al cargar se descartan las filas cuyo id no es el id_estable de su clave (p. ej. los
+    ids de hash() de versiones anteriores), así que un índice viejo se reconstruye solo.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self._ids = {}
+        self.descartados = 0
+        if self.ruta.is_file():
+            tabla = pd.read_csv(self.ruta, dtype={c: str for c in CLAVE}, keep_default_na=False)
+            for id_, *clave in tabla[['id_producto'] + CLAVE].itertuples(index=False):
+                if id_estable(*clave) == id_:
+                    self._ids[tuple(clave)] = id_
+                else:
+                    self.descartados += 1
+
+    def __len__(self):
+        return len(self._ids)
+
+    def id_de(self, principio, marca, dosis, presentacion):
+        return self._ids.get((principio, marca, dosis, presentacion))
+
+    def agregar(self, unicos):
+        """Suma las claves de `unicos` (tabla_unicos) que no estaban; devuelve cuántas eran nuevas"""
+        nuevos = 0
+        for id_, *clave in unicos[['id_producto'] + CLAVE].itertuples(index=False):
+            if tuple(clave) not in self._ids:
+                self._ids[tuple(clave)] = id_
+                nuevos += 1
+        return nuevos
+
+    def tabla(self):
+        tabla = pd.DataFrame([(id_, *clave) for clave, id_ in self._ids.items()],
+                             columns=['id_producto'] + CLAVE)
+        return tabla.sort_values(['principio', 'marca'], kind='stable')
+
+    def guardar(self):
+        """Escribe a un temporal y lo renombra: un corte a mitad no deja el índice a medias"""
+        temporal = self.ruta.with_suffix(".tmp")
+        self.tabla().to_csv(temporal, index=False)
+        os.replace(temporal, self.ruta)
+
+# ---------- BENCHMARK ----------
+# Pipeline original (la versión anterior de este script, fila a fila), sólo como referencia
+# de tiempos: su marca salía de una lista fija por subcadena y su id de hash(), que cambia
+# entre procesos; por eso se comparan sólo nombre_norm, principio, dosis y presentacion.
+def _extraer_marca_original(nombre, marca_col):
     marcas = ["aflamax", "diklason", "genven", "oftalmi", "mk", "genfar",
               "pfizer", "gsk", "panadol", "calox", "bago", "roemmers", "clofen"]
     nombre_low = nombre.lower()
@@ -39,47 +201,111 @@ def extraer_marca(nombre, marca_col):
             return m
     return normalizar(marca_col)  # ya retorna None si marca_col es NaN
 
-def generar_id(row):
+def _generar_id_original(row):
     return hash((row['principio'], row['marca'], row['dosis'], row['presentacion'])) & 0xffffffff
 
-# ---------- CARGAR DATOS ----------
-df = pd.read_excel(RUTA_CONSOLIDADO)
-df['nombre_norm'] = df['Nombre'].apply(normalizar)
+def _por_fila(df):
+    """Pipeline original, fila a fila (sin leer ni escribir archivos)"""
+    df['nombre_norm'] = df['Nombre'].apply(normalizar)
+    df['principio']   = df['nombre_norm'].apply(extraer_principio)
+    df['dosis']       = df['nombre_norm'].apply(extraer_dosis)
+    df['presentacion']= df['nombre_norm'].apply(extraer_cantidad_forma)
+    df['marca']       = df.apply(lambda r: _extraer_marca_original(r['nombre_norm'], r['Marca']), axis=1)
+    df_valido = df.dropna(subset=CLAVE)
+    unicos = (df_valido
+              .drop_duplicates(subset=CLAVE)
+              .assign(id_producto=lambda x: x.apply(_generar_id_original, axis=1))
+              [['id_producto'] + CLAVE]
+              .sort_values(['principio', 'marca']))
+    mapa = (df_valido
+            .drop_duplicates(subset=CLAVE)
+            .assign(id_producto=lambda x: x.apply(_generar_id_original, axis=1))
+            .set_index(CLAVE)['id_producto']
+            .to_dict())
+    df['id_producto'] = df.apply(lambda r: mapa.get(tuple(r[c] for c in CLAVE)), axis=1)
+    return df, unicos
+
+NOMBRES_EJEMPLO = ["DICLOFENAC POTASICO 50MG X 20 TAB GENVEN", "Paracetamol 500 mg 10 Comprimidos  MK",
+                   "IBUPROFENO 400MG 10 CAP", "Loratadina 10mg x 30 tabletas Oftalmi",
+                   "AMOXICILINA 500 MG X 21 CAPSULAS", "Omeprazol 20Mg 14 Caps Diklason",
+                   "Jarabe para la tos 120 ml", "ASPIRINA 100MG 28 GRAGEAS"]
 
-# ---------- EXTRAER COMPONENTES ----------
-df['principio']   = df['nombre_norm'].apply(extraer_principio)
-df['dosis']       = df['nombre_norm'].apply(extraer_dosis)
-df['presentacion']= df['nombre_norm'].apply(extraer_cantidad_forma)
-df['marca']       = df.apply(lambda r: extraer_marca(r['nombre_norm'], r['Marca']), axis=1)
+def benchmark(n=1_000_000, n_por_fila=50_000):
+    """Tiempos del pipeline por columna sobre `n` filas y del original sobre `n_por_fila`
+    (escalado), comprobando que ambos dan lo mismo en esas primeras filas"""
+    azar = np.random.default_rng(0)
+    base = np.array(NOMBRES_EJEMPLO, dtype=object)[azar.integers(0, len(NOMBRES_EJEMPLO), n)]
+    extra = azar.integers(1, 1000, n).astype(str)
+    df = pd.DataFrame({"Nombre": base + " LOTE " + extra,
+                       "Marca": np.where(azar.random(n) < 0.5, "  Genérico ", None)})
 
-# ---------- FILTRAR FILAS VÁLIDAS ----------
-df_valido = df.dropna(subset=['principio', 'marca', 'dosis', 'presentacion'])
+    muestra = df.head(n_por_fila)
+    inicio = time.perf_counter()
+    referencia, _ = _por_fila(muestra.copy())
+    por_fila = (time.perf_counter() - inicio) * n / len(muestra)
+    print(f"⏱️ por fila (estimado para {n} filas): {por_fila:8.1f} s")
 
-# ---------- CREAR TABLA ÚNICA ----------
-unicos = (df_valido
-          .drop_duplicates(subset=['principio', 'marca', 'dosis', 'presentacion'])
-          .assign(id_producto=lambda x: x.apply(generar_id, axis=1))
-          [['id_producto', 'principio', 'marca', 'dosis', 'presentacion']]
-          .sort_values(['principio', 'marca']))
+    inicio = time.perf_counter()
+    resultado = agregar_componentes(df.copy())
+    resultado = asignar_ids(resultado, tabla_unicos(resultado))
+    por_columna = time.perf_counter() - inicio
+    print(f"⏱️ por columna ({n} filas):            {por_columna:8.1f} s  x{por_fila / por_columna:.1f}")
 
-unicos.to_csv(RUTA_UNICOS, index=False)
-print(f"✅ {len(unicos)} productos únicos guardados en {RUTA_UNICOS}")
+    columnas = ['nombre_norm', 'principio', 'dosis', 'presentacion']
+    iguales = resultado.head(len(muestra))[columnas].equals(referencia[columnas])
+    print("✅ mismos componentes" if iguales else "❌ los componentes difieren")
+    distintas = (resultado.head(len(muestra))['marca'].fillna("") != referencia['marca'].fillna("")).sum()
+    print(f"ℹ️ marca distinta en {distintas} de {len(muestra)} filas (marcas.csv por palabra, antes subcadena)")
 
+# ---------- EJECUCIÓN ----------
+def normalizar_historial(ruta_historial=RUTA_HISTORIAL, ruta_unicos=RUTA_UNICOS, completo=False):
+    """Normaliza los productos de los archivos nuevos del histórico (todos si `completo`,
+    p. ej. tras cambiar marcas.csv); devuelve cuántos productos se normalizaron"""
+    indice = IndiceIds(ruta_unicos)
+    if indice.descartados:
+        print(f"♻️ {indice.descartados} ids del índice no eran estables: se renormaliza todo")
 
-# ... (todo el código anterior hasta guardar unicos.to_csv)
+    # ---------- SÓLO LOS ARCHIVOS Y PRODUCTOS NUEVOS ----------
+    # Con un índice válido, los archivos anotados ya pasaron por la tabla de productos y los
+    # (Nombre, Marca) que están en ella se normalizaron antes
+    productos, hechos = leer_productos(ruta_historial), archivos_productos(ruta_historial)
+    if completo or not len(indice) or indice.descartados or not len(productos):
+        productos, hechos = productos.iloc[:0], set()
+    archivos = archivos_historial(ruta_historial)
+    nuevos_archivos = [a for a in archivos if a not in hechos]
+    vistos = (leer_historial(ruta_historial, columnas=["Nombre", "Marca"], archivos=nuevos_archivos)
+              .dropna(subset=["Nombre"]).drop_duplicates())
+    pendientes = vistos.merge(productos[["Nombre", "Marca"]], how="left", indicator=True)
+    pendientes = pendientes[pendientes["_merge"] == "left_only"].drop(columns="_merge")
+    if pendientes.empty:
+        if nuevos_archivos:
+            guardar_productos(None, ruta_historial, archivos=hechos | set(nuevos_archivos))
+        print(f"✅ Sin productos nuevos que normalizar ({len(nuevos_archivos)} archivos nuevos)")
+        return 0
+    parte = agregar_componentes(pendientes.reset_index(drop=True))
 
-# ✅ PASO 2: ASIGNAR id_producto AL CONSOLIDADO ORIGINAL
-# ---------- CARGAR TABLA ÚNICA ----------
-mapa = (df_valido
-        .drop_duplicates(subset=['principio', 'marca', 'dosis', 'presentacion'])
-        .assign(id_producto=lambda x: x.apply(generar_id, axis=1))
-        .set_index(['principio', 'marca', 'dosis', 'presentacion'])['id_producto']
-        .to_dict())
+    # ---------- ÍNDICE DE PRODUCTOS ÚNICOS ----------
+    nuevos = indice.agregar(tabla_unicos(parte))
+    indice.guardar()
+    print(f"✅ {len(indice)} productos únicos ({nuevos} nuevos) guardados en {ruta_unicos}")
 
-# ---------- ASIGNAR id_producto AL CONSOLIDADO ----------
-df['id_producto'] = df.apply(
-    lambda r: mapa.get((r['principio'], r['marca'], r['dosis'], r['presentacion'])), axis=1)
+    # ---------- id_producto EN LA TABLA DE PRODUCTOS DEL HISTÓRICO ----------
+    parte = asignar_ids(parte, indice.tabla())
+    parte['id_producto'] = parte['id_producto'].astype("Int64")
+    guardar_productos(pd.concat([productos, parte], ignore_index=True), ruta_historial,
+                      archivos=hechos | set(nuevos_archivos))
+    print(f"✅ {len(parte)} productos normalizados con 'id_producto' en {ruta_historial} "
+          f"({len(nuevos_archivos)} archivos nuevos)")
+    return len(parte)
 
-# ---------- GUARDAR ----------
-df.to_excel(RUTA_CONSOLIDADO, index=False)
-print("✅ Columna 'id_producto' añadida al consolidado")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalización de productos del histórico")
+    parser.add_argument("--completo", action="store_true", help="renormalizar todos los productos")
+    parser.add_argument("--historial", default=RUTA_HISTORIAL)
+    parser.add_argument("--unicos", default=RUTA_UNICOS)
+    parser.add_argument("--benchmark", type=int, nargs="?", const=1_000_000, metavar="FILAS")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.benchmark)
+    else:
+        normalizar_historial(args.historial, args.unicos, completo=args.completo)
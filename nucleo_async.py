@@ -0,0 +1,95 @@
+#nucleo_async.py
+# Núcleo asyncio para planificar muchas tareas (tienda, término, página) a la vez.
+# Las descargas siguen siendo bloqueantes (Selenium / requests), así que corren en un
+# pool de hilos; el bucle sólo decide cuándo arrancan según los semáforos por host y
+# el tope global. El parseo (CPU) va a otro executor para no frenar las descargas.
+# ---------------  MÓDULOS  ---------------
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import defaultdict
+
+# ---------------  NÚCLEO  ---------------
+class NucleoAsync:
+    """Planificador con tope global de tareas en vuelo y semáforo por host.
+
+    Uso:
+        nucleo = NucleoAsync(max_en_vuelo=6, por_host={"www.farmago.com.ve": 2})
+        resultados = nucleo.correr([corrutina1, corrutina2, ...])   # mismo orden
+    """
+
+    def __init__(self, max_en_vuelo=6, por_host=None, por_host_defecto=1, procesos_parseo=0):
+        self.max_en_vuelo = max_en_vuelo
+        self.por_host = por_host or {}
+        self.por_host_defecto = por_host_defecto
+        self.procesos_parseo = procesos_parseo
+        self.completadas = defaultdict(int)   # host -> tareas terminadas
+
+    # Los semáforos se crean dentro del bucle que los usa (asyncio.run crea uno nuevo)
+    def _preparar(self):
+        self._global = asyncio.Semaphore(self.max_en_vuelo)
+        self._hosts = {}
+        self._io = ThreadPoolExecutor(max_workers=self.max_en_vuelo, thread_name_prefix="io")
+        self._cpu = (ProcessPoolExecutor(max_workers=self.procesos_parseo) if self.procesos_parseo
+                     else ThreadPoolExecutor(max_workers=1, thread_name_prefix="parseo"))
+
+    def _semaforo(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.por_host.get(host, self.por_host_defecto))
+        return self._hosts[host]
+
+    async def bloqueante(self, host, funcion, *args):
+        """Corre `funcion(*args)` (descarga bloqueante) respetando el cupo de `host`"""
+        async with self._semaforo(host), self._global:
+            resultado = await asyncio.get_running_loop().run_in_executor(self._io, funcion, *args)
+        self.completadas[host] += 1
+        return resultado
+
+    async def parsear(self, funcion, *args):
+        """Corre `funcion(*args)` en el executor de parseo; no ocupa cupo de host"""
+        return await asyncio.get_running_loop().run_in_executor(self._cpu, funcion, *args)
+
+    def correr(self, fabricas):
+        """Ejecuta [lambda: corrutina, ...] y devuelve los resultados en el mismo orden.
+
+        Se reciben fábricas (no corrutinas) porque las corrutinas necesitan que
+        los semáforos ya existan en el bucle de asyncio.run.
+        """
+        async def _todas():
+            self._preparar()
+            try:
+                return await asyncio.gather(*(f() for f in fabricas))
+            finally:
+                self._io.shutdown(wait=True)
+                self._cpu.shutdown(wait=True)
+        return asyncio.run(_todas())
+
+    def resumen(self):
+        detalle = ", ".join(f"{host}: {n}" for host, n in sorted(self.completadas.items()))
+        return f"⚙️ Tareas completadas por host: {detalle}"
+
+# ---------------  ADAPTADORES  ---------------
+def adaptar_scraper(nucleo, host, funcion, *args):
+    """Convierte un scraper bloqueante existente (p. ej. retry(scrap_x, prod)) en tarea del núcleo"""
+    return lambda: nucleo.bloqueante(host, funcion, *args)
+
+def adaptar_al_terminar(fabrica, al_terminar):
+    """Tarea que pasa su resultado a `al_terminar` apenas termina y devuelve lo que ésta devuelva"""
+    async def tarea():
+        return al_terminar(await fabrica())
+    return tarea
+
+def adaptar_guardado(nucleo, fabrica, guardar, host="disco"):
+    """Como adaptar_al_terminar, pero `guardar` (escritura con fsync) corre en el pool de
+    hilos con bloqueante: el disco no frena el bucle. El cupo de `host` ordena las escrituras"""
+    async def tarea():
+        return await nucleo.bloqueante(host, guardar, await fabrica())
+    return tarea
+
+def adaptar_descarga_y_parseo(nucleo, host, descargar, parsear, *args):
+    """Tarea en dos etapas: descarga con cupo de host, parseo en el executor de CPU"""
+    async def tarea():
+        html = await nucleo.bloqueante(host, descargar, *args)
+        if not html:
+            return []
+        return await nucleo.parsear(parsear, html, *args)
+    return tarea
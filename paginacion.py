@@ -0,0 +1,204 @@
+#paginacion.py
+# Paginado directo: en vez de pulsar "Cargar más" y esperar a que crezca la grilla, se
+# piden las páginas de resultados por URL o por parámetros de la API, varias a la vez.
+# El recorrido se corta en cuanto una página no trae SKUs nuevos.
+# ---------------  MÓDULOS  ---------------
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import json, os, re, time
+import requests
+from captura_api import capturar_peticion, capturar_respuestas, claves_api, filas_desde_api, grabar, leer_log_red
+from concurrencia import ejecutar_en_paralelo
+from parseo import documento
+
+ESPERA_REINTENTO = 2   # segundos antes de volver a pedir una página que falló
+PAGINACION_WOOCOMMERCE = ".woocommerce-pagination, nav.page-numbers"   # bloque de la numeración
+
+# ---------------  RECORRIDO GENÉRICO  ---------------
+def recorrer_paginas(obtener, claves, desde=2, hasta=20, en_paralelo=3, vistas=()):
+    """Pide las páginas `desde`..`hasta` en tandas de `en_paralelo` y devuelve las respuestas útiles.
+
+    `obtener(n)` trae la página n (o None si no existe); `claves(respuesta)` da sus SKUs.
+    `vistas` son los SKUs ya conocidos (p. ej. de la primera página). Se detiene en la
+    primera página vacía o sin SKUs nuevos: las siguientes de su tanda se descartan.
+    Un error no es fin de resultados: la página se pide otra vez y, si vuelve a fallar,
+    la excepción sube para que quien llama use el navegador o reintente la búsqueda.
+    """
+    vistas = set(vistas)
+    respuestas = []
+
+    def segura(n):
+        try:
+            return obtener(n)
+        except Exception as e:
+            print(f"⚠️ Página {n}: {e}; reintentando")
+            time.sleep(ESPERA_REINTENTO)
+            return obtener(n)
+
+    for inicio in range(desde, hasta + 1, en_paralelo):
+        tanda = range(inicio, min(inicio + en_paralelo, hasta + 1))
+        resultados = ejecutar_en_paralelo([("paginas", lambda n=n: segura(n)) for n in tanda],
+                                          max_hilos=en_paralelo)
+        for n, respuesta in zip(tanda, resultados):
+            nuevas = claves(respuesta) - vistas if respuesta is not None else set()
+            if not nuevas:
+                print(f"📄 Página {n} sin SKUs nuevos, fin del paginado")
+                return respuestas
+            vistas |= nuevas
+            respuestas.append(respuesta)
+    return respuestas
+
+# ---------------  ALGOLIA (FARMATODO)  ---------------
+def _params_con_pagina(params, pagina):
+    """Reemplaza (o agrega) page=N en un string de parámetros estilo query string"""
+    pares = [(k, v) for k, v in parse_qsl(params, keep_blank_values=True) if k != "page"]
+    return urlencode(pares + [("page", str(pagina))])
+
+def _con_pagina(cuerpo, pagina):
+    """Copia del cuerpo JSON de Algolia pidiendo `pagina` (0-based) en cada consulta"""
+    if isinstance(cuerpo, list):
+        return [_con_pagina(c, pagina) for c in cuerpo]
+    if not isinstance(cuerpo, dict):
+        return cuerpo
+    nuevo = {}
+    for clave, valor in cuerpo.items():
+        if clave == "params" and isinstance(valor, str):
+            nuevo[clave] = _params_con_pagina(valor, pagina)
+        elif clave == "page":
+            nuevo[clave] = pagina
+        else:
+            nuevo[clave] = _con_pagina(valor, pagina)
+    return nuevo
+
+def total_paginas_algolia(respuesta):
+    """nbPages de la respuesta (multi-consulta o de un solo índice); None si no viene"""
+    totales = [r.get("nbPages") for r in respuesta.get("results", [respuesta]) if isinstance(r, dict)]
+    totales = [t for t in totales if isinstance(t, int)]
+    return max(totales) if totales else None
+
+def paginas_algolia(cliente, peticion, primera, claves, paginas_max=20, en_paralelo=3):
+    """Repite la consulta Algolia capturada (`peticion`) para las páginas siguientes.
+
+    `primera` es el JSON de la página ya cargada en el navegador. Las páginas de
+    Algolia empiezan en 0, así que la página n del recorrido es page=n-1.
+    """
+    total = total_paginas_algolia(primera) or paginas_max
+    hasta = min(total, paginas_max)
+    if hasta < 2:
+        return []
+    # Se copian las cabeceras del navegador (claves de Algolia incluidas) salvo las que arma requests
+    headers = {k: v for k, v in peticion["headers"].items()
+               if not k.startswith(":") and k.lower() not in ("content-length", "accept-encoding", "host")}
+
+    if peticion.get("postData"):
+        cuerpo = json.loads(peticion["postData"])
+        def obtener(n):
+            return cliente.post_json(peticion["url"], json.dumps(_con_pagina(cuerpo, n - 1)), headers)
+    else:
+        partes = urlsplit(peticion["url"])
+        def obtener(n):
+            url = urlunsplit(partes._replace(query=_params_con_pagina(partes.query, n - 1)))
+            return json.loads(cliente.get(url, headers=headers))
+
+    return recorrer_paginas(obtener, claves, desde=2, hasta=hasta,
+                            en_paralelo=en_paralelo, vistas=claves(primera))
+
+def filas_algolia(driver, cliente, config_api, origen, producto, limpiar_precio,
+                  paginas_max=20, en_paralelo=3, grabar_en=None):
+    """Filas de todas las páginas de una búsqueda: la primera desde el log de red del
+    navegador (ya cargada) y las demás repitiendo por HTTP la consulta Algolia capturada.
+
+    No depende de CAPTURA_API: sólo necesita el log de performance activo. Devuelve
+    (filas, capturas de la primera página); si no se capturó la consulta, las filas
+    vienen vacías y la página sigue lista para "Cargar más".
+    """
+    mensajes = leer_log_red(driver)
+    primeras = capturar_respuestas(driver, config_api["patrones"], mensajes)
+    peticion = capturar_peticion(mensajes, config_api["patrones"])
+    claves = lambda respuesta: claves_api(respuesta, config_api)
+    con_productos = [c for c in primeras if claves(c["json"])]
+    if not peticion or not con_productos:
+        print("ℹ️ No se capturó la consulta de búsqueda, se sigue con 'Cargar más'")
+        return [], primeras
+
+    siguientes = paginas_algolia(cliente, peticion, con_productos[-1]["json"], claves, paginas_max, en_paralelo)
+    capturas = primeras + [{"url": peticion["url"], "status": 200, "json": j} for j in siguientes]
+    if grabar_en:
+        grabar(capturas, os.path.join(grabar_en, f"{origen}_{producto}.json"))
+    filas = filas_desde_api(capturas, config_api, origen, producto, limpiar_precio)
+    print(f"📑 {producto}: {1 + len(siguientes)} páginas por API, {len(filas)} filas")
+    return filas, primeras
+
+# ---------------  WOOCOMMERCE (FARMATINA, FARMADON)  ---------------
+def url_pagina_woocommerce(url, pagina):
+    """URL de la página `pagina` de un listado WooCommerce (/page/N/ antes de la query)"""
+    if pagina == 1:
+        return url
+    partes = urlsplit(url)
+    ruta = re.sub(r"/page/\d+/?$", "/", partes.path).rstrip("/") + f"/page/{pagina}/"
+    return urlunsplit(partes._replace(path=ruta))
+
+def total_paginas_woocommerce(html, backend=None):
+    """Mayor número de página enlazado en la numeración (/page/N/ o paged=N); None si no hay.
+
+    Sólo cuentan los enlaces del bloque de numeración: un /page/N/ del encabezado, del pie
+    o de un widget del blog no es una página del listado.
+    """
+    doc = documento(html, backend=backend)
+    numeros = [int(a or b) for bloque in doc.select(PAGINACION_WOOCOMMERCE) for enlace in bloque.select("a[href]")
+               for a, b in re.findall(r"/page/(\d+)/|[?&;]paged=(\d+)", enlace.get("href"))]
+    return max(numeros) if numeros else None
+
+def _pagina_woocommerce(cliente, url, pagina):
+    """HTML de la página `pagina`; None si no existe (404: se sondeó más allá del final)"""
+    try:
+        return cliente.get(url_pagina_woocommerce(url, pagina))
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None
+        raise
+
+def _claves_woocommerce(config_tienda):
+    """Enlaces de los productos de una página: identifican cada producto entre páginas"""
+    item = config_tienda["paginado"]["item"]
+    def claves(html):
+        doc = documento(html, backend=config_tienda.get("parser"))
+        return {a["href"] for p in doc.select(item) for a in p.select("a[href]")[:1]}
+    return claves
+
+def paginas_woocommerce(cliente, url, config_tienda, respaldo, paginas_max=20, en_paralelo=3):
+    """HTML de todas las páginas de resultados de una búsqueda WooCommerce, en orden.
+
+    La primera página define cuántas hay (numeración); las demás se piden en paralelo.
+    Si la tienda no muestra la numeración pero sí el marcador "incompleto", se sondea
+    hasta `paginas_max` cortando en la primera página sin productos nuevos (o inexistente).
+    Si la primera página no llega por HTTP, o una siguiente falla dos veces, `respaldo()`
+    (navegador) trae todo de una vez.
+    """
+    # Sin "incompleto": aquí la primera página parcial es lo esperado
+    config_http = {"http": {"marcador": config_tienda["http"]["marcador"]}}
+    del_navegador = []
+    def _respaldo():
+        del_navegador.append(True)
+        return respaldo()
+    primera = cliente.obtener_html(url, config_http, _respaldo)
+    if del_navegador or not primera:
+        return [primera] if primera else []
+
+    total = total_paginas_woocommerce(primera, config_tienda.get("parser"))
+    if total is None:
+        incompleto = config_tienda["http"].get("incompleto")
+        total = paginas_max if incompleto and incompleto in primera else 1
+    hasta = min(total, paginas_max)
+    if hasta < 2:
+        return [primera]
+
+    claves = _claves_woocommerce(config_tienda)
+    try:
+        siguientes = recorrer_paginas(lambda n: _pagina_woocommerce(cliente, url, n), claves,
+                                      desde=2, hasta=hasta, en_paralelo=en_paralelo, vistas=claves(primera))
+    except Exception as e:
+        # Cortar aquí dejaría el listado a medias sin avisar: el navegador lo trae entero
+        print(f"⚠️ {url}: {e}; usando navegador para todo el listado")
+        return [respaldo()]
+    print(f"📑 {url}: {1 + len(siguientes)} páginas por HTTP")
+    return [primera] + siguientes
@@ -0,0 +1,274 @@
+#parseo.py
+# Backend de parseo HTML elegible por tienda ("parser" en tiendas.py):
+#   "html.parser"  BeautifulSoup con el parser de la biblioteca estándar (el más lento)
+#   "lxml"         BeautifulSoup con el árbol de lxml: misma API completa de bs4, mucho más rápido
+#   "selectolax"   selectolax (Lexbor, o Modest en versiones < 1.0): el más rápido; sólo la API común de abajo
+# Los scrapers que usan únicamente select / select_one / get_text / text / get pueden
+# correr sobre cualquiera de los tres; los que usan find(string=...), :-soup-contains,
+# find_parent, etc. deben quedarse en un backend de BeautifulSoup.
+#
+# "raiz" (tiendas.py) acota el parseo al contenedor de resultados: en bs4 con un
+# SoupStrainer, en selectolax tomando ese subárbol, y desde el navegador trayendo sólo
+# su outerHTML (html_raiz). Si la raíz no aparece se parsea la página entera.
+#
+# Paridad y velocidad sobre páginas guardadas (GUARDAR_HTML_EN en Scrapper_master.py):
+#   python parseo.py parseo_tiendas:parsear_farmatodo paginas_html/farmatodo_*.html
+# ---------------  MÓDULOS  ---------------
+from bs4 import BeautifulSoup, SoupStrainer
+from collections import defaultdict
+import functools, importlib, os, sys, threading, time, tracemalloc
+
+PARSER_DEFECTO = "html.parser"
+BACKENDS = ("html.parser", "lxml", "selectolax")
+ACOTAR_A_RAIZ = True   # False = parsear la página completa (para comparar)
+
+# ---------------  NODOS SELECTOLAX  ---------------
+class Nodo:
+    """Envuelve un nodo de selectolax con el subconjunto de la API de bs4 que usan los scrapers"""
+    __slots__ = ("_nodo",)
+
+    def __init__(self, nodo):
+        self._nodo = nodo
+
+    def select(self, css):
+        return [Nodo(n) for n in self._nodo.css(css)]
+
+    def select_one(self, css):
+        nodo = self._nodo.css_first(css)
+        return Nodo(nodo) if nodo is not None else None
+
+    def get_text(self, separator="", strip=False):
+        return self._nodo.text(separator=separator, strip=strip)
+
+    @property
+    def text(self):
+        return self._nodo.text()
+
+    def get(self, atributo, defecto=None):
+        valor = self._nodo.attributes.get(atributo)
+        return defecto if valor is None else valor
+
+    def __getitem__(self, atributo):
+        return self._nodo.attributes[atributo]
+
+class Raices:
+    """Varios contenedores "raiz" consultados como si fueran un solo documento"""
+    __slots__ = ("_nodos",)
+
+    def __init__(self, nodos):
+        self._nodos = [Nodo(n) for n in nodos]
+
+    def select(self, css):
+        return [hijo for nodo in self._nodos for hijo in nodo.select(css)]
+
+    def select_one(self, css):
+        for nodo in self._nodos:
+            hijo = nodo.select_one(css)
+            if hijo is not None:
+                return hijo
+        return None
+
+    def get_text(self, separator="", strip=False):
+        return separator.join(n.get_text(separator, strip) for n in self._nodos)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+# ---------------  DOCUMENTO  ---------------
+_no_disponibles = set()
+
+def _parser_selectolax():
+    """Clase de parser de selectolax: Lexbor, o Modest en versiones viejas (1.0 ya no lo trae)"""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser
+        return HTMLParser
+
+def _disponible(backend):
+    """True si la dependencia opcional del backend está instalada (avisa una sola vez)"""
+    if backend == "html.parser" or backend in _no_disponibles:
+        return backend == "html.parser"
+    try:
+        _parser_selectolax() if backend == "selectolax" else importlib.import_module(backend)
+        return True
+    except ImportError:
+        _no_disponibles.add(backend)
+        print(f"⚠️ Backend de parseo '{backend}' no instalado, se usa {PARSER_DEFECTO}")
+        return False
+
+def _config(tienda):
+    from tiendas import TIENDAS
+    return TIENDAS.get(tienda, {}) if tienda else {}
+
+def backend_de(tienda):
+    """Backend configurado para `tienda` en tiendas.py (o el por defecto)"""
+    return _config(tienda).get("parser", PARSER_DEFECTO)
+
+def _colador(raiz):
+    """SoupStrainer equivalente a un selector simple 'etiqueta', 'etiqueta.clase' o 'etiqueta#id'"""
+    if "#" in raiz:
+        etiqueta, id_ = raiz.split("#", 1)
+        return SoupStrainer(etiqueta or None, id=id_)
+    etiqueta, _, clase = raiz.partition(".")
+    if not clase:
+        return SoupStrainer(etiqueta)
+    # Al filtrar durante el parseo el atributo llega sin separar ("products nasa-products"):
+    # comparar con class_=clase sólo acertaría si es la única clase
+    return SoupStrainer(etiqueta or None,
+                        class_=lambda valor: bool(valor) and clase in (valor.split() if isinstance(valor, str) else valor))
+
+def _construir(html, backend, raiz):
+    if backend == "selectolax":
+        arbol = _parser_selectolax()(html)
+        # selectolax no filtra al construir: se acotan las consultas a los contenedores
+        nodos = arbol.css(raiz) if raiz else None
+        return Raices(nodos) if nodos else Nodo(arbol.root)
+    if raiz:
+        doc = BeautifulSoup(html, backend, parse_only=_colador(raiz))
+        if doc.find() is not None:
+            return doc
+    return BeautifulSoup(html, backend)
+
+def documento(html, tienda=None, backend=None):
+    """Árbol del HTML con el backend pedido, o con el de la tienda si no se indica.
+
+    Si la tienda declara "raiz" (y ACOTAR_A_RAIZ), sólo se construye ese subárbol.
+    """
+    backend = backend or (backend_de(tienda) if tienda else PARSER_DEFECTO)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de parseo desconocido: {backend}")
+    if not _disponible(backend):
+        backend = PARSER_DEFECTO
+    raiz = _config(tienda).get("raiz") if ACOTAR_A_RAIZ else None
+    inicio = time.perf_counter()
+    doc = _construir(html, backend, raiz)
+    _registrar(tienda or backend, time.perf_counter() - inicio, len(html))
+    return doc
+
+def html_raiz(driver, tienda, completo=False):
+    """outerHTML de los contenedores "raiz" de la tienda (o page_source si no hay).
+
+    completo=True trae siempre page_source: las páginas que se guardan para el benchmark
+    tienen que ser completas, si no la variante "página entera" mide sólo la raíz.
+    """
+    raiz = _config(tienda).get("raiz") if ACOTAR_A_RAIZ and not completo else None
+    if raiz:
+        html = driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0]))"
+            ".map(e => e.outerHTML).join('');", raiz)
+        if html:
+            return html
+    return driver.page_source
+
+# ---------------  TIEMPOS DE PARSEO  ---------------
+TIEMPOS_PARSEO = defaultdict(lambda: [0, 0.0, 0])   # tienda -> [páginas, segundos, bytes]
+_lock = threading.Lock()
+
+def _registrar(clave, segundos, tamano):
+    with _lock:
+        t = TIEMPOS_PARSEO[clave]
+        t[0] += 1
+        t[1] += segundos
+        t[2] += tamano
+
+def resumen_parseo():
+    lineas = ["🧩 Parseo por tienda (páginas | ms/pág | KB/pág de entrada):"]
+    with _lock:
+        for clave, (paginas, segundos, tamano) in sorted(TIEMPOS_PARSEO.items()):
+            lineas.append(f"   {clave}: {paginas} | {segundos / paginas * 1000:.1f} | {tamano / paginas / 1024:.0f}")
+    return "\n".join(lineas)
+
+# Los tiempos registrados en un proceso de parseo quedan en ese proceso: en_proceso los
+# devuelve junto con el resultado y sumar_tiempos los agrega a los del proceso principal
+def _medido(funcion, *args, **kwargs):
+    with _lock:
+        TIEMPOS_PARSEO.clear()   # cada proceso de un pool corre una tarea a la vez
+    resultado = funcion(*args, **kwargs)
+    with _lock:
+        return resultado, {clave: list(t) for clave, t in TIEMPOS_PARSEO.items()}
+
+def en_proceso(funcion):
+    """`funcion` (de nivel de módulo) para un ProcessPoolExecutor: devuelve (resultado, tiempos)"""
+    return functools.partial(_medido, funcion)
+
+def sumar_tiempos(valor):
+    """Suma los tiempos que trae un resultado de en_proceso y devuelve el resultado solo"""
+    if not isinstance(valor, tuple):
+        return valor   # la tarea no llegó a parsear (p. ej. descarga vacía)
+    resultado, tiempos = valor
+    with _lock:
+        for clave, (paginas, segundos, tamano) in tiempos.items():
+            t = TIEMPOS_PARSEO[clave]
+            t[0] += paginas
+            t[1] += segundos
+            t[2] += tamano
+    return resultado
+
+def guardar_pagina(html, carpeta, tienda, producto):
+    """Guarda el HTML descargado para comparar backends offline (ver __main__)"""
+    os.makedirs(carpeta, exist_ok=True)
+    with open(os.path.join(carpeta, f"{tienda}_{producto}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+# ---------------  PARIDAD Y BENCHMARK  ---------------
+def _sin_fecha(filas):
+    return [{k: v for k, v in fila.items() if k != "Fecha_Hora"} for fila in filas]
+
+def comparar_backends(parsear, paginas, backends=BACKENDS, repeticiones=3):
+    """Corre `parsear(html, producto, backend=...)` sobre [(producto, html)] con cada backend,
+    con la página completa y acotada a la raíz.
+
+    Devuelve {variante: (páginas/s, MB/s, pico KB, filas)} y avisa si alguna variante arma
+    filas distintas a las de la primera (la referencia). El pico de memoria es el de
+    tracemalloc: cuenta los objetos Python (árbol bs4), no la memoria interna de lxml/selectolax.
+    """
+    global ACOTAR_A_RAIZ
+    megas = sum(len(html) for _, html in paginas) / 1e6
+    resultados, referencia = {}, None
+    acotar_original = ACOTAR_A_RAIZ
+    try:
+        for backend in backends:
+            if not _disponible(backend):
+                continue
+            for acotado in (False, True):
+                ACOTAR_A_RAIZ = acotado
+                variante = backend + (" +raiz" if acotado else "")
+                tracemalloc.start()
+                filas = [_sin_fecha(parsear(html, producto, backend=backend)) for producto, html in paginas]
+                pico = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+                inicio = time.perf_counter()
+                for _ in range(repeticiones):
+                    for producto, html in paginas:
+                        parsear(html, producto, backend=backend)
+                segundos = (time.perf_counter() - inicio) / repeticiones
+                resultados[variante] = (len(paginas) / segundos, megas / segundos, pico,
+                                        sum(len(f) for f in filas))
+                if referencia is None:
+                    referencia = (variante, filas)
+                elif filas != referencia[1]:
+                    distintas = sum(a != b for a, b in zip(filas, referencia[1]))
+                    print(f"❌ {variante} difiere de {referencia[0]} en {distintas} de {len(paginas)} páginas")
+                else:
+                    print(f"✅ {variante}: mismas filas que {referencia[0]}")
+    finally:
+        ACOTAR_A_RAIZ = acotar_original
+    return resultados
+
+# ---------------  EJECUCIÓN  ---------------
+if __name__ == "__main__":
+    modulo, funcion = sys.argv[1].split(":")
+    parsear = getattr(importlib.import_module(modulo), funcion)
+    paginas = []
+    for ruta in sys.argv[2:]:
+        # Archivos <tienda>_<producto>.html como los deja guardar_pagina
+        producto = os.path.splitext(os.path.basename(ruta))[0].split("_", 1)[-1]
+        with open(ruta, encoding="utf-8") as f:
+            paginas.append((producto, f.read()))
+    for variante, (por_seg, mb_seg, pico, filas) in comparar_backends(parsear, paginas).items():
+        print(f"⏱️ {variante:17} {por_seg:8.1f} páginas/s  {mb_seg:6.1f} MB/s  "
+              f"pico {pico:8.0f} KB  {filas} filas")
+    print(resumen_parseo())
@@ -0,0 +1,134 @@
+#parseo_tiendas.py
+# Parseo de los listados de las tiendas: HTML -> filas (o tarjetas). El módulo no tiene efectos
+# al importarse (ni navegadores, ni caché, ni diccionario de marcas), así que los procesos
+# de parseo del núcleo async (PROCESOS_PARSEO en Scrapper_master.py) lo importan sin volver
+# a ejecutar Scrapper_master. El HTML se guarda (GUARDAR_HTML_EN) antes de llegar aquí,
+# en el proceso principal.
+#
+#   python parseo.py parseo_tiendas:parsear_farmatodo paginas_html/farmatodo_*.html
+# tests/test_parseo.py comprueba sobre páginas guardadas que cada backend arma las mismas filas.
+# ---------------  MÓDULOS  ---------------
+from datetime import datetime
+from parseo import documento
+from extraccion import campos_desde_doc
+
+def _sin_repetidos(filas):
+    """Primera fila de cada (Nombre, Marca), en el orden de la página"""
+    seen = set(); unicos = []
+    for item in filas:
+        clave = (item['Nombre'], item['Marca'])
+        if clave not in seen:
+            seen.add(clave); unicos.append(item)
+    return unicos
+
+# ---------------  FARMATODO  ---------------
+def parsear_farmatodo(html, producto, backend=None):
+    # Mapa de campos de tiendas.py: el mismo que usa la extracción en el navegador
+    doc = documento(html, "farmatodo", backend)
+    return filas_farmatodo(campos_desde_doc(doc, "farmatodo"), producto)
+
+def filas_farmatodo(tarjetas, producto):
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filas = []
+
+    for card in tarjetas:
+        if card["Nombre"] is None:
+            continue
+
+        # ✅ Detectar si está no disponible (el texto del precio se convierte en main, por columna)
+        precio = None if card["NoDisponible"] is not None else card["Precio"]
+
+        filas.append({
+            "Fecha_Hora": fecha,
+            "Origen": "Farmatodo",
+            "Producto_Buscado": producto,
+            "Marca": card["Marca"],
+            "Nombre": card["Nombre"],
+            "Precio": precio
+        })
+
+    return _sin_repetidos(filas)
+
+# ---------------  FARMAGO  ---------------
+def parsear_farmago(html, producto, backend=None):
+    doc = documento(html, "farmago", backend)
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filas = []
+
+    for card in campos_desde_doc(doc, "farmago"):
+        if card["Nombre"] is None:
+            continue
+
+        texto = card["Nombre"]
+
+        # --- extraer marca y limpiar nombre ---
+        marca = None
+        if texto.endswith(")"):
+            idx = texto.rfind("(")
+            if idx != -1:
+                marca = texto[idx+1:-1].strip()
+                texto = texto[:idx].strip()
+
+        filas.append({
+            "Fecha_Hora": fecha,
+            "Origen": "FarmaGo",
+            "Producto_Buscado": producto,
+            "Marca": marca,
+            "Nombre": texto,
+            "Precio": f"Bs. {card['Precio']}" if card["Precio"] is not None else None
+        })
+
+    return _sin_repetidos(filas)
+
+# ---------------  FARMACIAS SAAS  ---------------
+def extraer_precio_farmasas(card):
+    """Extrae el precio de un producto de Farmacias SAAS"""
+    try:
+        entero = card.select_one("span.mat-card-title")
+        fraccion = card.select_one("span.mat-small")
+        if entero and fraccion:
+            entero_text = entero.get_text(strip=True).replace("Bs.", "").strip()
+            fraccion_text = fraccion.get_text(strip=True).replace(",", ".")
+            return f"Bs. {entero_text}.{fraccion_text}"
+        elif entero:
+            return f"Bs. {entero.get_text(strip=True).replace('Bs.', '').strip()}"
+    except Exception as e:
+        print(f"Error extrayendo precio: {e}")
+    return None
+
+def tarjetas_farmasas(html, backend=None):
+    """[(nombre, precio, enlace relativo)] del listado; el fabricante sale después de cada ficha"""
+    soup = documento(html, "farmasas", backend)
+    contenedores = soup.select("div.contenedor-informacion")
+    print(f"Encontrados {len(contenedores)} contenedores de productos")
+    tarjetas = []
+    for card in contenedores:
+        try:
+            nombre_elem = card.select_one("mat-card-title.titulo a")
+            if not nombre_elem:
+                continue
+            texto_nombre = nombre_elem.get_text(strip=True)
+            # Extraer precio con la función mejorada
+            precio_text = extraer_precio_farmasas(card)
+            print(f"Precio extraído para {texto_nombre}: {precio_text}")
+            # Guardar el enlace para visitar después
+            enlace_relativo = nombre_elem.get('href')
+            if enlace_relativo:
+                tarjetas.append((texto_nombre, precio_text, enlace_relativo))
+                print(f"Producto añadido: {texto_nombre}")
+        except Exception as e:
+            print(f"Error procesando tarjeta de producto: {e}")
+            continue
+    print(f"Total de enlaces a visitar: {len(tarjetas)}")
+    return tarjetas
+
+# ---------------  FARMATINA  ---------------
+def productos_farmatina(html, backend=None):
+    """[(nombre, precio)] de las tarjetas con nombre y precio de una página, en orden"""
+    productos = []
+    for producto in documento(html, "farmatina", backend).select("li.product-warp-item"):
+        nombre = producto.select_one("a.woocommerce-loop-product__title")
+        precio = producto.select_one("span.woocommerce-Price-amount")
+        if nombre and precio:
+            productos.append((nombre.text.strip(), precio.text.strip()))
+    return productos
@@ -0,0 +1,84 @@
+#perfil_selectores.py
+# ---------------  MÓDULOS  ---------------
+from collections import defaultdict, Counter
+import json, os
+
+# ---------------  PERFIL POR SITIO  ---------------
+class PerfilSelectores:
+    """Recuerda qué selectores (o métodos) funcionaron en la última corrida exitosa de un sitio.
+
+    En la corrida siguiente se prueban primero esos; la cascada completa sólo corre
+    cuando ninguno de los aprendidos da resultado (fallo). El perfil se guarda en JSON
+    sólo al llamar a `guardar()`, es decir, si la corrida terminó bien.
+    """
+
+    def __init__(self, ruta, sitio):
+        self.ruta = ruta
+        self.sitio = sitio
+        self.perfil = {}
+        if os.path.isfile(ruta):
+            try:
+                with open(ruta, encoding="utf-8") as f:
+                    self.perfil = json.load(f).get(sitio, {})
+            except (OSError, ValueError):
+                pass
+        self._usados = defaultdict(Counter)          # grupo -> selector -> veces que funcionó
+        self.aciertos = Counter()                     # grupo -> resueltos con lo aprendido
+        self.fallos = Counter()                       # grupo -> hizo falta la cascada
+
+    def _aprendidos(self, grupo, candidatos):
+        return [c for c in self.perfil.get(grupo, []) if c in candidatos]
+
+    def primero(self, grupo, candidatos, probar):
+        """(candidato, resultado) del primero cuyo `probar(candidato)` no es vacío; (None, None) si ninguno"""
+        aprendidos = self._aprendidos(grupo, candidatos)
+        for candidato in aprendidos + [c for c in candidatos if c not in aprendidos]:
+            resultado = probar(candidato)
+            if resultado:
+                if candidato in aprendidos:
+                    self.aciertos[grupo] += 1
+                else:
+                    self.fallos[grupo] += 1
+                self._usados[grupo][candidato] += 1
+                return candidato, resultado
+        self.fallos[grupo] += 1
+        return None, None
+
+    def todos(self, grupo, candidatos, probar):
+        """Une los resultados (listas) de los aprendidos; si no dan nada, de toda la cascada"""
+        aprendidos = self._aprendidos(grupo, candidatos)
+        for lista, acierto in ((aprendidos, True), (candidatos, False)):
+            resultados = []
+            for candidato in lista:
+                encontrados = probar(candidato)
+                if encontrados:
+                    resultados.extend(encontrados)
+                    self._usados[grupo][candidato] += 1
+            if resultados:
+                (self.aciertos if acierto else self.fallos)[grupo] += 1
+                return resultados
+        self.fallos[grupo] += 1
+        return []
+
+    def guardar(self):
+        """Persiste lo usado en esta corrida (más frecuente primero) junto a los demás sitios"""
+        datos = {}
+        if os.path.isfile(self.ruta):
+            try:
+                with open(self.ruta, encoding="utf-8") as f:
+                    datos = json.load(f)
+            except (OSError, ValueError):
+                pass
+        perfil = dict(self.perfil)
+        for grupo, usados in self._usados.items():
+            perfil[grupo] = [c for c, _ in usados.most_common()]
+        datos[self.sitio] = perfil
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+
+    def resumen(self):
+        partes = []
+        for grupo in sorted(set(self.aciertos) | set(self.fallos)):
+            total = self.aciertos[grupo] + self.fallos[grupo]
+            partes.append(f"{grupo}: {self.aciertos[grupo]}/{total} ({self.aciertos[grupo] / total:.0%})")
+        return f"🎯 Perfil de selectores {self.sitio} (aciertos): " + (", ".join(partes) or "sin uso")
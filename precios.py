@@ -0,0 +1,178 @@
+#precios.py
+# Conversión de precios en texto ("Bs. 1.427,75", "Bs.1.060.97", "123.45") a float, para
+# todas las tiendas. La versión por columna (precios_columna) trabaja sobre la Serie
+# completa con las regex de pyarrow.compute (o los métodos .str de pandas si no está),
+# con los mismos patrones que la versión de a uno (limpiar_precio): mismo resultado.
+#
+# Reglas:
+#   - Si el texto trae varios precios (SAAS: "Bs. 351,Bs. 456,48", tachado + actual)
+#     vale el último.
+#   - "Bs." detrás del número ("118,75 Bs.", Farmatina) no cuenta como otro precio.
+#   - Un separador ("." o ",") seguido de 1 o 2 dígitos al final es el decimal; todos
+#     los demás son de miles: "1.060.97" -> 1060.97, "1.427,75" -> 1427.75,
+#     "1,234.56" -> 1234.56, "982,7" -> 982.7. Un solo separador con 3 dígitos detrás
+#     también es de miles (en bolívares no hay milésimas): "1.060" -> 1060.0, "12,345" -> 12345.0
+#   - Un espacio (también el no separable) seguido de 3 dígitos es de miles:
+#     "Bs. 1 427,75" -> 1427.75. Cualquier otro espacio corta el número.
+#   - Un separador al comienzo es el decimal: ".5" -> 0.5
+#   - Los valores que ya son números se dejan como están.
+# Los fallos no se imprimen: se cuentan y se ven con resumen_precios().
+#
+#   python precios.py 3000000        (benchmark: columna vs fila a fila)
+# ---------------  MÓDULOS  ---------------
+import math, re, sys, threading, time
+import numpy as np
+import pandas as pd
+
+# Pasos (patrón -> reemplazo), los mismos en Python, pandas y Arrow (RE2): sólo se usa
+# sintaxis común a ambos motores ([0-9] en vez de \d, que en Python acepta otros dígitos)
+_ESPACIOS = " \u00a0\u202f"   # espacio, no separable y fino: de miles si siguen 3 dígitos
+_ANTES_DEL_ULTIMO = (r"^.*Bs\.([^A-Za-z]*[0-9])", r"\1")          # varios precios: vale el último
+_NUMERO = (rf"^(?:[^0-9]*[^0-9.,])?([.,]?[0-9](?:[0-9]|[.,][0-9]|[{_ESPACIOS}][0-9]{{3}})*).*$",
+           r"\1")                                                  # primer número del segmento
+_ES_NUMERO = r"^[0-9]"                                            # al final: si no, no traía número
+_DECIMAL = (r"[.,]([0-9]{1,2})$", r"_\1")                         # marca el separador decimal
+_MILES = (f"[.,{_ESPACIOS}]", "")                                # los demás son de miles
+_CERO = (r"^_", "0_")                                            # ".5": Arrow no convierte "_5" -> ".5"
+PASOS = [_ANTES_DEL_ULTIMO, _NUMERO, _DECIMAL, _MILES, _CERO]
+_PASOS_RE = [(re.compile(patron), reemplazo) for patron, reemplazo in PASOS]
+_RE_ES_NUMERO = re.compile(_ES_NUMERO)
+
+# ---------------  CONTADORES  ---------------
+ESTADISTICAS = {"convertidos": 0, "fallidos": 0}
+EJEMPLOS_FALLIDOS = []        # los primeros textos que no se pudieron convertir
+_MAX_EJEMPLOS = 5
+_lock = threading.Lock()
+
+def _contar(convertidos, fallidos=()):
+    with _lock:
+        ESTADISTICAS["convertidos"] += convertidos
+        ESTADISTICAS["fallidos"] += len(fallidos)
+        for texto in fallidos:
+            if len(EJEMPLOS_FALLIDOS) >= _MAX_EJEMPLOS:
+                break
+            EJEMPLOS_FALLIDOS.append(texto)
+
+def resumen_precios():
+    with _lock:
+        linea = f"💲 Precios: {ESTADISTICAS['convertidos']} convertidos, {ESTADISTICAS['fallidos']} sin convertir"
+        if EJEMPLOS_FALLIDOS:
+            linea += " (p. ej. " + ", ".join(repr(t) for t in EJEMPLOS_FALLIDOS) + ")"
+    return linea
+
+def _es_numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+# ---------------  DE A UNO  ---------------
+def _convertir(texto):
+    for patron, reemplazo in _PASOS_RE:
+        texto = patron.sub(reemplazo, texto)
+    return float(texto.replace("_", ".")) if _RE_ES_NUMERO.match(texto) else None
+
+def limpiar_precio(precio_str):
+    """Precio como float (None si viene vacío o no se reconoce)"""
+    if _es_numero(precio_str):
+        return None if math.isnan(precio_str) else float(precio_str)
+    if not precio_str:
+        return None
+    valor = _convertir(str(precio_str))
+    _contar(1, []) if valor is not None else _contar(0, [precio_str])
+    return valor
+
+# ---------------  POR COLUMNA  ---------------
+# Con pyarrow las regex corren en C++ (RE2, misma semántica para estos patrones);
+# sin él, con los métodos .str de pandas. En ambos casos sólo sobre los textos distintos.
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+def _convertir_arrow(textos):
+    textos = pa.array(textos, type=pa.string())
+    for patron, reemplazo in PASOS:
+        textos = pc.replace_substring_regex(textos, patron, reemplazo)
+    textos = pc.replace_substring(textos, "_", ".")
+    validos = pc.match_substring_regex(textos, _ES_NUMERO)
+    textos = pc.if_else(validos, textos, pa.scalar(None, pa.string()))
+    return pc.cast(textos, pa.float64()).to_numpy(zero_copy_only=False)
+
+def _convertir_pandas(textos):
+    textos = pd.Series(textos, dtype="string")
+    for patron, reemplazo in PASOS:
+        textos = textos.str.replace(patron, reemplazo, regex=True)
+    textos = textos.str.replace("_", ".", regex=False).where(textos.str.match(_ES_NUMERO))
+    return pd.to_numeric(textos, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def precios_columna(serie):
+    """Serie float equivalente a aplicar limpiar_precio a cada valor, sin recorrerla en Python.
+
+    Los precios se repiten mucho (mismo producto en varias búsquedas y corridas), así
+    que la columna se factoriza y las regex corren una vez por texto distinto.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    numeros = None
+    if pd.api.types.is_object_dtype(serie):
+        # Columnas object: los números se respetan y sólo se convierten los textos
+        es_numero = serie.map(_es_numero).astype(bool)
+        if es_numero.any():
+            numeros = pd.to_numeric(serie.where(es_numero), errors="coerce")
+            serie = serie.where(~es_numero)
+    codigos, unicos = pd.factorize(serie.astype("string"))
+    unicos = np.asarray(unicos, dtype=object)
+    # Un lugar extra al final para los nulos (código -1)
+    por_texto = np.append(_convertir_arrow(unicos) if pc else _convertir_pandas(unicos), np.nan)
+    con_texto = np.append(unicos != "", False)
+    valores = por_texto[codigos]
+    con_texto = con_texto[codigos]
+
+    fallidos = con_texto & np.isnan(valores)
+    _contar(int(con_texto.sum() - fallidos.sum()), [unicos[c] for c in codigos[fallidos][:_MAX_EJEMPLOS]])
+    resultado = pd.Series(valores, index=serie.index, name=serie.name)
+    return resultado if numeros is None else resultado.fillna(numeros)
+
+# ---------------  BENCHMARK  ---------------
+# Formatos vistos en las tiendas (y en scraping_farmacias.log)
+FORMATOS = [lambda e, c: f"Bs. {e:,}".replace(",", ".") + f",{c:02d}",     # Bs. 1.427,75
+            lambda e, c: f"Bs.{e:,}".replace(",", ".") + f".{c:02d}",      # Bs.1.060.97 (Farmatodo)
+            lambda e, c: f"Bs. {e // 2},Bs. {e:,}".replace(",", ".").replace(".Bs", ",Bs") + f",{c}",  # SAAS
+            lambda e, c: f"{e}.{c:02d}",                                   # 123.45 (Farmadon)
+            lambda e, c: f"{e:,}.{c:02d}",                                 # 1,234.56
+            lambda e, c: f"Bs. {e:,}".replace(",", " ") + f",{c:02d}",     # Bs. 1 427,75
+            lambda e, c: "Agotado",
+            lambda e, c: None]
+
+def muestras(n, semilla=0):
+    """`n` textos de precio al azar con los FORMATOS de arriba"""
+    azar = np.random.default_rng(semilla)
+    enteros = azar.integers(1, 50_000, n).tolist()
+    centimos = azar.integers(0, 100, n).tolist()
+    formatos = azar.integers(0, len(FORMATOS), n).tolist()
+    return pd.Series([FORMATOS[f](e, c) for f, e, c in zip(formatos, enteros, centimos)], dtype=object)
+
+def benchmark(n=1_000_000):
+    """Tiempo de precios_columna frente a limpiar_precio fila a fila sobre `n` textos"""
+    serie = muestras(n)
+    variantes = [("string", serie.astype("string"))]
+    try:
+        variantes.append(("arrow", serie.astype("string[pyarrow]")))
+    except ImportError:
+        pass
+
+    inicio = time.perf_counter()
+    fila_a_fila = pd.Series([limpiar_precio(p) for p in serie], dtype=float)
+    base = time.perf_counter() - inicio
+    print(f"⏱️ fila a fila      {base:7.2f} s  {n / base / 1e6:6.2f} M/s")
+    for nombre, columna in variantes:
+        inicio = time.perf_counter()
+        resultado = precios_columna(columna)
+        segundos = time.perf_counter() - inicio
+        iguales = resultado.reset_index(drop=True).equals(fila_a_fila)
+        print(f"⏱️ columna {nombre:8} {segundos:7.2f} s  {n / segundos / 1e6:6.2f} M/s  "
+              f"x{base / segundos:.1f}  {'✅ iguales' if iguales else '❌ difieren'}")
+    print(resumen_precios())
+
+# ---------------  EJECUCIÓN  ---------------
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
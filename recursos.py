@@ -0,0 +1,80 @@
+#recursos.py
+# Bloqueo de imágenes, fuentes, media y trackers vía CDP (Network.setBlockedURLs).
+# Sólo leemos texto de page_source, así que todo eso es ancho de banda perdido (y más
+# aún por el proxy). Cada tienda puede ajustar la lista en tiendas.py si algo se rompe.
+# ---------------  MÓDULOS  ---------------
+from collections import defaultdict
+import threading
+
+# ---------------  PATRONES  ---------------
+EXTENSIONES_BLOQUEADAS = [
+    # Imágenes
+    "png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "avif",
+    # Fuentes
+    "woff", "woff2", "ttf", "otf", "eot",
+    # Media
+    "mp4", "webm", "mp3", "m3u8",
+]
+
+def _por_extension(extension):
+    """"*.png" y "*.png?*": los CDN suelen agregar ?v=... o ?ver=..."""
+    return [f"*.{extension}", f"*.{extension}?*"]
+
+BLOQUEO_BASE = [patron for extension in EXTENSIONES_BLOQUEADAS for patron in _por_extension(extension)] + [
+    # Analítica y publicidad
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.*", "*hotjar.com*", "*clarity.ms*",
+    "*tiktok.com*", "*onesignal.com*", "*newrelic.com*", "*nr-data.net*",
+]
+
+def patrones_bloqueo(config_tienda):
+    """BLOQUEO_BASE menos lo que la tienda permite, más lo que la tienda bloquea.
+
+    Permitir "*.svg" permite también su variante con query string ("*.svg?*").
+    """
+    config = config_tienda.get("recursos", {})
+    permitir = set(config.get("permitir", []))
+    permitir |= {p + "?*" for p in permitir if not p.endswith("*")}
+    return [p for p in BLOQUEO_BASE if p not in permitir] + list(config.get("bloquear", []))
+
+# ---------------  APLICACIÓN POR DRIVER  ---------------
+_lock = threading.Lock()
+
+def bloquear_recursos(driver, tienda, config_tienda):
+    """Activa los patrones de `tienda` en el driver (no repite la llamada CDP si ya están)"""
+    if getattr(driver, "_bloqueo_tienda", None) == tienda:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patrones_bloqueo(config_tienda)})
+    except Exception as e:
+        print(f"⚠️ No se pudo activar el bloqueo de recursos ({tienda}): {e}")
+        return
+    driver._bloqueo_tienda = tienda
+
+# ---------------  CONSUMO POR PÁGINA  ---------------
+CONSUMO = defaultdict(lambda: [0, 0, 0])   # tienda -> [páginas, solicitudes, bytes]
+
+def registrar_consumo(driver, tienda):
+    """Suma solicitudes y bytes transferidos de la página actual (Resource Timing API)"""
+    try:
+        solicitudes, transferido = driver.execute_script("""
+            const e = performance.getEntriesByType('navigation')
+                        .concat(performance.getEntriesByType('resource'));
+            return [e.length, e.reduce((s, x) => s + (x.transferSize || 0), 0)];
+        """)
+    except Exception:
+        return
+    with _lock:
+        c = CONSUMO[tienda]
+        c[0] += 1
+        c[1] += solicitudes
+        c[2] += transferido
+
+def resumen_consumo():
+    lineas = ["📶 Consumo por tienda (páginas | solicitudes/pág | KB/pág):"]
+    with _lock:
+        for tienda, (paginas, solicitudes, transferido) in sorted(CONSUMO.items()):
+            lineas.append(f"   {tienda}: {paginas} | {solicitudes / paginas:.0f} | "
+                          f"{transferido / paginas / 1024:.0f}")
+    return "\n".join(lineas)
@@ -0,0 +1,139 @@
+#sumidero.py
+# Sumidero de filas en disco con punto de control, para no perder una corrida larga.
+# Cada (tienda, término) que termina se agrega de inmediato a filas.jsonl (flush + fsync)
+# y se anota en manifiesto.json junto con el tamaño del archivo hasta ahí. Si el proceso
+# muere, la corrida siguiente retoma la misma carpeta: recorta filas.jsonl al último
+# tamaño anotado (descarta un pedazo escrito a medias) y salta los pares ya completos.
+# Las filas no se acumulan en memoria mientras se scrapea; se leen al final, agrupadas por
+# par en el orden de los trabajos (no en el de llegada, que depende de los tiempos): cada
+# par anota en el manifiesto dónde empieza su bloque y se lee de a una fila desde ahí.
+# Después de escribir la base y el histórico se anota "guardada": si algo falla más tarde
+# (normalización, Excel abierto...), al retomar no se busca ni se guarda otra vez, sólo se
+# completan los pasos siguientes. Por si el corte cae entre la escritura y la anotación,
+# la base y el histórico usan `clave` (el nombre de la carpeta) para no duplicar la corrida.
+#
+#   corridas/20250301-101500/filas.jsonl
+#   corridas/20250301-101500/manifiesto.json   {"completados": [[tienda, término, n, byte], ...], "bytes": N,
+#                                               "guardada": false, "terminada": false}
+# ---------------  MÓDULOS  ---------------
+from datetime import datetime
+import json, os, threading
+
+# ---------------  SUMIDERO  ---------------
+class SumideroFilas:
+    """Filas de una corrida en JSONL con manifiesto de pares (tienda, término) completados."""
+
+    def __init__(self, carpeta_base, retomar=True):
+        os.makedirs(carpeta_base, exist_ok=True)
+        pendiente = self._sin_terminar(carpeta_base) if retomar else None
+        self.carpeta = pendiente or os.path.join(carpeta_base, datetime.now().strftime("%Y%m%d-%H%M%S"))
+        self.clave = os.path.basename(self.carpeta)   # identifica la corrida en la base y el histórico
+        os.makedirs(self.carpeta, exist_ok=True)
+        self._ruta_filas = os.path.join(self.carpeta, "filas.jsonl")
+        self._ruta_manifiesto = os.path.join(self.carpeta, "manifiesto.json")
+        self._lock = threading.Lock()
+        self.manifiesto = {"completados": [], "bytes": 0, "guardada": False, "terminada": False}
+        if os.path.isfile(self._ruta_manifiesto):
+            with open(self._ruta_manifiesto, encoding="utf-8") as f:
+                self.manifiesto = json.load(f)
+        # Lo escrito después del último punto de control no está confirmado
+        with open(self._ruta_filas, "a+b") as f:
+            f.truncate(self.manifiesto["bytes"])
+        self._hechos = {(t, p) for t, p, *_ in self.manifiesto["completados"]}
+        if pendiente:
+            print(f"♻️ Retomando corrida {self.carpeta}: {len(self._hechos)} pares ya completos"
+                  + (", ya guardada" if self.guardada else ""))
+
+    @staticmethod
+    def _sin_terminar(carpeta_base):
+        """Carpeta de la corrida más reciente que no llegó a terminar (o None)"""
+        for nombre in sorted(os.listdir(carpeta_base), reverse=True):
+            ruta = os.path.join(carpeta_base, nombre, "manifiesto.json")
+            if os.path.isfile(ruta):
+                with open(ruta, encoding="utf-8") as f:
+                    return None if json.load(f)["terminada"] else os.path.dirname(ruta)
+        return None
+
+    def _guardar_manifiesto(self):
+        temporal = self._ruta_manifiesto + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.manifiesto, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self._ruta_manifiesto)
+
+    @property
+    def guardada(self):
+        return self.manifiesto.get("guardada", False)
+
+    def completado(self, tienda, termino):
+        """Par ya escrito, o corrida ya guardada (no se busca más aunque falten pares)"""
+        return self.guardada or (tienda, termino) in self._hechos
+
+    def agregar(self, tienda, termino, filas):
+        """Escribe las filas de un par y recién después lo anota como completado.
+
+        Un par sin filas (búsqueda fallida o vacía) no se anota: al retomar se vuelve a intentar.
+        """
+        if not filas:
+            return 0
+        with self._lock:
+            desde = self.manifiesto["bytes"]
+            with open(self._ruta_filas, "ab") as f:
+                for fila in filas:
+                    f.write(json.dumps(fila, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self.manifiesto["bytes"] = f.tell()
+            self.manifiesto["completados"].append([tienda, termino, len(filas), desde])
+            self._hechos.add((tienda, termino))
+            self._guardar_manifiesto()
+        return len(filas)
+
+    def filas(self, orden=None):
+        """Itera las filas confirmadas, una por vez (en el orden en que llegaron).
+
+        Con `orden` ([(tienda, término), ...]) salen agrupadas por par en ese orden: así la
+        fila que queda de un repetido no depende de qué búsqueda terminó antes. Tampoco así
+        se cargan los bloques: se salta al byte de cada par y se leen sus n filas.
+        """
+        with open(self._ruta_filas, "rb") as f:
+            if orden is None:
+                for linea in f:
+                    yield json.loads(linea)
+                return
+            bloques = dict(self._bloques(f))
+            for par in [tuple(par) for par in orden] + list(bloques):
+                if par in bloques:
+                    n, desde = bloques.pop(par)
+                    f.seek(desde)
+                    for _ in range(n):
+                        yield json.loads(f.readline())
+
+    def _bloques(self, f):
+        """((tienda, término), (n, byte de inicio)) de cada par completo.
+
+        Manifiestos anteriores al byte de inicio: cada par se escribió entero y seguido, así
+        que se cuentan las líneas una vez para ubicarlos.
+        """
+        for t, p, n, *desde in self.manifiesto["completados"]:
+            if not desde:
+                desde = [f.tell()]
+                for _ in range(n):
+                    f.readline()
+            yield (t, p), (n, desde[0])
+
+    def cantidad(self):
+        return sum(n for _, _, n, *_ in self.manifiesto["completados"])
+
+    def marcar_guardada(self):
+        """Anota que la base y el histórico ya recibieron las filas de la corrida"""
+        with self._lock:
+            self.manifiesto["guardada"] = True
+            self._guardar_manifiesto()
+
+    def terminar(self):
+        """Marca la corrida como terminada: la próxima arranca una carpeta nueva"""
+        with self._lock:
+            self.manifiesto["terminada"] = True
+            self._guardar_manifiesto()
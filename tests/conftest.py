@@ -0,0 +1,11 @@
+#conftest.py
+# Los módulos del proyecto están en la raíz del repositorio (sin paquete)
+import os, sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(RAIZ, "tests", "fixtures")
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "navegador: necesita Chrome headless (se salta si no hay)")
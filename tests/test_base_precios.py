@@ -0,0 +1,68 @@
+#test_base_precios.py
+import pandas as pd
+from base_precios import BasePrecios
+
+def _corrida(filas, fecha="2025-03-01 10:00:00"):
+    return pd.DataFrame([{"Fecha_Hora": fecha, "Origen": o, "Producto_Buscado": "x",
+                          "Marca": None, "Nombre": n, "Precio": p} for o, n, p in filas])
+
+def test_ultimos_precios_literal_y_orden(tmp_path):
+    base = BasePrecios(str(tmp_path / "base.sqlite"))
+    base.registrar_corrida(_corrida([("Farmatodo", "ALCOHOL 70% 250ML", None),
+                                     ("Farmatodo", "ALCOHOL 70% 1L", 40.0),
+                                     ("Farmatodo", "ALCOHOL 700ML", 10.0),
+                                     ("FarmaGo", "GEL_ANTIBACTERIAL", 30.0),
+                                     ("FarmaGo", "GELXANTIBACTERIAL", 20.0)]))
+    # % y _ no son comodines; los sin precio al final
+    assert list(base.ultimos_precios("70%")["Nombre"]) == ["ALCOHOL 70% 1L", "ALCOHOL 70% 250ML"]
+    assert list(base.ultimos_precios("GEL_")["Nombre"]) == ["GEL_ANTIBACTERIAL"]
+    assert list(base.ultimos_precios("ALCOHOL 700ML", exacto=True)["Precio"]) == [10.0]
+    plan = " ".join(str(r) for r in base._con.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM productos p WHERE p.nombre = ?", ("x",)))
+    assert "idx_productos_nombre" in plan
+    base.cerrar()
+
+def test_repetido_en_la_corrida_queda_el_primero(tmp_path):
+    base = BasePrecios(str(tmp_path / "base.sqlite"))
+    corrida = base.registrar_corrida(_corrida([("Farmatodo", "DICLOFENAC 50MG", 10.0),
+                                               ("Farmatodo", "DICLOFENAC 50MG", 12.0)]))
+    assert list(base.filas_corrida(corrida)["Precio"]) == [10.0]   # como drop_duplicates
+    base.cerrar()
+
+def _serie(base):
+    return [(r.Corrida, r.Nombre, None if pd.isna(r.Precio) else r.Precio) for r in base.serie().itertuples()]
+
+def _tres_corridas(base):
+    # P2 no sale en la corrida 2 aunque su búsqueda (Farmatodo, "x") se hizo;
+    # en la 3 FarmaGo no se scrapea: Q se sigue arrastrando
+    base.registrar_corrida(_corrida([("Farmatodo", "P1", 10.0), ("Farmatodo", "P2", 5.0), ("FarmaGo", "Q", 7.0)]))
+    base.registrar_corrida(_corrida([("Farmatodo", "P1", 10.0), ("FarmaGo", "Q", 7.0)]))
+    base.registrar_corrida(_corrida([("Farmatodo", "P1", 10.0), ("Farmatodo", "P2", 5.0)]))
+
+ESPERADA = [(1, "Q", 7.0), (1, "P1", 10.0), (1, "P2", 5.0),
+            (2, "Q", 7.0), (2, "P1", 10.0),
+            (3, "P1", 10.0), (3, "P2", 5.0)]
+
+def test_ausente_corta_la_serie_en_los_dos_modos(tmp_path):
+    for cdc in (False, True):
+        base = BasePrecios(str(tmp_path / f"base_{cdc}.sqlite"), cdc=cdc)
+        _tres_corridas(base)
+        assert _serie(base) == ESPERADA
+        # La corrida completa (lo que va al histórico en Parquet)
+        assert list(base.serie(corrida=2)["Nombre"]) == ["Q", "P1"]
+        assert list(base.ultimos_precios("P2")["Ausente"]) == [0]
+        base.cerrar()
+
+def test_ausente_en_estado_y_compactar(tmp_path):
+    base = BasePrecios(str(tmp_path / "base.sqlite"))
+    base.registrar_corrida(_corrida([("Farmatodo", "P1", 10.0), ("Farmatodo", "P2", None)]))
+    base.registrar_corrida(_corrida([("Farmatodo", "P1", 10.0)]))
+    assert list(base.ultimos_precios("P2")["Ausente"]) == [1]
+    assert list(base.historial_producto("Farmatodo", "P2")["Ausente"]) == [0, 1]
+    base.registrar_corrida(_corrida([("Farmatodo", "P1", 10.0), ("Farmatodo", "P2", None)]))
+    antes = _serie(base)
+    # La ausencia (precio NULL) entre dos "sin precio" no es un repetido
+    assert base.compactar() == 2
+    assert _serie(base) == antes == [(1, "P1", 10.0), (1, "P2", None), (2, "P1", 10.0),
+                                     (3, "P1", 10.0), (3, "P2", None)]
+    base.cerrar()
@@ -0,0 +1,55 @@
+#test_captura_api.py
+# Reproducción offline de respuestas grabadas (formato de captura_api.grabar)
+import json, os
+from conftest import FIXTURES
+from captura_api import cargar_grabacion, capturar_respuestas, filas_desde_api, claves_api
+from precios import limpiar_precio
+from tiendas import TIENDAS
+
+FECHA = "2025-03-01 10:00:00"
+
+def _filas(archivo, tienda, origen):
+    capturas = cargar_grabacion(os.path.join(FIXTURES, "api", archivo))
+    filas = filas_desde_api(capturas, TIENDAS[tienda]["api"], origen, "Diclofenac", limpiar_precio, fecha=FECHA)
+    return [(f["Nombre"], f["Marca"], f["Precio"]) for f in filas]
+
+def test_farmatodo_replay():
+    assert _filas("farmatodo_diclofenac.json", "farmatodo", "Farmatodo") == [
+        ("Diclofenac Potásico 50 mg x 20 Tabletas", "Genven", 125.5),
+        ("Diclofenac Sódico 75 mg/3 ml x 5 Ampollas", "Calox", 98.1),
+        ("Diclofenac Gel 1% x 50 g", None, 210.0),
+    ]
+
+def test_farmasas_replay():
+    # La respuesta de categorías coincide con el patrón pero no trae precio: no arma filas
+    assert _filas("farmasas_diclofenac.json", "farmasas", "Farmacias SAAS") == [
+        ("DICLOFENAC POTASICO 50MG X 20 TAB", "GENVEN", 351.48),
+        ("DICLOFENAC SODICO 100MG X 10 CAP", "LETI", 389.9),
+        ("DICLOFENAC GEL 1% 60G", None, 1060.97),   # fabricante sin nombre: no se escribe el dict
+    ]
+
+def test_claves_solo_productos():
+    capturas = cargar_grabacion(os.path.join(FIXTURES, "api", "farmasas_diclofenac.json"))
+    claves = set().union(*(claves_api(c["json"], TIENDAS["farmasas"]["api"]) for c in capturas))
+    assert claves == {"A0102", "A0107", "A0110"}
+
+class _DriverFalso:
+    """Sólo Network.getResponseBody, con los cuerpos por requestId"""
+    def __init__(self, cuerpos):
+        self.cuerpos = cuerpos
+
+    def execute_cdp_cmd(self, comando, params):
+        assert comando == "Network.getResponseBody"
+        return {"body": json.dumps(self.cuerpos[params["requestId"]])}
+
+def test_captura_solo_endpoints_de_producto():
+    urls = {"1": "https://tienda.farmaciasaas.com/api/productos/buscar?texto=diclofenac&pagina=0",
+            "2": "https://tienda.farmaciasaas.com/api/configuracion",
+            "3": "https://tienda.farmaciasaas.com/api/usuarios/sesion",
+            "4": "https://otra.com/api/productos/buscar"}
+    mensajes = [{"method": "Network.responseReceived",
+                 "params": {"requestId": i, "response": {"url": url, "status": 200, "mimeType": "application/json"}}}
+                for i, url in urls.items()]
+    driver = _DriverFalso({i: {"data": []} for i in urls})
+    capturas = capturar_respuestas(driver, TIENDAS["farmasas"]["api"]["patrones"], mensajes)
+    assert [c["url"] for c in capturas] == [urls["1"]]
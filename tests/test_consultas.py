@@ -0,0 +1,70 @@
+#test_consultas.py
+# Agregados incrementales de consultas.py contra un groupby completo, con el histórico
+# alimentado como en Scrapper_master (modo sólo cambios: a Parquet va la corrida completa)
+import pandas as pd
+from base_precios import BasePrecios
+from historial import guardar_corrida
+from consultas import AgregadosPrecios, TODAS
+from normaliza import agregar_componentes
+
+CORRIDAS = [
+    ("2025-03-01 09:00:00", [("Farmatodo", "Diclofenac Potásico 50mg x 20 Tab Genven", 120.0),
+                             ("Farmatodo", "Diclofenac Sódico 75mg x 5 Amp Calox", 98.0),
+                             ("FarmaGo", "DICLOFENAC POTASICO 50MG X 20 TAB", 130.0)]),
+    ("2025-03-01 18:00:00", [("Farmatodo", "Diclofenac Potásico 50mg x 20 Tab Genven", 110.0),
+                             ("Farmatodo", "Diclofenac Sódico 75mg x 5 Amp Calox", 98.0),
+                             ("FarmaGo", "DICLOFENAC POTASICO 50MG X 20 TAB", 130.0)]),
+    ("2025-03-02 09:00:00", [("Farmatodo", "Diclofenac Potásico 50mg x 20 Tab Genven", 110.0),
+                             ("Farmatodo", "Diclofenac Sódico 75mg x 5 Amp Calox", 98.0),
+                             ("FarmaGo", "DICLOFENAC POTASICO 50MG X 20 TAB", 130.0)]),
+    ("2025-03-03 09:00:00", [("Farmatodo", "Diclofenac Sódico 75mg x 5 Amp Calox", 95.0),
+                             ("FarmaGo", "DICLOFENAC POTASICO 50MG X 20 TAB", None)]),
+]
+
+def _df(fecha, filas):
+    return pd.DataFrame([{"Fecha_Hora": fecha, "Origen": o, "Producto_Buscado": "Diclofenac",
+                          "Marca": None, "Nombre": n, "Precio": p} for o, n, p in filas])
+
+def _correr(tmp_path):
+    base = BasePrecios(str(tmp_path / "base.sqlite"), cdc=True)
+    agregados = AgregadosPrecios(str(tmp_path / "historial"), str(tmp_path / "agregados.sqlite"))
+    completas = []
+    for fecha, filas in CORRIDAS:
+        corrida = base.registrar_corrida(_df(fecha, filas))
+        df = base.serie(corrida=corrida).drop(columns="Corrida")
+        # Fecha_Hora de las filas sin cambio: la de la corrida; aquí la de la prueba
+        df["Fecha_Hora"] = fecha
+        guardar_corrida(df, str(tmp_path / "historial"))
+        agregados.actualizar()
+        completas.append(df)
+    base.cerrar()
+    return agregados, pd.concat(completas, ignore_index=True)
+
+def test_diarios_como_groupby_completo(tmp_path):
+    agregados, todas = _correr(tmp_path)
+    todas = agregar_componentes(todas.assign(fecha=todas["Fecha_Hora"].str[:10]))
+    con_precio = todas.dropna(subset=["Precio", "principio", "dosis"])
+    for origen in (None, "Origen"):
+        claves = ["fecha", "principio", "dosis"] + ([origen] if origen else [])
+        esperado = (con_precio.groupby(claves)["Precio"].agg(minimo="min", mediana="median", maximo="max", n="size")
+                    .reset_index())
+        if not origen:
+            esperado["Origen"] = TODAS
+        obtenido = agregados.diarios("diclofenac", origen=TODAS if not origen else None)
+        obtenido = obtenido[["fecha", "principio", "dosis", "Origen", "minimo", "mediana", "maximo", "n"]]
+        esperado = esperado[obtenido.columns].sort_values(["fecha", "dosis", "Origen"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(obtenido.reset_index(drop=True), esperado, check_dtype=False)
+    agregados.cerrar()
+
+def test_mas_barato_incluye_productos_estables(tmp_path):
+    agregados, _ = _correr(tmp_path)
+    # El Sódico de Farmatodo no cambia hasta el día 3: igual cuenta los días 1 y 2
+    dias = agregados.diarios("diclofenac", dosis="75mg", origen="Farmatodo")
+    assert list(dias["fecha"]) == ["2025-03-01", "2025-03-02", "2025-03-03"]
+    barato = agregados.mas_barato("diclofenac", dosis="50mg", desde="2025-03-02")
+    assert list(zip(barato["Origen"], barato["minimo"])) == [("Farmatodo", 110.0), ("FarmaGo", 130.0)]
+    ultimos = agregados.ultimos("diclofenac", origen="Farmatodo")
+    # El Potásico no salió el día 3: queda su último precio, con la fecha en que se vio
+    assert list(zip(ultimos["Precio"], ultimos["Fecha_Hora"])) == [(95.0, "2025-03-03 09:00:00"),
+                                                                   (110.0, "2025-03-02 09:00:00")]
+    agregados.cerrar()
@@ -0,0 +1,56 @@
+#test_extraccion.py
+# campos_desde_doc sobre páginas guardadas, y _JS_EXTRAER corrido en un Chrome headless real
+# contra la misma página (lo que verificar_equivalencia comprueba en vivo con VERIFICAR_EXTRACCION).
+import json, os, pathlib, shutil
+import pytest
+from conftest import FIXTURES
+from parseo import documento, _disponible
+from extraccion import campos_desde_doc, campos_en_navegador, verificar_equivalencia
+
+TIENDAS_TARJETAS = ["farmatodo", "farmago"]
+BACKENDS = ["html.parser", "lxml", "selectolax"]
+
+def _ruta(carpeta, tienda, extension):
+    return os.path.join(FIXTURES, carpeta, f"{tienda}_diclofenac.{extension}")
+
+def _fixture(carpeta, tienda, extension):
+    with open(_ruta(carpeta, tienda, extension), encoding="utf-8") as f:
+        return f.read()
+
+# tests/fixtures/extraccion: tarjetas esperadas escritas a mano con las reglas de _JS_EXTRAER
+# (texto recortado por nodo, getAttribute, null si falta); no son una captura de Chrome.
+@pytest.mark.parametrize("tienda", TIENDAS_TARJETAS)
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_campos_esperados(tienda, backend):
+    if not _disponible(backend):
+        pytest.skip(f"{backend} no instalado")
+    doc = documento(_fixture("html", tienda, "html"), tienda, backend)
+    assert campos_desde_doc(doc, tienda) == json.loads(_fixture("extraccion", tienda, "json"))
+
+# ---------------  EN CHROME (HEADLESS)  ---------------
+@pytest.fixture(scope="module")
+def chrome():
+    if not any(shutil.which(b) for b in ("chromedriver", "google-chrome", "chromium", "chromium-browser")):
+        pytest.skip("sin Chrome ni chromedriver")
+    from selenium import webdriver
+    opts = webdriver.ChromeOptions()
+    for a in ["--headless=new", "--no-sandbox", "--disable-dev-shm-usage"]:
+        opts.add_argument(a)
+    try:
+        driver = webdriver.Chrome(options=opts)
+    except Exception as e:
+        pytest.skip(f"no se pudo abrir Chrome: {e}")
+    yield driver
+    driver.quit()
+
+@pytest.mark.navegador
+@pytest.mark.parametrize("tienda", TIENDAS_TARJETAS)
+def test_navegador_como_python(chrome, tienda):
+    chrome.get(pathlib.Path(_ruta("html", tienda, "html")).as_uri())
+    en_navegador = campos_en_navegador(chrome, tienda)
+    assert en_navegador == json.loads(_fixture("extraccion", tienda, "json"))
+    for backend in BACKENDS:
+        if _disponible(backend):
+            doc = documento(_fixture("html", tienda, "html"), tienda, backend)
+            assert campos_desde_doc(doc, tienda) == en_navegador, backend
+    assert verificar_equivalencia(chrome, tienda)
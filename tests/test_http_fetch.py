@@ -0,0 +1,75 @@
+#test_http_fetch.py
+# ClienteHTTP contra un servidor HTTP local que sirve las páginas guardadas (tests/fixtures/html)
+import functools, os, threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from conftest import FIXTURES
+from http_fetch import ClienteHTTP
+from tiendas import TIENDAS
+
+class _Pagina(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive: la sesión puede reutilizar la conexión
+    conexiones = []
+
+    def setup(self):
+        super().setup()
+        self.conexiones.append(self.client_address)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def servidor():
+    _Pagina.conexiones = []
+    manejador = functools.partial(_Pagina, directory=os.path.join(FIXTURES, "html"))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), manejador)
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def _cliente():
+    cliente = ClienteHTTP(timeout=5)
+    cliente.sesion.trust_env = False   # sin proxies del entorno para localhost
+    return cliente
+
+def _navegador(llamadas):
+    def respaldo():
+        llamadas.append(1)
+        return "<html>navegador</html>"
+    return respaldo
+
+def test_por_http_con_marcado_completo(servidor):
+    cliente, llamadas = _cliente(), []
+    for tienda, archivo in (("farmago", "farmago_diclofenac.html"), ("farmatina", "farmatina_diclofenac.html"),
+                            ("farmadon", "farmadon_diclofenac.html")):
+        html = cliente.obtener_html(f"{servidor}/{archivo}", TIENDAS[tienda], _navegador(llamadas))
+        assert TIENDAS[tienda]["http"]["marcador"] in html
+    assert llamadas == [] and (cliente.por_http, cliente.por_navegador) == (3, 0)
+    cliente.cerrar()
+
+def test_respaldo_al_navegador(servidor):
+    cliente, llamadas = _cliente(), []
+    respaldo = _navegador(llamadas)
+    # Sin el marcador de FarmaGo (otra tienda), con el "incompleto" de Farmadon y un 404
+    assert cliente.obtener_html(f"{servidor}/farmasas_diclofenac.html", TIENDAS["farmago"], respaldo) \
+        == "<html>navegador</html>"
+    assert cliente.obtener_html(f"{servidor}/farmatina_diclofenac.html", TIENDAS["farmadon"], respaldo) \
+        == "<html>navegador</html>"
+    assert cliente.obtener_html(f"{servidor}/no_existe.html", TIENDAS["farmago"], respaldo) \
+        == "<html>navegador</html>"
+    # Tienda sin "http" (Farmatodo): directo al navegador, sin pedir nada
+    assert cliente.obtener_html(f"{servidor}/farmatodo_diclofenac.html", TIENDAS["farmatodo"], respaldo) \
+        == "<html>navegador</html>"
+    assert len(llamadas) == 4 and (cliente.por_http, cliente.por_navegador) == (0, 4)
+    assert cliente.solicitudes == 2   # el 404 levanta antes de contarse
+    cliente.cerrar()
+
+def test_reutiliza_la_conexion(servidor):
+    cliente = _cliente()
+    for _ in range(5):
+        cliente.obtener_html(f"{servidor}/farmago_diclofenac.html", TIENDAS["farmago"], _navegador([]))
+    assert cliente.por_http == 5
+    assert len(_Pagina.conexiones) == 1   # una sola conexión TCP para las cinco páginas
+    cliente.cerrar()
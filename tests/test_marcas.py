@@ -0,0 +1,34 @@
+#test_marcas.py
+from marcas import DiccionarioMarcas, diccionario
+
+def _dic(*entradas):
+    return DiccionarioMarcas({"grupo": "test", "patron": p, "marca": m, "prioridad": str(pr), "limite": l}
+                             for p, m, pr, l in entradas)
+
+def test_solapadas_gana_prioridad():
+    # "ab" no puede tapar a "bcd" aunque empiece antes
+    dic = _dic(("ab", "AB", 10, "subcadena"), ("bcd", "BCD", 90, "subcadena"))
+    assert dic.buscar("abcd") == "BCD"
+    assert dic.buscar("xx ab") == "AB"
+
+def test_mismo_inicio_gana_prioridad():
+    # El trie prefiere el más largo; el más corto con más prioridad tiene que ganar igual
+    dic = _dic(("gen", "GEN", 90, "prefijo"), ("genven", "GENVEN", 10, "palabra"))
+    assert dic.buscar("DICLOFENAC GENVEN") == "GEN"
+    dic = _dic(("gen", "GEN", 10, "prefijo"), ("genven", "GENVEN", 90, "palabra"))
+    assert dic.buscar("DICLOFENAC GENVEN") == "GENVEN"
+
+def test_con_borde_y_subcadena_en_la_misma_posicion():
+    dic = _dic(("calox", "CALOX", 10, "palabra"), ("calo", "CALO", 90, "subcadena"))
+    assert dic.buscar("IBUPROFENO CALOX") == "CALO"
+
+def test_palabra_corta_respeta_el_borde():
+    # "leti" es palabra: dentro de "letina" no cuenta, aunque "letina" sí sea prefijo de algo
+    dic = _dic(("leti", "LETI", 90, "palabra"), ("letinab", "LETINAB", 10, "prefijo"))
+    assert dic.buscar("LETINABX") == "LETINAB"
+    assert dic.buscar("LETI") == "LETI"
+
+def test_columna_igual_que_por_nombre():
+    dic = diccionario()
+    nombres = ["DICLOFENAC 50MG 20 TAB GENVEN", "Ibuprofeno 400 mg Calox", None, "", "ACETAMINOFEN LETI 500MG"]
+    assert dic.buscar_columna(nombres) == [dic.buscar(n) if isinstance(n, str) else None for n in nombres]
@@ -0,0 +1,53 @@
+#test_normaliza.py
+# normaliza sobre el histórico en Parquet: ids en la tabla de productos, camino incremental
+# y exportación con las columnas normalizadas
+import os
+import pandas as pd
+import normaliza
+from historial import guardar_corrida, leer_historial, leer_productos, exportar_excel
+from normaliza import normalizar_historial, id_estable
+
+def _corrida(fecha, filas):
+    return pd.DataFrame([{"Fecha_Hora": fecha, "Origen": o, "Producto_Buscado": "Diclofenac",
+                          "Marca": m, "Nombre": n, "Precio": p} for o, n, m, p in filas])
+
+PRIMERA = [("Farmatodo", "Diclofenac Potásico 50 mg x 20 Tabletas", "Genven", 125.5),
+           ("FarmaGo", "DICLOFENAC SODICO 100MG X 10 CAP", "LETI", 389.9),
+           ("FarmaGo", "Jarabe para la tos 120 ml", None, 80.0)]
+SEGUNDA = PRIMERA[:2] + [("Farmatodo", "Ibuprofeno 400mg x 10 Tabletas Calox", None, 55.0)]
+
+def test_incremental_y_exportacion(tmp_path, monkeypatch):
+    historial, unicos = tmp_path / "historial", tmp_path / "productos_unicos.csv"
+    leidos = []
+    def leer(ruta, archivos=None, **kwargs):
+        leidos.append(sorted({a.split(os.sep)[0] for a in archivos}))
+        return leer_historial(ruta, archivos=archivos, **kwargs)
+    monkeypatch.setattr(normaliza, "leer_historial", leer)
+
+    guardar_corrida(_corrida("2025-03-01 10:00:00", PRIMERA), historial)
+    assert normalizar_historial(historial, unicos) == 3
+    guardar_corrida(_corrida("2025-03-02 10:00:00", SEGUNDA), historial)
+    assert normalizar_historial(historial, unicos) == 1       # sólo el ibuprofeno es nuevo
+    assert normalizar_historial(historial, unicos) == 0
+    # Cada vez sólo los archivos que no pasaron por la tabla de productos
+    assert leidos == [["fecha=2025-03-01"], ["fecha=2025-03-02"], []]
+
+    productos = leer_productos(historial).set_index("Nombre")
+    assert len(productos) == 4
+    diclofenac = productos.loc["Diclofenac Potásico 50 mg x 20 Tabletas"]
+    assert (diclofenac.principio, diclofenac.dosis, diclofenac.presentacion, diclofenac.marca) == \
+        ("diclofenac", "50.0mg", "20tab", "genven")
+    assert diclofenac.id_producto == id_estable("diclofenac", "genven", "50.0mg", "20tab")
+    assert pd.isna(productos.loc["Jarabe para la tos 120 ml", "id_producto"])   # clave incompleta
+
+    # Incremental == completo
+    incremental = leer_productos(historial).sort_values("Nombre").reset_index(drop=True)
+    normalizar_historial(historial, unicos, completo=True)
+    completo = leer_productos(historial).sort_values("Nombre").reset_index(drop=True)
+    pd.testing.assert_frame_equal(incremental, completo, check_dtype=False)
+
+    excel = tmp_path / "consolidado.xlsx"
+    assert exportar_excel(excel, historial) == 6
+    exportado = pd.read_excel(excel)
+    assert {"nombre_norm", "principio", "dosis", "presentacion", "marca", "id_producto"} <= set(exportado)
+    assert exportado["id_producto"].notna().sum() == 5
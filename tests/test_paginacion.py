@@ -0,0 +1,179 @@
+#test_paginacion.py
+# Paginado directo sin red: la consulta Algolia repetida contra un cliente falso
+import json, os, re
+from urllib.parse import parse_qs, urlsplit
+import pytest, requests
+import paginacion
+from conftest import FIXTURES
+from paginacion import (_con_pagina, paginas_algolia, recorrer_paginas, filas_algolia,
+                        paginas_woocommerce, total_paginas_woocommerce)
+from parseo import _disponible
+from precios import limpiar_precio
+from tiendas import TIENDAS
+
+CONFIG = TIENDAS["farmatodo"]["api"]
+URL = "https://vcojeyd2po-dsn.algolia.net/1/indexes/*/queries?x-algolia-agent=Algolia"
+CUERPO = {"requests": [{"indexName": "products-venezuela", "params": "query=diclofenac&hitsPerPage=3&page=0"},
+                       {"indexName": "categories-venezuela", "params": "query=diclofenac"}]}
+
+def _hits(*skus):
+    return [{"id": s, "objectID": s, "mediaDescription": f"Diclofenac {s}", "brand": "Genven",
+             "offerPrice": None, "fullPrice": 100.0} for s in skus]
+
+# page (0-based) -> SKUs; la página 3 repite la 2: ahí se corta
+PAGINAS = {0: ["1", "2", "3"], 1: ["4", "5", "6"], 2: ["7", "8"], 3: ["7", "8"], 4: ["9"]}
+
+def _respuesta(pagina):
+    return {"results": [{"index": "products-venezuela", "page": pagina, "nbPages": len(PAGINAS),
+                         "hits": _hits(*PAGINAS.get(pagina, []))},
+                        {"index": "categories-venezuela", "hits": [{"objectID": "c-1", "description": "Analgésicos"}]}]}
+
+class _ClienteFalso:
+    def __init__(self):
+        self.pedidas, self.headers = [], []
+
+    def post_json(self, url, cuerpo, headers=None):
+        cuerpo = json.loads(cuerpo)
+        paginas = {int(parse_qs(r["params"])["page"][0]) for r in cuerpo["requests"]}
+        assert len(paginas) == 1   # todas las consultas del cuerpo piden la misma página
+        self.pedidas.append(paginas.pop())
+        self.headers.append(headers)
+        return _respuesta(self.pedidas[-1])
+
+    def get(self, url, headers=None):
+        self.pedidas.append(int(parse_qs(urlsplit(url).query)["page"][0]))
+        return json.dumps(_respuesta(self.pedidas[-1]))
+
+def _claves(respuesta):
+    return {h["id"] for r in respuesta["results"] for h in r["hits"] if "id" in h}
+
+def test_con_pagina_reemplaza_page():
+    nuevo = _con_pagina({**CUERPO, "page": 0}, 4)
+    assert [parse_qs(r["params"]) for r in nuevo["requests"]] == [
+        {"query": ["diclofenac"], "hitsPerPage": ["3"], "page": ["4"]},
+        {"query": ["diclofenac"], "page": ["4"]}]
+    assert nuevo["page"] == 4
+    assert parse_qs(CUERPO["requests"][0]["params"])["page"] == ["0"]   # el original no cambia
+
+def test_algolia_corta_en_pagina_sin_skus_nuevos():
+    cliente = _ClienteFalso()
+    peticion = {"url": URL, "headers": {":authority": "x", "X-Algolia-API-Key": "k", "Content-Length": "10"},
+                "postData": json.dumps(CUERPO)}
+    siguientes = paginas_algolia(cliente, peticion, _respuesta(0), _claves, paginas_max=20, en_paralelo=3)
+    # Páginas 2..4 del recorrido = page 1..3; la page 3 no trae nada nuevo y la 4 no se pide
+    assert sorted(cliente.pedidas) == [1, 2, 3]
+    assert [r["results"][0]["page"] for r in siguientes] == [1, 2]
+    assert cliente.headers[0] == {"X-Algolia-API-Key": "k"}
+
+def test_algolia_por_get():
+    cliente = _ClienteFalso()
+    peticion = {"url": "https://x-dsn.algolia.net/1/indexes/products/query?query=diclofenac&page=0",
+                "headers": {}, "postData": None}
+    siguientes = paginas_algolia(cliente, peticion, _respuesta(0), _claves, paginas_max=3, en_paralelo=3)
+    assert sorted(cliente.pedidas) == [1, 2] and len(siguientes) == 2   # tope: 3 páginas con la primera
+
+def test_recorrer_corta_en_pagina_inexistente():
+    pedidas = []
+    def obtener(n):
+        pedidas.append(n)
+        return None if n >= 4 else {str(n)}
+    assert recorrer_paginas(obtener, set, desde=2, hasta=10, en_paralelo=2, vistas={"1"}) == [{"2"}, {"3"}]
+    assert sorted(pedidas) == [2, 3, 4, 5]   # la tanda de la página vacía se descarta entera
+
+class _DriverFalso:
+    """Log de performance con la petición y la respuesta de la primera página"""
+    def __init__(self):
+        eventos = [{"method": "Network.requestWillBeSent",
+                    "params": {"requestId": "1", "request": {"url": URL, "method": "POST", "headers": {},
+                                                            "postData": json.dumps(CUERPO)}}},
+                   {"method": "Network.responseReceived",
+                    "params": {"requestId": "1", "response": {"url": URL, "status": 200,
+                                                              "mimeType": "application/json"}}}]
+        self.log = [{"message": json.dumps({"message": e})} for e in eventos]
+
+    def get_log(self, tipo):
+        log, self.log = self.log, []
+        return log
+
+    def execute_cdp_cmd(self, comando, params):
+        return {"body": json.dumps(_respuesta(0))}
+
+def test_filas_algolia_todas_las_paginas():
+    cliente = _ClienteFalso()
+    filas, primeras = filas_algolia(_DriverFalso(), cliente, CONFIG, "Farmatodo", "Diclofenac", limpiar_precio)
+    assert [f["Nombre"] for f in filas] == [f"Diclofenac {s}" for s in "12345678"]
+    assert len(primeras) == 1 and sorted(cliente.pedidas) == [1, 2, 3]
+
+def test_filas_algolia_sin_consulta():
+    driver = _DriverFalso()
+    driver.log = []
+    assert filas_algolia(driver, _ClienteFalso(), CONFIG, "Farmatodo", "Diclofenac", limpiar_precio) == ([], [])
+
+# ---------------  WOOCOMMERCE  ---------------
+def _pagina(archivo):
+    with open(os.path.join(FIXTURES, "html", archivo), encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml", "selectolax"])
+def test_total_paginas_solo_de_la_numeracion(backend):
+    if not _disponible(backend):
+        pytest.skip(f"{backend} no instalado")
+    # Los pies de página enlazan /blog/page/12/ y /blog/page/8/: no son páginas del listado
+    farmatina, farmadon = _pagina("farmatina_diclofenac.html"), _pagina("farmadon_diclofenac.html")
+    assert "/page/12/" in farmatina and "/page/8/" in farmadon
+    assert total_paginas_woocommerce(farmatina, backend) == 3
+    assert total_paginas_woocommerce(farmadon, backend) is None
+    paged = ('<a href="/?paged=40">Blog</a><nav class="woocommerce-pagination"><ul class="page-numbers">'
+             '<li><a class="page-numbers" href="/?s=x&amp;paged=2">2</a></li>'
+             '<li><a class="page-numbers" href="/?s=x&amp;paged=5">5</a></li></ul></nav>')
+    assert total_paginas_woocommerce(paged, backend) == 5
+
+def _listado(n, extra=""):
+    return f'<ul class="products"><li class="product-warp-item"><a href="/p/{n}">P{n}</a></li></ul>{extra}'
+
+class _ClienteWoo:
+    """Primera página fija; las siguientes de `paginas`, con `fallas` errores de red antes"""
+    def __init__(self, primera, paginas, fallas=None):
+        self.primera, self.paginas, self.fallas = primera, paginas, dict(fallas or {})
+        self.pedidas = []
+
+    def obtener_html(self, url, config, respaldo):
+        return self.primera
+
+    def get(self, url):
+        n = int(re.search(r"/page/(\d+)/", url).group(1))
+        self.pedidas.append(n)
+        if self.fallas.get(n):
+            self.fallas[n] -= 1
+            raise requests.ConnectionError("conexión reiniciada")
+        if n not in self.paginas:
+            respuesta = requests.Response()
+            respuesta.status_code = 404
+            raise requests.HTTPError("404", response=respuesta)
+        return self.paginas[n]
+
+URL_WOO = "https://farmatina.com/?s=diclofenac&post_type=product"
+
+@pytest.fixture(autouse=True)
+def _sin_espera(monkeypatch):
+    monkeypatch.setattr(paginacion, "ESPERA_REINTENTO", 0)
+
+def _navegador():
+    return "<html>navegador</html>"
+
+def test_woocommerce_error_transitorio_se_reintenta():
+    cliente = _ClienteWoo(_pagina("farmatina_diclofenac.html"), {2: _listado(2), 3: _listado(3)}, fallas={3: 1})
+    paginas = paginas_woocommerce(cliente, URL_WOO, TIENDAS["farmatina"], _navegador)
+    assert paginas[1:] == [_listado(2), _listado(3)]
+    assert sorted(cliente.pedidas) == [2, 3, 3]
+
+def test_woocommerce_error_persistente_usa_navegador():
+    cliente = _ClienteWoo(_pagina("farmatina_diclofenac.html"), {2: _listado(2), 3: _listado(3)}, fallas={3: 2})
+    assert paginas_woocommerce(cliente, URL_WOO, TIENDAS["farmatina"], _navegador) == ["<html>navegador</html>"]
+
+def test_woocommerce_sondeo_corta_en_404():
+    # Sin numeración pero con "cargar más": se sondea y la página inexistente es el final
+    primera = _listado(1, '<a class="nasa-archive-loadmore">Cargar más</a>')
+    cliente = _ClienteWoo(primera, {2: _listado(2)})
+    assert paginas_woocommerce(cliente, URL_WOO, TIENDAS["farmatina"], _navegador, paginas_max=6) == [primera, _listado(2)]
+    assert sorted(cliente.pedidas) == [2, 3, 4]
@@ -0,0 +1,107 @@
+#test_parseo.py
+# Paridad de backends (parseo.py) sobre páginas completas guardadas: cada backend tiene que
+# armar exactamente las mismas filas, y esas filas son las esperadas.
+import importlib.util, os
+import pytest
+from conftest import FIXTURES, RAIZ
+from parseo import documento, html_raiz, _disponible
+from parseo_tiendas import parsear_farmatodo, parsear_farmago, tarjetas_farmasas, productos_farmatina
+from perfil_selectores import PerfilSelectores
+
+BS4 = ("html.parser", "lxml")
+TODOS = BS4 + ("selectolax",)
+
+def _pagina(tienda):
+    archivo = tienda if tienda.endswith(".html") else f"{tienda}_diclofenac.html"
+    with open(os.path.join(FIXTURES, "html", archivo), encoding="utf-8") as f:
+        return f.read()
+
+def _farmadon():
+    # Farmadon-ws.py no es importable por nombre (guion)
+    spec = importlib.util.spec_from_file_location("farmadon_ws", os.path.join(RAIZ, "Farmadon-ws.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def _filas(filas):
+    return [(f["Nombre"], f["Marca"], f["Precio"]) for f in filas]
+
+def _farmatodo(backend):
+    return _filas(parsear_farmatodo(_pagina("farmatodo"), "Diclofenac", backend))
+
+def _farmago(backend):
+    return _filas(parsear_farmago(_pagina("farmago"), "Diclofenac", backend))
+
+def _farmasas(backend):
+    return tarjetas_farmasas(_pagina("farmasas"), backend)
+
+def _farmatina(backend):
+    return productos_farmatina(_pagina("farmatina"), backend)
+
+def _farmadon_filas(backend, tmp_path, pagina="farmadon"):
+    perfil = PerfilSelectores(str(tmp_path / "perfil.json"), "farmadon")
+    sopas = [documento(_pagina(pagina), "farmadon", backend)]
+    return [(p["nombre"], p["precio"]) for p in _farmadon().productos_farmadon(sopas, perfil, "Diclofenac")]
+
+ESPERADO = {
+    "farmatodo": [("Diclofenac Potásico 50 mg x 20 Tabletas", "Genven", "Bs. 125,50"),
+                  ("Diclofenac Sódico 75 mg/3 ml x 5Ampollas", "Calox", "Bs.\xa098,10"),
+                  ("Diclofenac Gel 1% x 50 g", "", None)],            # no disponible
+    "farmago": [("DICLOFENAC POTASICO 50MG X 20 TAB", "GENVEN", "Bs. 120,00"),
+                ("DICLOFENAC SODICO 100MG X 10 CAP", "LETI", "Bs. 389,90"),
+                ("DICLOFENAC GEL 1% 60G", None, None)],
+    "farmasas": [("DICLOFENAC POTASICO 50MG X 20 TAB", "Bs. 351.48", "/producto/A0102"),
+                 ("DICLOFENAC SODICO 100MG X 10 CAP", "Bs. 389.90", "/producto/A0107"),
+                 ("DICLOFENAC GEL 1% 60G", "Bs. 1060", "/producto/A0110")],
+    "farmatina": [("Diclofenac Potásico 50mg x 20 Tabletas Genven", "118,75\xa0Bs."),
+                  ("Diclofenac Sódico 75mg/3ml x 5 Ampollas Calox", "110,00\xa0Bs.")],
+}
+
+PARSEADORES = {"farmatodo": _farmatodo, "farmago": _farmago, "farmasas": _farmasas, "farmatina": _farmatina}
+
+@pytest.mark.parametrize("tienda", sorted(PARSEADORES))
+@pytest.mark.parametrize("backend", TODOS)
+def test_filas_por_backend(tienda, backend):
+    if not _disponible(backend):
+        pytest.skip(f"{backend} no instalado")
+    assert PARSEADORES[tienda](backend) == ESPERADO[tienda]
+
+@pytest.mark.parametrize("backend", BS4)   # la cascada de precios usa find/find_all de bs4
+def test_farmadon_por_backend(backend, tmp_path):
+    if not _disponible(backend):
+        pytest.skip(f"{backend} no instalado")
+    assert _farmadon_filas(backend, tmp_path) == [
+        ("Diclofenac Potásico 50mg x 20 Tab", "1250.50"),
+        ("Diclofenac Sódico 75mg/3ml x 5 Amp", "99.90"),        # <ins>: precio con descuento
+        ("Diclofenac Gel 1% 60g", "Precio no encontrado"),
+    ]
+
+def test_farmadon_tarjeta_anidada(tmp_path):
+    # li.product y su a.woocommerce-loop-product__link coinciden con dos selectores: un producto cada uno
+    assert _farmadon_filas("lxml", tmp_path, "farmadon_anidado.html") == [
+        ("Loratadina 10mg x 10 Tab", "45.00"),
+        ("Loratadina Jarabe 5mg/5ml x 60ml", "72.30"),
+    ]
+
+def test_raiz_con_varias_clases():
+    # "ul.products" tiene que acotar aunque el ul traiga más clases (el widget del header queda fuera)
+    for backend in BS4:
+        doc = documento(_pagina("farmatina"), "farmatina", backend)
+        assert doc.find("header") is None
+        assert len(doc.select("li.product-warp-item")) == 3
+
+class _DriverFalso:
+    """page_source y el execute_script de html_raiz (outerHTML de la raíz)"""
+    def __init__(self, pagina, raiz):
+        self.page_source, self._raiz = pagina, raiz
+
+    def execute_script(self, script, selector):
+        return self._raiz
+
+def test_html_raiz_completo_para_guardar():
+    pagina = _pagina("farmatodo")
+    driver = _DriverFalso(pagina, '<div class="cont-group-view"></div>')
+    assert html_raiz(driver, "farmatodo") == '<div class="cont-group-view"></div>'
+    assert html_raiz(driver, "farmatodo", completo=True) == pagina
+    # La página completa acotada en el parseo da las mismas filas que la raíz sola
+    assert _filas(parsear_farmatodo(pagina, "Diclofenac")) == ESPERADO["farmatodo"]
@@ -0,0 +1,63 @@
+#test_precios.py
+# limpiar_precio y los dos motores de precios_columna (Arrow y pandas) sobre los formatos
+# de las tiendas: los tres tienen que dar lo mismo.
+import math
+import pandas as pd
+import pytest
+import precios
+from precios import limpiar_precio, precios_columna
+
+CASOS = [
+    ("Bs. 1.427,75", 1427.75),
+    ("Bs.1.060.97", 1060.97),            # Farmatodo: todos puntos
+    ("Bs.\xa098,10", 98.10),
+    ("Bs. 1 427,75", 1427.75),           # espacio de miles
+    ("Bs. 12\xa0345\xa0678,90", 12345678.90),
+    ("1 250,50", 1250.50),
+    ("Bs. 351,Bs. 456,48", 456.48),      # SAAS: tachado + actual, vale el último
+    ("Bs. 351.48", 351.48),
+    ("Bs. 1060", 1060.0),
+    ("1250.50", 1250.50),                # Farmadon (normalizar_precio)
+    ("99.90", 99.90),
+    ("Bs. 1.250,50", 1250.50),
+    ("118,75\xa0Bs.", 118.75),           # Farmatina: la moneda detrás
+    ("1,234.56", 1234.56),
+    ("982,7", 982.7),
+    ("1.060", 1060.0),                   # un separador con 3 dígitos: de miles
+    ("12,345", 12345.0),
+    (".5", 0.5),                         # separador al comienzo: decimal
+    (",50", 0.5),
+    ("Bs. 120 x 2", 120.0),              # el espacio sin 3 dígitos corta el número
+    ("Precio no encontrado", None),
+    ("Agotado", None),
+    ("", None),
+    (None, None),
+]
+
+def _iguales(a, b):
+    return (a is None or (isinstance(a, float) and math.isnan(a))) if b is None else a == pytest.approx(b)
+
+@pytest.mark.parametrize("texto,esperado", CASOS)
+def test_limpiar_precio(texto, esperado):
+    assert _iguales(limpiar_precio(texto), esperado)
+
+@pytest.mark.parametrize("motor", ["arrow", "pandas"])
+def test_columna_igual_que_de_a_uno(motor, monkeypatch):
+    if motor == "arrow" and precios.pc is None:
+        pytest.skip("pyarrow no instalado")
+    if motor == "pandas":
+        monkeypatch.setattr(precios, "pc", None)
+    serie = pd.Series([t for t, _ in CASOS] + [12.5, float("nan")], dtype=object)
+    resultado = precios_columna(serie)
+    for texto, valor, de_a_uno in zip(serie, resultado, map(limpiar_precio, serie)):
+        assert _iguales(valor, de_a_uno), texto
+    for (texto, esperado), valor in zip(CASOS, resultado):
+        assert _iguales(valor, esperado), texto
+    assert resultado.iloc[-2] == 12.5
+
+def test_columna_de_texto_arrow():
+    if precios.pc is None:
+        pytest.skip("pyarrow no instalado")
+    serie = pd.Series([t for t, _ in CASOS], dtype="string[pyarrow]")
+    for (texto, esperado), valor in zip(CASOS, precios_columna(serie)):
+        assert _iguales(valor, esperado), texto
@@ -0,0 +1,115 @@
+#test_sumidero.py
+import os, sqlite3, threading
+import pandas as pd
+import pytest
+from base_precios import BasePrecios
+from historial import archivos_historial, guardar_corrida, leer_historial
+from sumidero import SumideroFilas
+from nucleo_async import NucleoAsync, adaptar_guardado
+
+def _filas(tienda, termino, *nombres):
+    return [{"Origen": tienda, "Producto_Buscado": termino, "Nombre": n} for n in nombres]
+
+def test_filas_en_orden_de_trabajos(tmp_path):
+    sumidero = SumideroFilas(str(tmp_path))
+    orden = [("A", "x"), ("B", "x"), ("A", "y")]
+    # Llegan en otro orden (el de los tiempos de cada búsqueda)
+    sumidero.agregar("A", "y", _filas("A", "y", "a3"))
+    sumidero.agregar("B", "x", _filas("B", "x", "b1", "b2"))
+    sumidero.agregar("A", "x", _filas("A", "x", "a1"))
+    assert [f["Nombre"] for f in sumidero.filas()] == ["a3", "b1", "b2", "a1"]
+    assert [f["Nombre"] for f in sumidero.filas(orden)] == ["a1", "b1", "b2", "a3"]
+    # Retomada: la misma carpeta, el mismo orden
+    assert [f["Nombre"] for f in SumideroFilas(str(tmp_path)).filas(orden)] == ["a1", "b1", "b2", "a3"]
+
+def test_bloques_por_byte_y_manifiesto_viejo(tmp_path):
+    sumidero = SumideroFilas(str(tmp_path))
+    sumidero.agregar("A", "y", _filas("A", "y", "ñandú"))   # multibyte: los bytes no son caracteres
+    sumidero.agregar("B", "x", _filas("B", "x", "b1", "b2"))
+    sumidero.agregar("A", "x", _filas("A", "x", "a1"))
+    desdes = [c[3] for c in sumidero.manifiesto["completados"]]
+    assert desdes[0] == 0 and desdes == sorted(desdes)
+    orden = [("A", "x"), ("C", "x"), ("B", "x")]   # C sin filas; (A, y) queda al final
+    esperado = ["a1", "b1", "b2", "ñandú"]
+    assert [f["Nombre"] for f in sumidero.filas(orden)] == esperado
+    # Manifiesto escrito antes del byte de inicio: [tienda, término, n]
+    sumidero.manifiesto["completados"] = [c[:3] for c in sumidero.manifiesto["completados"]]
+    sumidero._guardar_manifiesto()
+    viejo = SumideroFilas(str(tmp_path))
+    assert viejo.cantidad() == 4 and viejo.completado("B", "x")
+    assert [f["Nombre"] for f in viejo.filas(orden)] == esperado
+
+def test_guardado_fuera_del_bucle(tmp_path):
+    sumidero = SumideroFilas(str(tmp_path))
+    hilos = []
+
+    def agregar(filas):
+        hilos.append(threading.current_thread().name)
+        return sumidero.agregar("A", "x", filas)
+
+    async def buscar():
+        return _filas("A", "x", "a1", "a2")
+
+    nucleo = NucleoAsync()
+    assert nucleo.correr([adaptar_guardado(nucleo, buscar, agregar)]) == [2]
+    assert hilos[0].startswith("io")
+
+# ---------------  RETOMAR DESPUÉS DE GUARDAR  ---------------
+def _con_precio(tienda, termino, *nombres):
+    return [{**f, "Fecha_Hora": "2025-03-01 10:00:00", "Marca": None, "Precio": 10.0}
+            for f in _filas(tienda, termino, *nombres)]
+
+def _correr(carpetas, despues):
+    """Los pasos de main() desde el sumidero; `despues` hace de normalizar/agregados/Excel"""
+    sumidero = SumideroFilas(carpetas["corridas"])
+    for tienda, termino, nombres in (("A", "x", ["a1", "a2"]), ("B", "x", ["b1"])):
+        if not sumidero.completado(tienda, termino):
+            sumidero.agregar(tienda, termino, _con_precio(tienda, termino, *nombres))
+    if not sumidero.guardada:
+        df = pd.DataFrame(list(sumidero.filas()))
+        base = BasePrecios(carpetas["base"])
+        try:
+            base.registrar_corrida(df, clave=sumidero.clave)
+        finally:
+            base.cerrar()
+        guardar_corrida(df, carpetas["historial"], sello=sumidero.clave)
+        sumidero.marcar_guardada()
+    despues()
+    sumidero.terminar()
+    return sumidero
+
+def _corridas(ruta):
+    with sqlite3.connect(ruta) as con:
+        return con.execute("SELECT COUNT(*) FROM corridas").fetchone()[0]
+
+def test_retomar_tras_falla_posterior_no_duplica(tmp_path):
+    carpetas = {"corridas": str(tmp_path / "corridas"), "base": str(tmp_path / "base.sqlite"),
+                "historial": str(tmp_path / "historial")}
+
+    def excel_abierto():
+        raise PermissionError("consolidado_farmacias.xlsx está abierto")
+
+    with pytest.raises(PermissionError):
+        _correr(carpetas, excel_abierto)
+    archivos = archivos_historial(carpetas["historial"])
+    sumidero = _correr(carpetas, lambda: None)   # retoma la misma carpeta, ya guardada
+    assert sumidero.manifiesto["terminada"] and sumidero.cantidad() == 3
+    assert archivos_historial(carpetas["historial"]) == archivos
+    assert len(leer_historial(carpetas["historial"])) == 3
+    assert _corridas(carpetas["base"]) == 1
+
+def test_guardar_de_nuevo_con_la_misma_clave(tmp_path):
+    # Corte entre la escritura y la anotación: se repite el guardado con la misma clave
+    df = pd.DataFrame(_con_precio("A", "x", "a1", "a2") + _con_precio("B", "x", "b1"))
+    ruta_base, ruta_historial = str(tmp_path / "base.sqlite"), str(tmp_path / "historial")
+    base = BasePrecios(ruta_base)
+    try:
+        assert base.registrar_corrida(df, clave="20250301-101500") == base.registrar_corrida(df, clave="20250301-101500")
+        base.registrar_corrida(df)   # sin clave, como antes: otra corrida
+    finally:
+        base.cerrar()
+    assert _corridas(ruta_base) == 2
+    guardar_corrida(df, ruta_historial, sello="20250301-101500")
+    guardar_corrida(df.iloc[:2], ruta_historial, sello="20250301-101500")
+    assert sorted(leer_historial(ruta_historial)["Nombre"]) == ["a1", "a2"]   # reemplaza, no suma
+    assert not [n for n in os.listdir(ruta_historial) if n.startswith(".corrida")]
@@ -0,0 +1,108 @@
+#tiendas.py
+# Definición por tienda de todo lo que no es lógica de extracción:
+# cuándo una página está lista, qué recursos bloquear, etc. Cada scraper toma de aquí su entrada.
+#
+# "recursos": {"permitir": [...], "bloquear": [...]} ajusta recursos.BLOQUEO_BASE
+# (patrones de Network.setBlockedURLs). Si una tienda deja de cargar, permitir aquí.
+#
+# "http": {"marcador": ..., "incompleto": ...} habilita http_fetch.ClienteHTTP para la
+# tienda: se usa la respuesta HTTP si contiene `marcador` y no contiene `incompleto`;
+# si no, se cae al navegador.
+#
+# "paginado": {"item": ...} habilita paginacion.paginas_woocommerce: las páginas /page/N/
+# se piden por HTTP en paralelo; `item` es el selector de cada producto del listado.
+# "incompleto" marca entonces que hay más páginas aunque no se vea la numeración.
+#
+# "api": {"patrones", "lista", "campos"} describe las respuestas JSON que captura
+# captura_api.py: regex sobre la URL de los endpoints de producto, ruta a la lista de
+# productos y rutas (alternativas) de cada columna; "Nombre" y "Precio" son obligatorias
+# para que un ítem sea producto. Si la tienda cambia el esquema, grabar una respuesta
+# (GRABAR_API_EN), ajustar aquí y actualizar tests/fixtures/api.
+# "raiz": contenedor de resultados ('etiqueta', 'etiqueta.clase' o 'etiqueta#id'); el
+# parseo se limita a ese subárbol (parseo.documento / parseo.html_raiz).
+#
+# "tarjetas": {"item", "campos"} mapa de campos de extraccion.py, compartido por el
+# parseo en Python y la extracción dentro del navegador (un solo execute_script).
+#
+# "parser": backend de parseo.py ("html.parser", "lxml", "selectolax"). selectolax sólo
+# para tiendas cuyo código use la API común (select / select_one / get_text / get).
+# ---------------  MÓDULOS  ---------------
+from esperas import (selector_presente, spinner_ausente, texto_presente, cantidad_estable,
+                     red_inactiva, todas, cualquiera)
+
+# ---------------  TIENDAS  ---------------
+TIENDAS = {
+    "farmatodo": {
+        # Grid Angular: listo cuando el número de tarjetas deja de crecer
+        "listo": todas(selector_presente("div.card-ftd"),
+                       cantidad_estable("div.card-ftd", estable_ms=800)),
+        "recursos": {"bloquear": ["*algolia-insights*", "*insider*"]},
+        # La grilla se alimenta de búsquedas Algolia
+        "api": {"patrones": [r"algolia(net)?\.(net|com)/1/indexes/[^/]+/(query|queries)"],
+                "lista": ["results.*.hits", "hits"],
+                "campos": {"Nombre": ["mediaDescription", "description"], "Marca": ["brand", "marca"],
+                           "Precio": ["offerPrice", "fullPrice"], "sku": ["id", "objectID"]}},
+        "parser": "selectolax",
+        "raiz": "div.cont-group-view",
+        "tarjetas": {"item": "div.card-ftd",
+                     "campos": {"Nombre": "p.text-title", "Marca": "p.text-brand",
+                                "Precio": "span.price__text-price", "Enlace": "a@href",
+                                "NoDisponible": "div.offer-description.not-available"}},
+    },
+    "farmago": {
+        # Odoo renderiza en servidor: basta con que aparezcan los resultados
+        "listo": todas(selector_presente(".o_search_result_item"),
+                       cantidad_estable("a.dropdown-item", estable_ms=400)),
+        "recursos": {"bloquear": ["*/web/image/*"]},   # imágenes de Odoo sin extensión
+        "url_busqueda": "https://www.farmago.com.ve/website/search?search={}&order=name+asc",
+        "http": {"marcador": "o_search_result_item"},
+        "parser": "selectolax",
+        "raiz": "main",    # fuera queda el menú, el pie y los scripts de Odoo
+        "tarjetas": {"item": "a.dropdown-item",
+                     "campos": {"Nombre": "div.h6.fw-bold.mb-0", "Precio": "span.oe_currency_value",
+                                "Enlace": "@href"}},
+    },
+    "farmasas": {
+        "listo": todas(spinner_ausente("mat-spinner, mat-progress-spinner"),
+                       cantidad_estable("div.contenedor-informacion", estable_ms=1000)),
+        # Los íconos de Angular Material vienen como fuente: sin ellos la grilla carga igual
+        "recursos": {},
+        # El listado de la tienda Angular trae el fabricante: no hace falta visitar cada ficha
+        "api": {"patrones": [r"tienda\.farmaciasaas\.com/api/[^?]*(productos|buscar)"],
+                "lista": ["data", "data.*", "content", "productos"],
+                "campos": {"Nombre": ["nombre", "descripcion"],
+                           "Marca": ["fabricante.nombre", "fabricante", "laboratorio.nombre",
+                                     "laboratorio", "marca"],
+                           "Precio": ["precioOferta", "precio", "pvp"], "sku": ["codigo", "id"]}},
+        "parser": "lxml",   # el precio usa find(string=...) / find_parent de bs4
+        "raiz": "app-root",  # la app Angular; fuera quedan los scripts y estilos
+    },
+    "farmasas_detalle": {
+        # La ficha pinta el bloque FABRICANTE después de mat-card-content
+        "listo": todas(selector_presente("mat-card-content"),
+                       cualquiera(texto_presente("FABRICANTE"), red_inactiva(700))),
+        "recursos": {},
+        "parser": "lxml",   # :-soup-contains y find_next
+        "raiz": "app-root",
+    },
+    "farmatina": {
+        "listo": todas(selector_presente("li.product-warp-item"),
+                       cantidad_estable("li.product-warp-item", estable_ms=600)),
+        "recursos": {"bloquear": ["*/wp-content/uploads/*"]},
+        "url_busqueda": "https://farmatina.com/?s={}&post_type=product&dgwt_wcas=1",
+        "http": {"marcador": "product-warp-item", "incompleto": "nasa-archive-loadmore"},
+        "paginado": {"item": "li.product-warp-item"},
+        "parser": "selectolax",
+        "raiz": "ul.products",
+    },
+    "farmadon": {
+        "listo": cualquiera(cantidad_estable("section.product, li.product, .product-grid-item", estable_ms=800),
+                            red_inactiva(1000)),
+        "recursos": {"bloquear": ["*/wp-content/uploads/*"]},
+        "url_busqueda": "https://www.farmadon.com.ve/?s={}&post_type=product&dgwt_wcas=1",
+        "http": {"marcador": "type-product", "incompleto": "next page-numbers"},
+        "paginado": {"item": ".type-product"},
+        "parser": "lxml",   # la cascada de precios usa find/find_all con regex
+        "raiz": "main",
+    },
+}